@@ -0,0 +1,223 @@
+"""
+Headless translation service.
+
+Run from the repository root, with a TM backend that worker processes can
+share (the snapshot and JSON backends lock their directory to one process,
+so a second worker would fail to start), e.g.:
+
+    TM_STORAGE_URL=sqlite:app/data/tm/translation_memory.sqlite3 \
+        uvicorn api:app --app-dir app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from utils.metrics import REGISTRY
+from utils.sarvam_client import SarvamAPIError
+from utils.service import TranslationService
+
+# Upper bound on groups of a batch request translated at the same time
+MAX_CONCURRENT_GROUPS = int(os.getenv("MAX_CONCURRENT_GROUPS", "8"))
+# Seconds between checks of the glossary files for changes made elsewhere
+GLOSSARY_RELOAD_INTERVAL = float(os.getenv("GLOSSARY_RELOAD_INTERVAL", "5"))
+
+
+class TranslateRequest(BaseModel):
+    text: str
+    source_lang: str
+    target_lang: str
+    translation_mode: str = "formal"
+    output_script: Optional[str] = None
+    domain: Optional[str] = None
+
+
+class TranslateResponse(BaseModel):
+    translation: str
+    stats: Dict[str, int] = {}
+
+
+class BatchTranslateRequest(BaseModel):
+    items: List[TranslateRequest] = Field(..., description="Segments to translate, "
+                                                           "in any mix of language pairs")
+
+
+class BatchItemResult(BaseModel):
+    translation: Optional[str] = None
+    error: Optional[Dict[str, Any]] = Field(None, description="Set instead of the translation "
+                                                              "when the item failed")
+
+
+class BatchTranslateResponse(BaseModel):
+    results: List[BatchItemResult]
+    stats: Dict[str, int]
+
+
+service: Optional[TranslationService] = None
+
+
+async def _watch_glossary():
+    """Reload the glossary of this worker whenever its files change"""
+    while True:
+        await asyncio.sleep(GLOSSARY_RELOAD_INTERVAL)
+        try:
+            await run_in_threadpool(service.refresh_glossary)
+        except Exception:
+            # Keep serving the loaded glossary; the next check retries
+            pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Each uvicorn worker builds its own service on the shared TM storage
+    global service
+    service = TranslationService()
+    watcher = asyncio.create_task(_watch_glossary())
+    yield
+    watcher.cancel()
+    service.close()
+    service = None
+
+
+app = FastAPI(title="Hybrid Translation Service", lifespan=lifespan)
+
+
+def _error_detail(e: SarvamAPIError) -> Dict[str, Any]:
+    return {
+        "error": str(e),
+        "upstream_status": e.status_code,
+        "upstream_response": e.response_text
+    }
+
+
+def _api_error(e: SarvamAPIError) -> HTTPException:
+    return HTTPException(status_code=502, detail=_error_detail(e))
+
+
+@app.get("/health")
+async def health():
+    """Liveness: the process is up"""
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+async def ready():
+    """Readiness: the service is initialized and its TM storage answers"""
+    if service is None:
+        return JSONResponse(status_code=503, content={"status": "starting"})
+    try:
+        pairs = await run_in_threadpool(service.tm.storage.language_pairs)
+    except Exception as e:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "error": str(e)})
+    return {"status": "ready", "language_pairs": len(pairs)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline and API client metrics of this worker, in Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render_prometheus(),
+                             media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/glossary/domains")
+async def glossary_domains():
+    """Domains of the glossary this service applies"""
+    return {"domains": service.glossary.get_domains()}
+
+
+@app.get("/tm/export")
+async def export_tm(source_lang: Optional[str] = None, target_lang: Optional[str] = None,
+                    modified_since: Optional[datetime] = None):
+    """The TM (or one language pair of it) as a TMX download.
+
+    The document is streamed from storage in chunks as it is sent, so
+    neither the service nor the client holds the whole file.
+    """
+    return StreamingResponse(
+        service.tm.iter_tmx(source_lang, target_lang, modified_since),
+        media_type="application/x-tmx+xml",
+        headers={"Content-Disposition": 'attachment; filename="translation_memory.tmx"'}
+    )
+
+
+@app.post("/translate", response_model=TranslateResponse)
+async def translate(request: TranslateRequest):
+    """Translate one text through TM, result cache and API"""
+    try:
+        translation, stats = await run_in_threadpool(
+            service.pipeline.translate, request.text, request.source_lang,
+            request.target_lang, request.translation_mode, request.output_script,
+            request.domain
+        )
+    except SarvamAPIError as e:
+        raise _api_error(e)
+    return TranslateResponse(translation=translation, stats=stats)
+
+
+@app.post("/translate/batch", response_model=BatchTranslateResponse)
+async def translate_batch(request: BatchTranslateRequest):
+    """Translate many texts; items sharing language pair and options are
+    translated together so their TM misses share API calls.
+
+    An upstream failure only fails the items it concerns: a group whose
+    batched call fails is retried item by item, and items that still fail
+    get an ``error`` instead of a translation.
+    """
+    groups: "OrderedDict[tuple, List[int]]" = OrderedDict()
+    for position, item in enumerate(request.items):
+        key = (item.source_lang, item.target_lang, item.translation_mode,
+               item.output_script, item.domain)
+        groups.setdefault(key, []).append(position)
+
+    limit = asyncio.Semaphore(MAX_CONCURRENT_GROUPS)
+
+    def translate_group(key, texts) -> Tuple[List[BatchItemResult], List[Dict[str, int]]]:
+        try:
+            translations, stats = service.pipeline.translate_batch(texts, *key)
+            return [BatchItemResult(translation=translation)
+                    for translation in translations], [stats]
+        except SarvamAPIError as e:
+            if len(texts) == 1:
+                return [BatchItemResult(error=_error_detail(e))], []
+        items, item_stats = [], []
+        for text in texts:
+            try:
+                translation, stats = service.pipeline.translate(text, *key)
+            except SarvamAPIError as e:
+                items.append(BatchItemResult(error=_error_detail(e)))
+            else:
+                items.append(BatchItemResult(translation=translation))
+                item_stats.append(stats)
+        return items, item_stats
+
+    async def run_group(key, positions):
+        async with limit:
+            texts = [request.items[position].text for position in positions]
+            return await run_in_threadpool(translate_group, key, texts)
+
+    outputs = await asyncio.gather(*(run_group(key, positions)
+                                     for key, positions in groups.items()))
+
+    results: List[Optional[BatchItemResult]] = [None] * len(request.items)
+    totals: Dict[str, int] = {"failed": 0}
+    for positions, (items, group_stats) in zip(groups.values(), outputs):
+        for position, item in zip(positions, items):
+            results[position] = item
+            totals["failed"] += item.error is not None
+        for stats in group_stats:
+            for name, value in stats.items():
+                totals[name] = totals.get(name, 0) + value
+    return BatchTranslateResponse(results=results, stats=totals)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("api:app", host=os.getenv("HOST", "0.0.0.0"),
+                port=int(os.getenv("PORT", "8000")),
+                workers=int(os.getenv("WEB_CONCURRENCY", "1")))
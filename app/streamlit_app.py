@@ -1,27 +1,42 @@
 import streamlit as st
-import requests
 import json
+import os
+import tempfile
+import requests
+from datetime import datetime
 from utils.translation_memory import TranslationMemory
+from utils.tm_storage import open_storage
 from utils.glossary import Glossary
+from utils.pipeline import TranslationPipeline
+from utils.result_cache import ResultCache
+from utils.sarvam_client import DEFAULT_ENDPOINT, SarvamAPIError, SarvamClient
+from utils.document_stream import DocumentTranslator, read_document
+from utils.metrics import REGISTRY
+from utils.tm_retention import (DEFAULT_POLICY, RetentionPolicy, apply_retention,
+                                compact_duplicates, load_policies, most_used, save_policies)
 
 # Set page config first
 st.set_page_config(page_title="Advanced Translation Service", page_icon="🌐")
 
-# Sarvam AI API Configuration
-SARVAM_API_ENDPOINT = "https://api.sarvam.ai/translate"
-API_KEY = "b61ffcf0-9e8f-498e-bb5d-4b7f8eb70132"
+# Sarvam AI API Configuration (the endpoint can point at a local stand-in server)
+SARVAM_API_ENDPOINT = os.getenv("SARVAM_API_ENDPOINT", DEFAULT_ENDPOINT)
+API_KEY = os.getenv("SARVAM_API_KEY", "b61ffcf0-9e8f-498e-bb5d-4b7f8eb70132")
+# When set, translation is delegated to the headless service (app/api.py)
+TRANSLATION_SERVICE_URL = os.getenv("TRANSLATION_SERVICE_URL", "").rstrip("/")
+# Characters of a document translation shown while it streams in
+DOCUMENT_PREVIEW_CHARS = 5000
+# Per-language-pair TM retention policies
+RETENTION_POLICY_PATH = os.getenv("TM_RETENTION_POLICIES", "app/data/tm/retention.json")
 
 # Initialize Translation Memory and Glossary
 @st.cache_resource
 def get_tm():
-    return TranslationMemory()
+    # TM_STORAGE_URL selects the backend: json:<dir>, sqlite:<path> or postgresql://...
+    return TranslationMemory(storage=open_storage())
 
 @st.cache_resource
 def get_glossary():
-    return Glossary()
-
-tm = get_tm()
-glossary = get_glossary()
+    return Glossary(os.getenv("GLOSSARY_DIR", "app/data/glossaries"))
 
 # Supported languages (as per Sarvam AI documentation)
 LANGUAGES = {
@@ -38,65 +53,121 @@ LANGUAGES = {
     "te-IN": "Telugu"
 }
 
+@st.cache_resource
+def get_client():
+    return SarvamClient.from_env(api_key=API_KEY, endpoint=SARVAM_API_ENDPOINT)
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache()
+
+@st.cache_resource
+def get_pipeline():
+    client = get_client()
+    return TranslationPipeline(tm, glossary, client.translate,
+                               batch_translate_fn=client.translate_many,
+                               result_cache=get_result_cache())
+
+# A thin client of the service builds no TM, glossary or pipeline of its
+# own: the service's are the ones that are read and written
+tm = None if TRANSLATION_SERVICE_URL else get_tm()
+glossary = None if TRANSLATION_SERVICE_URL else get_glossary()
+pipeline = None if TRANSLATION_SERVICE_URL else get_pipeline()
+
+@st.cache_data(ttl=60)
+def get_service_domains():
+    """Glossary domains of the translation service (["general"] if unreachable)"""
+    try:
+        response = requests.get(f"{TRANSLATION_SERVICE_URL}/glossary/domains", timeout=10)
+        response.raise_for_status()
+        return response.json()["domains"]
+    except (requests.RequestException, ValueError, KeyError):
+        return ["general"]
+
+def get_domains():
+    """Domains offered for terminology: the service's in thin-client mode"""
+    return get_service_domains() if TRANSLATION_SERVICE_URL else glossary.get_domains()
+
 def translate_text(text, source_lang, target_lang, translation_mode="formal", 
                   output_script=None, domain=None):
-    """Translate text using TM, Glossary, and Sarvam AI API"""
-    
-    # Step 1: Check Translation Memory for exact or fuzzy matches
-    tm_match = tm.find_match(text, source_lang, target_lang, threshold=0.8)
-    if tm_match:
-        translation, similarity = tm_match
-        st.info(f"Found TM match with {similarity*100:.1f}% similarity")
-        return translation
-    
-    # Step 2: Use Sarvam AI API for translation
-    headers = {
-        "api-subscription-key": API_KEY,
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "input": text,
-        "source_language_code": source_lang,
-        "target_language_code": target_lang,
-        "mode": translation_mode
-    }
-    
-    if output_script and output_script != "Default":
-        payload["output_script"] = output_script.lower()
-    
+    """Translate text segment by segment using TM, Glossary, and Sarvam AI API"""
+    if TRANSLATION_SERVICE_URL:
+        return translate_remote(text, source_lang, target_lang, translation_mode,
+                                output_script, domain)
     try:
-        response = requests.post(SARVAM_API_ENDPOINT, headers=headers, json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            translation = result["translated_text"]
-            
-            # Step 3: Apply glossary terms to the translation
-            if domain:
-                translation = glossary.apply_glossary(
-                    translation, source_lang, target_lang, domain
-                )
-            
-            # Step 4: Store the translation in TM
-            tm.add_translation(text, translation, source_lang, target_lang)
-            
-            return translation
-        else:
-            st.error(f"API Error: {response.status_code}")
-            st.error(f"Response: {response.text}")
-            return None
-            
+        translation, stats = pipeline.translate(
+            text, source_lang, target_lang, translation_mode, output_script, domain
+        )
+    except SarvamAPIError as e:
+        st.error(f"Translation failed: {str(e)}")
+        if e.response_text:
+            st.error(f"Response: {e.response_text}")
+        return None
     except Exception as e:
         st.error(f"Translation failed: {str(e)}")
         return None
 
+    cache_stats = get_result_cache().get_statistics()
+    show_translation_stats(stats, f" Cache hit ratio: {cache_stats['hit_ratio']*100:.1f}%")
+    return translation
+
+def request_translation(text, source_lang, target_lang, translation_mode="formal",
+                        output_script=None, domain=None):
+    """POST text to the translation service; returns (translation, stats)"""
+    response = requests.post(f"{TRANSLATION_SERVICE_URL}/translate", json={
+        "text": text,
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "translation_mode": translation_mode,
+        "output_script": output_script,
+        "domain": domain
+    }, timeout=120)
+    response.raise_for_status()
+    result = response.json()
+    return result["translation"], result["stats"]
+
+def translate_remote(text, source_lang, target_lang, translation_mode="formal",
+                     output_script=None, domain=None):
+    """Translate text through the translation service"""
+    try:
+        translation, stats = request_translation(
+            text, source_lang, target_lang, translation_mode, output_script, domain
+        )
+    except requests.HTTPError as e:
+        st.error(f"Translation failed: HTTP {e.response.status_code}")
+        st.error(f"Response: {e.response.text}")
+        return None
+    except requests.RequestException as e:
+        st.error(f"Translation service unreachable: {str(e)}")
+        return None
+
+    show_translation_stats(stats)
+    return translation
+
+@st.cache_resource
+def get_document_translator():
+    # Chunks go through the service when one is configured
+    if TRANSLATION_SERVICE_URL:
+        return DocumentTranslator(request_translation)
+    return DocumentTranslator(pipeline.translate, max_chunk_chars=pipeline.max_batch_chars)
+
+def show_translation_stats(stats, suffix=""):
+    st.info(
+        f"{stats['tm_segments']} of {stats['segments']} segments from TM "
+        f"({stats['tm_exact']} exact, {stats['tm_normalized']} normalized, "
+        f"{stats['tm_fuzzy']} fuzzy), "
+        f"{stats['cache_hits']} from cache, "
+        f"{stats['api_segments']} via {stats['api_calls']} API call(s). "
+        f"API characters saved: {stats['characters_saved']} of {stats['characters']}."
+        + suffix
+    )
+
 # Streamlit UI
 st.title("🌐 Advanced Translation Service")
 st.write("Powered by Sarvam AI with TM and Glossary Support")
 
 # Create tabs for different features
-tab1, tab2, tab3 = st.tabs(["Translate", "Translation Memory", "Glossary"])
+tab1, tab2, tab3, tab4 = st.tabs(["Translate", "Translation Memory", "Glossary", "Analytics"])
 
 with tab1:
     col1, col2 = st.columns(2)
@@ -140,7 +211,7 @@ with tab1:
         with col4:
             domain = st.selectbox(
                 "Domain:",
-                options=["general"] + glossary.get_domains(),
+                options=["general"] + [d for d in get_domains() if d != "general"],
                 help="Select the domain for terminology"
             )
 
@@ -174,99 +245,349 @@ with tab1:
         else:
             st.warning("Please enter some text to translate.")
 
+    # Documents are translated chunk by chunk and shown as chunks complete
+    st.write("### Translate a Document")
+    document = st.file_uploader("Upload a document", type=["txt", "md", "docx"])
+    if document is not None and st.button("Translate Document"):
+        progress_bar = st.progress(0.0)
+        output_area = st.empty()
+        # The translation is written to a temporary file as chunks arrive;
+        # only its last characters are kept and shown
+        output_file = tempfile.TemporaryFile()
+        preview = ""
+        totals = {}
+        translated_chars = 0
+        try:
+            for source_chunk, translated_chunk, chunk_stats in get_document_translator().translate_stream(
+                    read_document(document, document.name), source_lang, target_lang,
+                    translation_mode, output_script, domain):
+                output_file.write(translated_chunk.encode("utf-8"))
+                preview = (preview + translated_chunk)[-DOCUMENT_PREVIEW_CHARS:]
+                for name, value in chunk_stats.items():
+                    totals[name] = totals.get(name, 0) + value
+                translated_chars += len(source_chunk.encode("utf-8"))
+                # Progress by source bytes (exact for text files, approximate for docx)
+                progress_bar.progress(min(translated_chars / max(document.size, 1), 1.0))
+                if document.name.endswith(".md"):
+                    output_area.markdown(preview)
+                else:
+                    output_area.text(preview)
+        except Exception as e:
+            st.error(f"Translation failed: {str(e)}")
+        else:
+            progress_bar.progress(1.0)
+            if totals:
+                show_translation_stats(totals)
+            base_name = document.name.rsplit(".", 1)[0]
+            extension = "md" if document.name.endswith(".md") else "txt"
+            output_file.seek(0)
+            st.download_button(
+                "Download Translation",
+                data=output_file,
+                file_name=f"{base_name}_{target_lang}.{extension}",
+                mime="text/plain"
+            )
+
 with tab2:
     st.header("Translation Memory Management")
+    if TRANSLATION_SERVICE_URL:
+        # Imports, exports and cleanup would act on a TM the service does not use
+        st.info(f"The translation memory is managed by the translation service at "
+                f"{TRANSLATION_SERVICE_URL}. Import, export and clean it up where the "
+                "service runs, against its TM_STORAGE_URL (see utils.tmx_ingest and "
+                "utils.tm_storage).")
+        st.markdown(f"[Download the TM as TMX]({TRANSLATION_SERVICE_URL.rstrip('/')}/tm/export) "
+                    "(streamed by the service)")
+    else:
+        # TM Statistics
+        stats = tm.get_statistics()
+        st.write("### Statistics")
+        col5, col6, col7 = st.columns(3)
+        col5.metric("Total Translation Pairs", stats["total_pairs"])
+        col6.metric("Source Languages", len(stats["source_languages"]))
+        col7.metric("Target Languages", len(stats["target_languages"]))
     
-    # TM Statistics
-    stats = tm.get_statistics()
-    st.write("### Statistics")
-    col5, col6, col7 = st.columns(3)
-    col5.metric("Total Translation Pairs", stats["total_pairs"])
-    col6.metric("Source Languages", len(stats["source_languages"]))
-    col7.metric("Target Languages", len(stats["target_languages"]))
+        # TMX Import/Export
+        st.write("### Import/Export TMX")
+        col8, col9 = st.columns(2)
     
-    # TMX Import/Export
-    st.write("### Import/Export TMX")
-    col8, col9 = st.columns(2)
-    
-    with col8:
-        tmx_file = st.file_uploader("Import TMX File", type=["tmx"])
-        if tmx_file and st.button("Import TMX"):
-            try:
-                tm.import_tmx(tmx_file)
-                st.success("TMX file imported successfully!")
-            except Exception as e:
-                st.error(f"Failed to import TMX: {str(e)}")
-    
-    with col9:
-        if st.button("Export TMX"):
-            try:
-                export_path = "app/data/tm/export.tmx"
-                tm.export_tmx(export_path)
-                st.success(f"TMX exported to {export_path}")
-            except Exception as e:
-                st.error(f"Failed to export TMX: {str(e)}")
+        with col8:
+            tmx_file = st.file_uploader("Import TMX File", type=["tmx"])
+            if tmx_file and st.button("Import TMX"):
+                try:
+                    progress_bar = st.progress(0.0, text="Importing TMX...")
 
-with tab3:
-    st.header("Glossary Management")
+                    def show_import_progress(counts):
+                        progress_bar.progress(
+                            counts["progress"],
+                            text=f"Imported {counts['imported']} of {counts['processed']} units..."
+                        )
+
+                    counts = tm.import_tmx(tmx_file, progress_callback=show_import_progress)
+                    progress_bar.empty()
+                    st.success(
+                        f"TMX file imported successfully! {counts['imported']} imported, "
+                        f"{counts['duplicates']} duplicates, {counts['skipped']} skipped."
+                    )
+                except Exception as e:
+                    st.error(f"Failed to import TMX: {str(e)}")
     
-    # Add new term
-    with st.expander("Add New Term"):
-        col10, col11 = st.columns(2)
-        
-        with col10:
-            source_term = st.text_input("Source Term")
-            source_lang_term = st.selectbox(
-                "Source Language",
-                options=list(LANGUAGES.keys()),
-                format_func=lambda x: LANGUAGES[x],
-                key="source_lang_term"
+        with col9:
+            export_pair = st.selectbox(
+                "Language pair to export:",
+                options=["All"] + stats["language_pairs"]
             )
-        
-        with col11:
-            target_term = st.text_input("Target Term")
-            target_lang_term = st.selectbox(
-                "Target Language",
-                options=list(LANGUAGES.keys()),
-                format_func=lambda x: LANGUAGES[x],
-                key="target_lang_term"
+            filter_by_date = st.checkbox("Only entries modified since")
+            modified_since = st.date_input("Modified since", disabled=not filter_by_date)
+
+            if st.button("Export TMX"):
+                try:
+                    export_source, export_target = (None, None)
+                    if export_pair != "All":
+                        export_source, export_target = export_pair.split("->")
+                    since = None
+                    if filter_by_date:
+                        since = datetime.combine(modified_since, datetime.min.time())
+
+                    # Stream the TMX to a temporary file instead of building it in
+                    # memory; the download button still reads the file into memory
+                    # (Streamlit serves downloads from memory), so large memories
+                    # are better exported through the service's GET /tm/export
+                    export_file = tempfile.TemporaryFile()
+                    units = tm.export_tmx(export_file, export_source, export_target, since)
+                    export_file.seek(0)
+                    st.success(f"Exported {units} translation units")
+                    st.download_button(
+                        "Download TMX",
+                        data=export_file,
+                        file_name="translation_memory.tmx",
+                        mime="application/x-tmx+xml"
+                    )
+                except Exception as e:
+                    st.error(f"Failed to export TMX: {str(e)}")
+
+        # Retention policies and compaction
+        st.write("### Memory Cleanup")
+        policies = load_policies(RETENTION_POLICY_PATH)
+        policy_pair = st.selectbox(
+            "Policy for:",
+            options=[DEFAULT_POLICY] + stats["language_pairs"],
+            format_func=lambda x: "All language pairs (default)" if x == DEFAULT_POLICY else x,
+            key="policy_pair"
+        )
+        policy = policies.get(policy_pair) or RetentionPolicy()
+        col14, col15 = st.columns(2)
+        with col14:
+            max_entries = st.number_input("Max entries (0 = unlimited)", min_value=0,
+                                          value=policy.max_entries or 0, step=1000)
+            strategy = st.radio(
+                "Evict first:",
+                options=list(RetentionPolicy.STRATEGIES),
+                index=RetentionPolicy.STRATEGIES.index(policy.strategy),
+                format_func=lambda x: {"lru": "Least recently used", "lfu": "Least frequently used"}[x],
+                horizontal=True
             )
-        
-        term_domain = st.text_input("Domain", value="general")
-        term_context = st.text_area("Context (Optional)")
-        
-        if st.button("Add Term"):
-            if source_term and target_term:
-                glossary.add_term(
-                    source_term,
-                    target_term,
-                    source_lang_term,
-                    target_lang_term,
-                    term_domain,
-                    term_context
-                )
-                st.success("Term added successfully!")
+        with col15:
+            max_age_days = st.number_input("Expire entries unused for (days, 0 = never)",
+                                           min_value=0, value=int(policy.max_age_days or 0))
+            pin_imported = st.checkbox("Never remove TMX imports", value=policy.pin_imported)
+
+        col16, col17, col18 = st.columns(3)
+        if col16.button("Save Policy"):
+            policies[policy_pair] = RetentionPolicy(max_entries or None, strategy,
+                                                    max_age_days or None, pin_imported)
+            save_policies(RETENTION_POLICY_PATH, policies)
+            st.success(f"Saved retention policy for {policy_pair}")
+        if col17.button("Apply Retention"):
+            if not policies:
+                st.warning("Save a policy first.")
             else:
-                st.warning("Please enter both source and target terms.")
-    
-    # Import/Export Glossary
-    st.write("### Import/Export Glossary")
-    col12, col13 = st.columns(2)
-    
-    with col12:
-        glossary_file = st.file_uploader("Import Glossary (CSV)", type=["csv"])
-        if glossary_file and st.button("Import Glossary"):
-            try:
-                glossary.import_glossary(glossary_file)
-                st.success("Glossary imported successfully!")
-            except Exception as e:
-                st.error(f"Failed to import glossary: {str(e)}")
-    
-    with col13:
-        if st.button("Export Glossary"):
-            try:
-                export_path = "app/data/glossaries/export.csv"
-                glossary.export_glossary(export_path)
-                st.success(f"Glossary exported to {export_path}")
-            except Exception as e:
-                st.error(f"Failed to export glossary: {str(e)}") 
\ No newline at end of file
+                with st.spinner("Applying retention policies..."):
+                    results = apply_retention(tm, policies)
+                    tm.save_tm()
+                st.success(f"Removed {sum(r['expired'] + r['evicted'] for r in results)} entries")
+                st.table(results)
+        if col18.button("Compact Duplicates"):
+            with st.spinner("Removing near-duplicate entries..."):
+                results = []
+                for pair in stats["language_pairs"]:
+                    pair_source, pair_target = pair.split("->")
+                    results.append(compact_duplicates(tm, pair_source, pair_target,
+                                                      pin_imported=pin_imported))
+                tm.save_tm()
+            st.success(
+                f"Removed {sum(r['entries'] - r['remaining'] for r in results)} near-duplicate entries"
+            )
+            st.table(results)
+
+        # Usage of the stored entries; this scans the whole pair, so only on request
+        if policy_pair != DEFAULT_POLICY and st.button("Show Most Used Entries"):
+            usage_source, usage_target = policy_pair.split("->")
+            top_entries = most_used(tm, usage_source, usage_target)
+            if top_entries:
+                st.write(f"Most used entries ({policy_pair})")
+                st.table([{"Source": source, "Translation": text, "Hits": hits, "Last used": last_used}
+                          for hits, last_used, source, text in top_entries])
+            else:
+                st.info(f"No entries of {policy_pair} have been used yet.")
+
+with tab3:
+    st.header("Glossary Management")
+    if TRANSLATION_SERVICE_URL:
+        # Edits here would go to a glossary the service does not use
+        st.info(f"The glossary is managed where the translation service at "
+                f"{TRANSLATION_SERVICE_URL} runs: edit its GLOSSARY_DIR with this app "
+                "(without TRANSLATION_SERVICE_URL) or utils.glossary, and the service "
+                "picks up the changes within seconds.")
+        st.write("Domains: " + ", ".join(get_service_domains()))
+    else:
+        # Add new term
+        with st.expander("Add New Term"):
+            col10, col11 = st.columns(2)
+
+            with col10:
+                source_term = st.text_input("Source Term")
+                source_lang_term = st.selectbox(
+                    "Source Language",
+                    options=list(LANGUAGES.keys()),
+                    format_func=lambda x: LANGUAGES[x],
+                    key="source_lang_term"
+                )
+
+            with col11:
+                target_term = st.text_input("Target Term")
+                target_lang_term = st.selectbox(
+                    "Target Language",
+                    options=list(LANGUAGES.keys()),
+                    format_func=lambda x: LANGUAGES[x],
+                    key="target_lang_term"
+                )
+
+            term_domain = st.text_input("Domain", value="general")
+            term_context = st.text_area("Context (Optional)")
+
+            if st.button("Add Term"):
+                if source_term and target_term:
+                    glossary.add_term(
+                        source_term,
+                        target_term,
+                        source_lang_term,
+                        target_lang_term,
+                        term_domain,
+                        term_context
+                    )
+                    st.success("Term added successfully!")
+                else:
+                    st.warning("Please enter both source and target terms.")
+
+        # Import/Export Glossary
+        st.write("### Import/Export Glossary")
+        col12, col13 = st.columns(2)
+
+        with col12:
+            glossary_file = st.file_uploader("Import Glossary (CSV or TBX)", type=["csv", "tbx"])
+            if glossary_file and st.button("Import Glossary"):
+                try:
+                    file_format = "tbx" if glossary_file.name.lower().endswith(".tbx") else "csv"
+                    import_stats = glossary.import_glossary(glossary_file, format=file_format)
+                    st.success(f"Glossary imported successfully! {import_stats['imported']} terms added, "
+                               f"{import_stats['duplicates']} duplicates and "
+                               f"{import_stats['skipped']} incomplete rows skipped.")
+                except Exception as e:
+                    st.error(f"Failed to import glossary: {str(e)}")
+
+        with col13:
+            if st.button("Export Glossary"):
+                try:
+                    export_path = os.path.join(glossary.glossary_dir, "export.csv")
+                    glossary.export_glossary(export_path)
+                    st.success(f"Glossary exported to {export_path}")
+                except Exception as e:
+                    st.error(f"Failed to export glossary: {str(e)}") 
+
+def stage_latency_rows():
+    """Latency summary of every timed stage, in milliseconds"""
+    histograms = [
+        ("request", REGISTRY.get("translation_request_seconds"), {}),
+        *[(stage, REGISTRY.get("translation_stage_seconds"), {"stage": stage})
+          for stage in ("tm_lookup", "api", "glossary", "tm_write")],
+        ("API HTTP request", REGISTRY.get("sarvam_api_request_seconds"), {}),
+        ("rate limiter wait", REGISTRY.get("sarvam_api_rate_limit_wait_seconds"), {}),
+    ]
+    rows = []
+    for name, histogram, labels in histograms:
+        summary = histogram.summary(**labels) if histogram else None
+        if not summary or not summary["count"]:
+            continue
+        rows.append({
+            "Stage": name,
+            "Count": summary["count"],
+            "Mean (ms)": round(summary["mean"] * 1000, 2),
+            "p50 (ms)": round(summary["p50"] * 1000, 2),
+            "p95 (ms)": round(summary["p95"] * 1000, 2),
+            "p99 (ms)": round(summary["p99"] * 1000, 2),
+            "Total (s)": round(summary["sum"], 2)
+        })
+    return rows
+
+def counter_values(name, label=None):
+    """{label value: count} of a counter, or its total without a label"""
+    counter = REGISTRY.get(name)
+    samples = counter.samples() if counter else {}
+    if label is None:
+        return sum(samples.values())
+    return {key[0]: value for key, value in samples.items()}
+
+with tab4:
+    st.header("Analytics")
+
+    if TRANSLATION_SERVICE_URL:
+        # Metrics live in the service's worker processes
+        try:
+            response = requests.get(f"{TRANSLATION_SERVICE_URL}/metrics", timeout=10)
+            response.raise_for_status()
+            st.write(f"Metrics of {TRANSLATION_SERVICE_URL} (one worker per scrape)")
+            st.code(response.text, language="text")
+        except requests.RequestException as e:
+            st.error(f"Could not fetch service metrics: {str(e)}")
+    else:
+        sources = counter_values("translation_segments_total", "source")
+        segments = sum(sources.values())
+        tm_segments = sum(value for name, value in sources.items() if name.startswith("tm_"))
+        characters = counter_values("translation_characters_total", "kind")
+
+        col19, col20, col21, col22 = st.columns(4)
+        col19.metric("Segments translated", int(segments))
+        col20.metric("TM hit ratio", f"{tm_segments / segments * 100:.1f}%" if segments else "-")
+        col21.metric("API calls", int(counter_values("translation_api_calls_total")))
+        col22.metric("API characters sent", int(characters.get("api", 0)))
+
+        col23, col24, col25, col26 = st.columns(4)
+        col23.metric("Characters from TM", int(characters.get("tm", 0)))
+        col24.metric("API retries", int(counter_values("sarvam_api_retries_total")))
+        col25.metric("API failures", int(counter_values("sarvam_api_failures_total")))
+        col26.metric("Pipeline errors", int(counter_values("translation_errors_total")))
+
+        if segments:
+            st.write("### Translation Sources")
+            st.bar_chart({"segments": sources})
+            lookups = counter_values("translation_tm_lookups_total", "result")
+            st.table([{"TM lookup result": result, "Count": int(count)}
+                      for result, count in sorted(lookups.items())])
+
+        st.write("### Stage Latency")
+        rows = stage_latency_rows()
+        if rows:
+            st.table(rows)
+        else:
+            st.info("No translations recorded yet in this session.")
+
+        prometheus_text = REGISTRY.render_prometheus()
+        with st.expander("Prometheus metrics"):
+            st.code(prometheus_text, language="text")
+        col27, col28 = st.columns(2)
+        col27.download_button("Download metrics", prometheus_text,
+                              file_name="metrics.prom", mime="text/plain")
+        if col28.button("Reset metrics"):
+            REGISTRY.reset()
+            st.rerun()
@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+from typing import Dict, List, Tuple
+from .journal import write_json_atomic
+from .pipeline import TranslationPipeline
+from .properties import PropertiesFile
+from .tm_storage import source_hash
+
+STATE_FILE = ".localization_state.json"
+
+
+def bundle_locale(lang: str) -> str:
+    """Bundle suffix of a language code ("hi-IN" -> "hi")"""
+    return lang.split("-")[0].lower()
+
+
+def target_bundle_path(path: str, source_lang: str, target_lang: str,
+                       output_dir: str = None) -> str:
+    """MessageResources_en.properties -> MessageResources_hi.properties"""
+    directory, name = os.path.split(path)
+    stem, extension = os.path.splitext(name)
+    suffix = "_" + bundle_locale(source_lang)
+    if stem.endswith(suffix):
+        stem = stem[:-len(suffix)]
+    name = f"{stem}_{bundle_locale(target_lang)}{extension}"
+    return os.path.join(output_dir if output_dir is not None else directory, name)
+
+
+class BundleLocalizer:
+    """Incremental localization of .properties resource bundles.
+
+    Values are deduplicated across keys and bundles and translated through
+    the pipeline (TM first, then batched API calls).  The hash of each
+    key's source value at its last translation is kept in a state file, so
+    a re-run only retranslates keys whose source value changed; unchanged
+    bundles cost no API calls.
+    """
+
+    def __init__(self, pipeline: TranslationPipeline, state_file: str = STATE_FILE):
+        self.pipeline = pipeline
+        self.state_file = state_file
+        self.state: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(state_file):
+            with open(state_file, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def localize(self, source_paths: List[str], source_lang: str, target_lang: str,
+                 translation_mode: str = "formal", output_script: str = None,
+                 domain: str = None, output_dir: str = None,
+                 adopt_existing: bool = False) -> dict:
+        """Bring the target bundles of source_paths up to date.
+
+        With ``adopt_existing``, translations already in a target bundle
+        that has no recorded state are kept as current instead of being
+        retranslated.  Returns statistics of the run.
+        """
+        stats = {
+            "bundles": 0,
+            "keys": 0,
+            "unchanged": 0,
+            "translated_keys": 0,
+            "unique_values": 0,
+            "removed_keys": 0,
+            "written": 0,
+        }
+        jobs = []
+        # Source value -> (job index, key) of every key that needs it
+        pending: Dict[str, List[Tuple[int, str]]] = {}
+        for path in source_paths:
+            source = PropertiesFile.load(path)
+            target_path = target_bundle_path(path, source_lang, target_lang, output_dir)
+            existing = {}
+            if os.path.exists(target_path):
+                existing = PropertiesFile.load(target_path).values
+            hashes = self.state.get(target_path)
+            if hashes is None:
+                hashes = {}
+                if adopt_existing:
+                    hashes = {key: source_hash(value) for key, value in source.values.items()
+                              if key in existing}
+
+            values = {}
+            for key, value in source.values.items():
+                digest = source_hash(value)
+                if hashes.get(key) == digest and key in existing:
+                    values[key] = existing[key]
+                    stats["unchanged"] += 1
+                elif not value.strip():
+                    values[key] = value
+                else:
+                    pending.setdefault(value, []).append((len(jobs), key))
+                    stats["translated_keys"] += 1
+            stats["keys"] += len(source.values)
+            stats["removed_keys"] += len(set(existing) - set(source.values))
+            jobs.append((source, target_path, values))
+
+        stats["unique_values"] = len(pending)
+        if pending:
+            translations, pipeline_stats = self.pipeline.translate_batch(
+                list(pending), source_lang, target_lang, translation_mode, output_script, domain
+            )
+            for (value, users), translation in zip(pending.items(), translations):
+                for job, key in users:
+                    jobs[job][2][key] = translation
+            stats.update(pipeline_stats)
+
+        for source, target_path, values in jobs:
+            stats["bundles"] += 1
+            content = source.render(values)
+            current = None
+            if os.path.exists(target_path):
+                with open(target_path, "r", encoding="latin-1") as f:
+                    current = f.read()
+            if content != current:
+                with open(target_path, "w", encoding="ascii", newline="\n") as f:
+                    f.write(content)
+                stats["written"] += 1
+            self.state[target_path] = {key: source_hash(value)
+                                       for key, value in source.values.items()}
+        write_json_atomic(self.state_file, self.state, indent=2)
+        return stats
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Localize .properties resource bundles through the TM and the API"
+    )
+    parser.add_argument("bundles", nargs="+", help="Source bundles, e.g. MessageResources_en.properties")
+    parser.add_argument("--source-lang", default="en-IN")
+    parser.add_argument("--target-lang", nargs="+", required=True, help="e.g. hi-IN ta-IN")
+    parser.add_argument("--mode", default="formal", help="Translation mode")
+    parser.add_argument("--script", default=None, help="Output script")
+    parser.add_argument("--domain", default=None, help="Glossary domain to apply")
+    parser.add_argument("--output-dir", default=None,
+                        help="Where to write target bundles (default: next to each source)")
+    parser.add_argument("--state", default=STATE_FILE,
+                        help="State file recording the source hash of each translated key")
+    parser.add_argument("--adopt-existing", action="store_true",
+                        help="Keep translations already present in bundles without state")
+    args = parser.parse_args(argv)
+
+    from .service import TranslationService
+
+    service = TranslationService()
+    try:
+        localizer = BundleLocalizer(service.pipeline, args.state)
+        for target_lang in args.target_lang:
+            stats = localizer.localize(
+                args.bundles, args.source_lang, target_lang, args.mode, args.script,
+                args.domain, args.output_dir, args.adopt_existing
+            )
+            print(f"{target_lang}: {stats['translated_keys']} of {stats['keys']} keys "
+                  f"retranslated ({stats['unique_values']} unique values, "
+                  f"{stats.get('api_calls', 0)} API calls), "
+                  f"{stats['written']} bundle(s) written")
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
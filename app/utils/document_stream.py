@@ -0,0 +1,161 @@
+import io
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+from .segmenter import split_segments
+
+# translate(text, source_lang, target_lang, translation_mode, output_script, domain)
+#   -> (translation, stats), e.g. TranslationPipeline.translate
+DocumentTranslateFn = Callable[[str, str, str, str, Optional[str], Optional[str]], Tuple[str, dict]]
+
+_WORD_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_WORDS = re.compile(r"\S+\s*|\s+")
+# Longer lines of a text document are read in pieces of this many characters
+MAX_LINE_CHARS = 65536
+
+
+def read_text_lines(fileobj: BinaryIO) -> Iterator[str]:
+    """Lines of a UTF-8 text or markdown file, read lazily.
+
+    A line longer than ``MAX_LINE_CHARS`` (or a file without line breaks)
+    is yielded in pieces of that size, so it is never held whole.
+    """
+    wrapper = io.TextIOWrapper(fileobj, encoding="utf-8", errors="replace", newline="")
+    return iter(lambda: wrapper.readline(MAX_LINE_CHARS), "")
+
+
+def read_docx_lines(fileobj: BinaryIO) -> Iterator[str]:
+    """Paragraph text of a .docx file, one line per paragraph and a blank
+    line between paragraphs; document.xml is parsed incrementally"""
+    with zipfile.ZipFile(fileobj) as archive, archive.open("word/document.xml") as xml:
+        for _, element in ET.iterparse(xml, events=("end",)):
+            if element.tag != f"{_WORD_NS}p":
+                continue
+            parts = []
+            for node in element.iter():
+                if node.tag == f"{_WORD_NS}t" and node.text:
+                    parts.append(node.text)
+                elif node.tag == f"{_WORD_NS}tab":
+                    parts.append("\t")
+                elif node.tag in (f"{_WORD_NS}br", f"{_WORD_NS}cr"):
+                    parts.append("\n")
+            element.clear()
+            text = "".join(parts)
+            if text.strip():
+                yield text + "\n"
+                yield "\n"
+
+
+def read_document(fileobj: BinaryIO, name: str) -> Iterator[str]:
+    """Lines of an uploaded .txt, .md or .docx document"""
+    if os.path.splitext(name)[1].lower() == ".docx":
+        return read_docx_lines(fileobj)
+    return read_text_lines(fileobj)
+
+
+def _paragraphs(lines: Iterable[str], max_chars: int) -> Iterator[str]:
+    """Group lines into paragraphs ending after a run of blank lines.
+
+    A paragraph is also cut at a line boundary once it reaches max_chars,
+    so a document without blank lines is never held in memory whole.
+    """
+    current: List[str] = []
+    size = 0
+    blank_seen = False
+    for line in lines:
+        blank = not line.strip()
+        if current and ((blank_seen and not blank) or size >= max_chars):
+            yield "".join(current)
+            current, size = [], 0
+        blank_seen = blank
+        current.append(line)
+        size += len(line)
+    if current:
+        yield "".join(current)
+
+
+def _split_oversized(text: str, max_chars: int) -> Iterator[str]:
+    """Cut a paragraph longer than max_chars into sentences; sentences that
+    are still too long are cut between words, and words by length"""
+    sentences: List[str] = []
+    for piece, translatable in split_segments(text):
+        if translatable or not sentences:
+            sentences.append(piece)
+        else:
+            # Keep separators and whitespace with the sentence before them
+            sentences[-1] += piece
+    for sentence in sentences:
+        if len(sentence) <= max_chars:
+            yield sentence
+            continue
+        for word in _WORDS.findall(sentence):
+            for start in range(0, len(word), max_chars):
+                yield word[start:start + max_chars]
+
+
+def iter_chunks(lines: Iterable[str], max_chars: int = 1000) -> Iterator[str]:
+    """Pack a document into chunks of at most max_chars characters.
+
+    Chunks end at paragraph boundaries where possible and otherwise at
+    sentence boundaries; joining them gives back the document exactly.
+    """
+    current = ""
+    for paragraph in _paragraphs(lines, max_chars):
+        units = [paragraph] if len(paragraph) <= max_chars else _split_oversized(paragraph, max_chars)
+        for unit in units:
+            if current and len(current) + len(unit) > max_chars:
+                yield current
+                current = ""
+            current += unit
+    if current:
+        yield current
+
+
+class DocumentTranslator:
+    """Translate documents of any size as a stream of chunks.
+
+    Chunks stay within the API input limit and are translated
+    concurrently, at most ``max_in_flight`` at a time, while results are
+    yielded in document order as soon as each is ready.  The document is
+    read lazily, so memory use does not depend on its size.
+    """
+
+    def __init__(self, translate: DocumentTranslateFn, max_chunk_chars: int = 1000,
+                 max_workers: int = 4, max_in_flight: int = 8):
+        self.translate = translate
+        self.max_chunk_chars = max_chunk_chars
+        self.max_workers = max_workers
+        self.max_in_flight = max(max_in_flight, max_workers)
+
+    def translate_stream(self, lines: Iterable[str], source_lang: str, target_lang: str,
+                         translation_mode: str = "formal", output_script: str = None,
+                         domain: str = None) -> Iterator[Tuple[str, str, dict]]:
+        """Yield (source chunk, translated chunk, stats) in document order"""
+        chunks = iter_chunks(lines, self.max_chunk_chars)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        window = deque()
+        try:
+            for chunk in chunks:
+                window.append((chunk, executor.submit(
+                    self.translate, chunk, source_lang, target_lang,
+                    translation_mode, output_script, domain
+                )))
+                # Hand over finished chunks right away; wait only when the
+                # window is full
+                while window and (window[0][1].done() or len(window) >= self.max_in_flight):
+                    source, future = window.popleft()
+                    translation, stats = future.result()
+                    yield source, translation, stats
+            while window:
+                source, future = window.popleft()
+                translation, stats = future.result()
+                yield source, translation, stats
+        finally:
+            # Stop queued chunks if the consumer gives up early
+            for _, future in window:
+                future.cancel()
+            executor.shutdown(wait=False)
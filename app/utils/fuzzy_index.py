@@ -0,0 +1,233 @@
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import difflib
+import heapq
+
+
+class FuzzyIndex:
+    """Character n-gram index over the stored sources of one language pair.
+
+    Candidates are generated from an inverted index of character bigrams
+    (each occurrence of a bigram is its own token, so overlaps count as a
+    multiset) and from length buckets, then verified with difflib's cheap
+    upper bounds before the full ``SequenceMatcher.ratio``.  The candidate
+    filter is derived from the ratio itself, so ``search`` returns exactly
+    what a linear ``SequenceMatcher`` scan over all sources would return,
+    unless a query has more than ``MAX_CANDIDATES`` candidates.
+
+    The filter only pays off when the query's bigrams are rare.  On
+    repetitive text (short words from a small vocabulary) the postings it
+    walks grow with the index, so a search is linear in the number of
+    sources; ``selective`` tells callers when to use another index.
+    """
+
+    GRAM_SIZE = 2
+    SEARCH_FLOORS = (0.95, 0.9)
+    # Postings (or length-bucket entries) a selective query walks at most
+    MAX_POSTINGS = 20000
+    # Candidates verified per search; the ones sharing most bigrams are kept
+    MAX_CANDIDATES = 500
+
+    def __init__(self, sources: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._sources: List[Optional[str]] = []
+        self._lowered: List[Optional[str]] = []
+        self._postings: Dict[str, array] = defaultdict(lambda: array("I"))
+        self._by_length: Dict[int, Set[int]] = defaultdict(set)
+        for source in sources:
+            self.add(source)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, source: str) -> bool:
+        return source in self._ids
+
+    @classmethod
+    def _tokens(cls, text: str) -> List[str]:
+        """Split lowercased text into occurrence-numbered bigram tokens"""
+        seen: Dict[str, int] = {}
+        tokens = []
+        for i in range(len(text) - cls.GRAM_SIZE + 1):
+            gram = text[i:i + cls.GRAM_SIZE]
+            occurrence = seen.get(gram, 0)
+            seen[gram] = occurrence + 1
+            tokens.append(f"{gram}\x00{occurrence}")
+        return tokens
+
+    def add(self, source: str):
+        """Index a stored source (no-op if it is already indexed)"""
+        if source in self._ids:
+            return
+        entry_id = len(self._sources)
+        lowered = source.lower()
+        self._ids[source] = entry_id
+        self._sources.append(source)
+        self._lowered.append(lowered)
+        self._by_length[len(lowered)].add(entry_id)
+        for token in self._tokens(lowered):
+            self._postings[token].append(entry_id)
+
+    def remove(self, source: str):
+        """Drop a source from the index; its postings are skipped lazily"""
+        entry_id = self._ids.pop(source, None)
+        if entry_id is None:
+            return
+        self._by_length[len(self._lowered[entry_id])].discard(entry_id)
+        self._sources[entry_id] = None
+        self._lowered[entry_id] = None
+
+    @staticmethod
+    def _length_window(length: int, threshold: float) -> List[int]:
+        """Stored lengths whose length-only upper bound beats the threshold"""
+        if threshold <= 0:
+            return []
+        lo = max(0, int(threshold * length / (2 - threshold)) - 1)
+        hi = int(length * (2 - threshold) / threshold) + 1
+        window = []
+        for other in range(lo, hi + 1):
+            total = length + other
+            if total == 0 or 2.0 * min(length, other) / total > threshold:
+                window.append(other)
+        return window
+
+    @staticmethod
+    def _min_shared_tokens(length: int, window: List[int], threshold: float) -> int:
+        """Lower bound on shared bigram tokens for any pair above threshold.
+
+        A ratio above ``threshold`` needs at least ``M`` matched characters.
+        SequenceMatcher matches them in ``b`` blocks separated by at least
+        one unmatched character each, and every block of length ``L``
+        contributes ``L - 1`` shared bigrams, so the pair shares at least
+        ``M - b >= 3M - T - 1`` tokens where ``T`` is the combined length.
+        """
+        bound = None
+        for other in window:
+            total = length + other
+            matched = int(threshold * total / 2)
+            while matched > 0 and 2.0 * (matched - 1) / total > threshold:
+                matched -= 1
+            while 2.0 * matched / total <= threshold:
+                matched += 1
+            shared = 3 * matched - total - 1
+            if bound is None or shared < bound:
+                bound = shared
+        return bound if bound is not None else 0
+
+    def _plan(self, query: str, threshold: float) -> Tuple[Set[int], Optional[List[str]], int]:
+        """(allowed lengths, tokens to probe, extra) of a candidate search.
+
+        Tokens are None when no n-gram bound applies and the allowed length
+        buckets are scanned instead.
+        """
+        if threshold >= 1:
+            return set(), None, 0
+        window = self._length_window(len(query), threshold)
+        allowed = {length for length in window if self._by_length.get(length)}
+        if threshold <= 0:
+            allowed = {length for length, ids in self._by_length.items() if ids}
+        if not allowed:
+            return allowed, None, 0
+
+        tokens = self._tokens(query)
+        required = 0
+        if tokens:
+            required = self._min_shared_tokens(len(query), sorted(allowed), threshold)
+        if required <= 0:
+            return allowed, None, 0
+
+        # Prefix filter: a source sharing ``required`` tokens with the query
+        # shares at least ``extra + 1`` of its ``len(tokens) - required + 1 +
+        # extra`` rarest tokens.  Probing a few extra tokens costs postings
+        # but lets the count discard most sources before any scoring.
+        extra = min(required - 1, len(tokens) // 8)
+        probe = sorted(tokens, key=lambda token: len(self._postings.get(token, ())))
+        return allowed, probe[:len(tokens) - required + 1 + extra], extra
+
+    def selective(self, query: str, threshold: float = 0.8) -> bool:
+        """Whether searching for query walks at most ``MAX_POSTINGS`` entries"""
+        allowed, probe, _ = self._plan(query.lower(), threshold)
+        if probe is None:
+            cost = sum(len(self._by_length[length]) for length in allowed)
+        else:
+            cost = sum(len(self._postings.get(token, ())) for token in probe)
+        return cost <= self.MAX_POSTINGS
+
+    def _candidates(self, query: str, threshold: float) -> Dict[int, int]:
+        """Map candidate ids to the number of probed tokens they share"""
+        allowed, probe, extra = self._plan(query, threshold)
+        if probe is None:
+            # No usable n-gram bound: scan the matching length buckets only
+            candidates = {entry_id: 0 for length in allowed
+                          for entry_id in self._by_length[length]}
+        else:
+            counts: Dict[int, int] = defaultdict(int)
+            for token in probe:
+                for entry_id in self._postings.get(token, ()):
+                    counts[entry_id] += 1
+            candidates = {}
+            for entry_id, count in counts.items():
+                lowered = self._lowered[entry_id]
+                if count > extra and lowered is not None and len(lowered) in allowed:
+                    candidates[entry_id] = count
+        if len(candidates) > self.MAX_CANDIDATES:
+            kept = heapq.nlargest(self.MAX_CANDIDATES, candidates,
+                                  key=lambda entry_id: (candidates[entry_id], -entry_id))
+            candidates = {entry_id: candidates[entry_id] for entry_id in kept}
+        return candidates
+
+    @staticmethod
+    def _quick_bound(query_chars: Dict[str, int], query_length: int, lowered: str) -> float:
+        """Character-multiset upper bound on the ratio (``quick_ratio``)"""
+        available = dict(query_chars)
+        matches = 0
+        for char in lowered:
+            if available.get(char, 0) > 0:
+                available[char] -= 1
+                matches += 1
+        total = query_length + len(lowered)
+        return 2.0 * matches / total if total else 1.0
+
+    def _search_above(self, lowered_query: str, threshold: float) -> Optional[Tuple[int, float]]:
+        """Exact best (id, ratio) among sources whose ratio beats threshold"""
+        candidates = self._candidates(lowered_query, threshold)
+        if not candidates:
+            return None
+
+        best_id = None
+        best_ratio = 0.0
+        query_chars = Counter(lowered_query)
+        matcher = difflib.SequenceMatcher(None, lowered_query, "")
+        # Most promising candidates first so the bounds prune the rest sooner
+        for entry_id in sorted(candidates, key=lambda i: (-candidates[i], i)):
+            lowered = self._lowered[entry_id]
+            bound = self._quick_bound(query_chars, len(lowered_query), lowered)
+            if bound <= threshold or bound < best_ratio or (
+                    best_id is not None and bound == best_ratio and entry_id > best_id):
+                continue
+            matcher.set_seq2(lowered)
+            ratio = matcher.ratio()
+            if ratio <= threshold or ratio < best_ratio or (
+                    best_id is not None and ratio == best_ratio and entry_id > best_id):
+                continue
+            best_id, best_ratio = entry_id, ratio
+        return (best_id, best_ratio) if best_id is not None else None
+
+    def search(self, query: str, threshold: float = 0.8) -> Optional[Tuple[str, float]]:
+        """Return the stored source with the highest ratio above threshold.
+
+        Ties are broken in favour of the source that was indexed first,
+        matching a scan over the memory in insertion order.
+        """
+        lowered_query = query.lower()
+        # Try strict floors first: a near-duplicate is found from a handful of
+        # candidates, and if the best ratio beats a floor, searching above
+        # that floor alone is already exact.
+        floors = [floor for floor in self.SEARCH_FLOORS if floor > threshold]
+        for floor in floors + [threshold]:
+            match = self._search_above(lowered_query, floor)
+            if match is not None:
+                entry_id, ratio = match
+                return self._sources[entry_id], ratio
+        return None
@@ -1,129 +1,376 @@
+import argparse
+import csv
+import io
 import json
 import os
-from typing import Dict, List, Optional
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .journal import Journal, write_json_atomic
+from .term_matcher import TermMatcher
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+CSV_COLUMNS = ["source_term", "target_term", "source_lang", "target_lang", "domain", "context"]
+
+# (source_term, target_term, source_lang, target_lang, domain, context)
+TermRow = Tuple[str, str, str, str, str, Optional[str]]
+
+
+def _local_name(tag: str) -> str:
+    """Tag without its namespace (TBX v3 is namespaced, TBX-Basic is not)"""
+    return tag.rsplit("}", 1)[-1]
+
 
 class Glossary:
-    def __init__(self, glossary_dir: str = "app/data/glossaries"):
+    """Terms per language pair, with several target terms per source term.
+
+    ``terms[source_lang][target_lang][source_term]`` lists entries
+    ({"term", "domain", "context"}) in the order they were added; the first
+    entry of a domain is the term used for that domain.  Domains and the
+    preferred term of every source term per domain are indexed as terms
+    are added, so lookups and domain lists never scan the glossary.
+    """
+
+    # Journal records are fsync'd in groups of this size (or after a second)
+    JOURNAL_GROUP_SIZE = 64
+    # Fold the journal into the JSON snapshot once it holds this many records
+    COMPACT_EVERY = 10000
+
+    def __init__(self, glossary_dir: str = "app/data/glossaries", repair_journal: bool = True):
         self.glossary_dir = glossary_dir
-        self.terms: Dict[str, Dict[str, dict]] = {}
+        self.terms: Dict[str, Dict[str, Dict[str, List[dict]]]] = {}
+        self._matchers: Dict[Tuple[str, str, Optional[str]], TermMatcher] = {}
+        # Readers of a glossary another process writes leave its journal as is
+        self.repair_journal = repair_journal
         self.initialize_glossary()
 
+    @staticmethod
+    def file_state(glossary_dir: str) -> tuple:
+        """(mtime, size) of the snapshot and journal; changes when either is written"""
+        state = []
+        for name in ("glossary.json", "glossary.journal.jsonl"):
+            try:
+                stat = os.stat(os.path.join(glossary_dir, name))
+            except FileNotFoundError:
+                state.append(None)
+            else:
+                state.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(state)
+
     def initialize_glossary(self):
-        """Initialize glossary from stored files"""
+        """Initialize glossary from the snapshot and its journal"""
         os.makedirs(self.glossary_dir, exist_ok=True)
-        
+
         # Load JSON glossary if exists
+        terms = {}
         json_path = os.path.join(self.glossary_dir, "glossary.json")
         if os.path.exists(json_path):
             with open(json_path, 'r', encoding='utf-8') as f:
-                self.terms = json.load(f)
+                terms = json.load(f)
+        self.terms = {}
+        # Entries per domain, and (source_lang, target_lang, domain) ->
+        # {source term: preferred target term}; domain None spans all domains
+        self._domains: Dict[str, int] = {}
+        self._domain_terms: Dict[Tuple[str, str, Optional[str]], Dict[str, str]] = {}
+        self._matchers = {}
+        for source_lang, translations in terms.items():
+            for target_lang, entries in translations.items():
+                for source_term, stored in entries.items():
+                    # Glossaries written before multiple targets held one entry per term
+                    for entry in (stored if isinstance(stored, list) else [stored]):
+                        self._store(source_lang, target_lang, source_term, entry)
+
+        # Replay terms added since the snapshot was written
+        self.journal = Journal(
+            os.path.join(self.glossary_dir, "glossary.journal.jsonl"),
+            group_size=self.JOURNAL_GROUP_SIZE
+        )
+        for record in self.journal.replay(repair=self.repair_journal):
+            self._apply_record(record)
 
     def save_glossary(self):
-        """Save glossary to JSON file"""
+        """Compact the journal into the JSON snapshot"""
+        self.journal.commit()
         json_path = os.path.join(self.glossary_dir, "glossary.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(self.terms, f, ensure_ascii=False, indent=2)
+        write_json_atomic(json_path, self.terms)
+        self.journal.reset()
+
+    def _apply_record(self, record: dict):
+        """Apply one journal record to the in-memory glossary"""
+        if record.get("op") == "add":
+            self._store(record["source_lang"], record["target_lang"],
+                        record["source_term"], record["entry"])
+
+    def _store(self, source_lang: str, target_lang: str, source_term: str, entry: dict) -> bool:
+        """Put an entry into the in-memory glossary and its indexes.
+
+        Returns False if the source term already has this target term in
+        this domain (its context is updated).
+        """
+        entry.setdefault("domain", "general")
+        entries = self.terms.setdefault(source_lang, {}).setdefault(target_lang, {}) \
+            .setdefault(source_term, [])
+        for existing in entries:
+            if existing["term"] == entry["term"] and existing["domain"] == entry["domain"]:
+                if entry.get("context"):
+                    existing["context"] = entry["context"]
+                return False
+        entries.append(entry)
 
-    def add_term(self, source_term: str, target_term: str, 
-                source_lang: str, target_lang: str, 
+        domain = entry["domain"]
+        self._domains[domain] = self._domains.get(domain, 0) + 1
+        for key in ((source_lang, target_lang, domain), (source_lang, target_lang, None)):
+            preferred = self._domain_terms.setdefault(key, {})
+            if source_term not in preferred:
+                preferred[source_term] = entry["term"]
+                # The compiled matcher of this slice is now stale
+                self._matchers.pop(key, None)
+        return True
+
+    def add_term(self, source_term: str, target_term: str,
+                source_lang: str, target_lang: str,
                 domain: str = "general", context: str = None):
         """Add a term to the glossary"""
-        if source_lang not in self.terms:
-            self.terms[source_lang] = {}
-        
-        if target_lang not in self.terms[source_lang]:
-            self.terms[source_lang][target_lang] = {}
-        
-        self.terms[source_lang][target_lang][source_term.lower()] = {
+        entry = {
             "term": target_term,
             "domain": domain,
             "context": context
         }
+        if not self._store(source_lang, target_lang, source_term.lower(), entry) and not context:
+            return
+        self.journal.append({
+            "op": "add",
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "source_term": source_term.lower(),
+            "entry": entry
+        })
+        if self.journal.records >= self.COMPACT_EVERY:
+            self.save_glossary()
+
+    def add_terms(self, rows: Iterable[TermRow]) -> dict:
+        """Add many terms and persist them with a single snapshot write.
+
+        Returns counts of imported terms, rows skipped for a missing field
+        and duplicates of terms already in the glossary.
+        """
+        stats = {"imported": 0, "skipped": 0, "duplicates": 0}
+        for source_term, target_term, source_lang, target_lang, domain, context in rows:
+            source_term = (source_term or "").strip()
+            target_term = (target_term or "").strip()
+            if not (source_term and target_term and source_lang and target_lang):
+                stats["skipped"] += 1
+                continue
+            entry = {"term": target_term, "domain": domain or "general", "context": context or None}
+            if self._store(source_lang, target_lang, source_term.lower(), entry):
+                stats["imported"] += 1
+            else:
+                stats["duplicates"] += 1
         self.save_glossary()
+        return stats
 
-    def get_term(self, source_term: str, source_lang: str, 
+    def get_term(self, source_term: str, source_lang: str,
                 target_lang: str, domain: str = None) -> Optional[str]:
         """Get translation for a term from the glossary"""
-        if (source_lang in self.terms and 
-            target_lang in self.terms[source_lang] and 
-            source_term.lower() in self.terms[source_lang][target_lang]):
-            
-            term_entry = self.terms[source_lang][target_lang][source_term.lower()]
-            if domain is None or term_entry["domain"] == domain:
-                return term_entry["term"]
-        return None
-
-    def import_glossary(self, file_input, format: str = "csv"):
+        preferred = self._domain_terms.get((source_lang, target_lang, domain))
+        return preferred.get(source_term.lower()) if preferred else None
+
+    def get_terms(self, source_term: str, source_lang: str, target_lang: str,
+                  domain: str = None) -> List[dict]:
+        """All entries of a source term, optionally of one domain only"""
+        entries = self.terms.get(source_lang, {}).get(target_lang, {}).get(source_term.lower(), [])
+        return [entry for entry in entries if domain is None or entry["domain"] == domain]
+
+    def get_domain_terms(self, source_lang: str, target_lang: str,
+                         domain: str = None) -> Dict[str, str]:
+        """Source term -> preferred target term of one domain (all if None)"""
+        return dict(self._domain_terms.get((source_lang, target_lang, domain), {}))
+
+    @staticmethod
+    def _open_text(file_input):
+        """(text stream, cleanup) for a path or a text or binary file-like object"""
+        if isinstance(file_input, str):
+            f = open(file_input, 'r', encoding='utf-8-sig', newline='')
+            return f, f.close
+        if isinstance(file_input, io.TextIOBase):
+            return file_input, lambda: None
+        # e.g. Streamlit's UploadedFile; detach so the caller's file stays open
+        f = io.TextIOWrapper(file_input, encoding='utf-8-sig', newline='')
+        return f, f.detach
+
+    @classmethod
+    def iter_csv(cls, file_input) -> Iterator[TermRow]:
+        """Rows of a CSV glossary.
+
+        The first row is a header; when it names the columns (see
+        ``CSV_COLUMNS``) they may come in any order, otherwise they are
+        source_term,target_term,source_lang,target_lang[,domain[,context]].
+        Fields may be quoted and contain commas.
+        """
+        f, cleanup = cls._open_text(file_input)
+        try:
+            reader = csv.reader(f)
+            header = [name.strip().lower() for name in next(reader, [])]
+            named = {"source_term", "target_term"} <= set(header)
+            positions = [header.index(name) if name in header else None
+                         for name in CSV_COLUMNS] if named else list(range(len(CSV_COLUMNS)))
+            for row in reader:
+                if not any(cell.strip() for cell in row):
+                    continue
+                values = [row[position].strip() if position is not None and position < len(row)
+                          else "" for position in positions]
+                source_term, target_term, source_lang, target_lang, domain, context = values
+                yield (source_term, target_term, source_lang, target_lang,
+                       domain or "general", context or None)
+        finally:
+            cleanup()
+
+    @staticmethod
+    def iter_tbx(file_input, source_lang: str = None) -> Iterator[TermRow]:
+        """Rows of a TBX (TBX-Basic or TBX v3) termbase, parsed incrementally.
+
+        Every term of the source language is paired with every term of each
+        other language of its concept entry.  The source language is
+        ``source_lang``, else the document's xml:lang, else the first
+        language of each entry.  An entry's subjectField is its domain and
+        a target term's context description its context.
+        """
+        own_file = isinstance(file_input, str)
+        f = open(file_input, 'rb') if own_file else file_input
+        try:
+            document_lang = None
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                name = _local_name(elem.tag)
+                if event == "start":
+                    if document_lang is None and name in ("martif", "tbx"):
+                        document_lang = elem.get(XML_LANG) or elem.get("lang") or ""
+                    continue
+                if name not in ("termEntry", "conceptEntry"):
+                    continue
+
+                domain = None
+                languages: List[Tuple[str, List[Tuple[str, Optional[str]]]]] = []
+                for child in elem:
+                    child_name = _local_name(child.tag)
+                    if child_name == "descrip" and child.get("type") == "subjectField":
+                        domain = (child.text or "").strip() or None
+                    elif child_name in ("langSet", "langSec"):
+                        lang = child.get(XML_LANG) or child.get("lang")
+                        terms = []
+                        for node in child.iter():
+                            if _local_name(node.tag) not in ("tig", "ntig", "termSec"):
+                                continue
+                            term, context = None, None
+                            for part in node.iter():
+                                part_name = _local_name(part.tag)
+                                if part_name == "term" and term is None:
+                                    term = "".join(part.itertext()).strip()
+                                elif part_name == "descrip" and part.get("type") == "context":
+                                    context = "".join(part.itertext()).strip() or None
+                            if term:
+                                terms.append((term, context))
+                        if lang and terms:
+                            languages.append((lang, terms))
+                # Drop the processed entry so the tree never grows
+                elem.clear()
+
+                source = source_lang or document_lang
+                sources = [terms for lang, terms in languages if lang == source]
+                if not sources and languages and not source_lang:
+                    source, sources = languages[0][0], [languages[0][1]]
+                for lang, terms in languages:
+                    if lang == source:
+                        continue
+                    for source_terms in sources:
+                        for source_term, _ in source_terms:
+                            for target_term, context in terms:
+                                yield (source_term, target_term, source, lang,
+                                       domain or "general", context)
+        finally:
+            if own_file:
+                f.close()
+
+    def import_glossary(self, file_input, format: str = "csv", source_lang: str = None) -> dict:
         """Import terms from a file (CSV or TBX format)
         Args:
             file_input: Either a file path string or a file-like object (e.g. Streamlit UploadedFile)
             format: The format of the file ('csv' or 'tbx')
+            source_lang: Source language of a TBX termbase (default: its xml:lang)
+        Returns counts of imported, skipped and duplicate terms; the
+        glossary is written to disk once, after the whole file.
         """
         if format == "csv":
-            # Handle both string paths and file-like objects
-            if isinstance(file_input, str):
-                f = open(file_input, 'r', encoding='utf-8')
-            else:
-                # For file-like objects (e.g. Streamlit's UploadedFile)
-                f = file_input
-                
-            try:
-                # Skip header row
-                next(f)
-                for line in f:
-                    if isinstance(line, bytes):
-                        line = line.decode('utf-8')
-                    parts = line.strip().split(',')
-                    if len(parts) >= 4:  # source_term,target_term,source_lang,target_lang[,domain[,context]]
-                        source_term, target_term, source_lang, target_lang = parts[:4]
-                        domain = parts[4] if len(parts) > 4 else "general"
-                        context = parts[5] if len(parts) > 5 else None
-                        self.add_term(source_term, target_term, source_lang, 
-                                    target_lang, domain, context)
-            finally:
-                # Only close if it's a file we opened
-                if isinstance(file_input, str):
-                    f.close()
+            return self.add_terms(self.iter_csv(file_input))
+        if format == "tbx":
+            return self.add_terms(self.iter_tbx(file_input, source_lang))
+        raise ValueError(f"Unsupported glossary format: {format}")
 
     def export_glossary(self, file_path: str, format: str = "csv"):
         """Export terms to a file (CSV or TBX format)"""
         if format == "csv":
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with open(file_path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(CSV_COLUMNS)
                 for src_lang, translations in self.terms.items():
                     for tgt_lang, terms in translations.items():
-                        for src_term, entry in terms.items():
-                            line = f"{src_term},{entry['term']},{src_lang},{tgt_lang}"
-                            line += f",{entry['domain']}"
-                            if entry.get('context'):
-                                line += f",{entry['context']}"
-                            f.write(line + "\n")
+                        for src_term, entries in terms.items():
+                            for entry in entries:
+                                writer.writerow([src_term, entry['term'], src_lang, tgt_lang,
+                                                 entry['domain'], entry.get('context') or ""])
 
     def get_domains(self) -> List[str]:
         """Get list of all domains in the glossary"""
-        domains = set()
-        for src_lang in self.terms.values():
-            for tgt_lang in src_lang.values():
-                for term in tgt_lang.values():
-                    domains.add(term["domain"])
-        return list(domains)
-
-    def apply_glossary(self, text: str, source_lang: str, 
+        return sorted(self._domains)
+
+    def _get_matcher(self, source_lang: str, target_lang: str,
+                     domain: str = None) -> TermMatcher:
+        """Return the compiled matcher for a language pair and domain"""
+        key = (source_lang, target_lang, domain)
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            matcher = TermMatcher(self._domain_terms.get(key, {}))
+            self._matchers[key] = matcher
+        return matcher
+
+    def apply_glossary(self, text: str, source_lang: str,
                       target_lang: str, domain: str = None) -> str:
         """Apply glossary terms to a text"""
         if source_lang not in self.terms or target_lang not in self.terms[source_lang]:
             return text
-            
-        result = text
-        # Sort terms by length (longest first) to handle compound terms correctly
-        terms = sorted(self.terms[source_lang][target_lang].keys(), 
-                      key=len, reverse=True)
-        
-        for term in terms:
-            if term in text.lower():
-                translation = self.get_term(term, source_lang, target_lang, domain)
-                if translation:
-                    # Case-sensitive replacement
-                    result = result.replace(term, translation)
-                    result = result.replace(term.capitalize(), translation.capitalize())
-        
-        return result 
\ No newline at end of file
+
+        # Longest terms win, so compound terms are replaced as a whole
+        return self._get_matcher(source_lang, target_lang, domain).replace(text)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description="Import or export glossary terms; running translation services "
+                    "sharing the glossary directory pick up imports on their own"
+    )
+    parser.add_argument("--glossary-dir", default=os.getenv("GLOSSARY_DIR", "app/data/glossaries"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Add the terms of a CSV or TBX file")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--format", choices=("csv", "tbx"), default=None,
+                               help="Default: from the file extension")
+    import_parser.add_argument("--source-lang", default=None,
+                               help="Source language of a TBX termbase (default: its xml:lang)")
+    export_parser = commands.add_parser("export", help="Write all terms to a CSV file")
+    export_parser.add_argument("file")
+    args = parser.parse_args(argv)
+
+    glossary = Glossary(args.glossary_dir)
+    try:
+        if args.command == "import":
+            file_format = args.format or ("tbx" if args.file.lower().endswith(".tbx") else "csv")
+            stats = glossary.import_glossary(args.file, file_format, args.source_lang)
+            print(f"{stats['imported']} terms imported, {stats['duplicates']} duplicates and "
+                  f"{stats['skipped']} incomplete rows skipped")
+        else:
+            glossary.export_glossary(args.file)
+            print(f"Glossary exported to {args.file}")
+    finally:
+        glossary.journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import atexit
+import json
+import os
+import threading
+from typing import Iterable, Iterator, Optional
+
+
+def write_json_atomic(path: str, data, indent: Optional[int] = None):
+    """Write JSON to a temporary file and atomically move it over ``path``"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Journal:
+    """Append-only JSON-lines write-ahead log with group commit.
+
+    Records are written as one JSON object per line and made durable with
+    a single ``fsync`` per group: when ``group_size`` records are pending,
+    when ``group_interval`` seconds have passed since the first pending
+    record, on ``commit()`` and at interpreter exit.  A crash therefore
+    loses at most the records of the last, uncommitted group.
+    """
+
+    def __init__(self, path: str, group_size: int = 64, group_interval: float = 1.0):
+        self.path = path
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.records = 0
+        self._pending = 0
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._file = None
+        self._at_exit = False
+
+    def replay(self, repair: bool = True) -> Iterator[dict]:
+        """Yield the records stored in the journal, oldest first.
+
+        A torn last line (from a crash in the middle of a write) is ignored
+        and, with ``repair``, cut off so that new records are appended after
+        valid data; readers of a journal another process writes to pass
+        ``repair=False``, as the line may be a record still being written.
+        An unreadable line followed by other records is corruption, not a
+        torn write, and raises ValueError rather than dropping those records.
+        """
+        self.records = 0
+        if not os.path.exists(self.path):
+            return
+        valid_size = 0
+        with open(self.path, 'rb') as f:
+            for number, line in enumerate(f, 1):
+                record = None
+                if line.endswith(b"\n"):
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                    except (UnicodeDecodeError, ValueError):
+                        pass
+                if record is None:
+                    if f.read(1):
+                        raise ValueError(f"{self.path} has a corrupt record on line {number}")
+                    break
+                valid_size += len(line)
+                self.records += 1
+                yield record
+        if repair and valid_size < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_size)
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+            if not self._at_exit:
+                # Only journals written to need committing at exit
+                atexit.register(self.close)
+                self._at_exit = True
+        return self._file
+
+    def append(self, record: dict):
+        """Append one record; it becomes durable with its group"""
+        self.append_many([record])
+
+    def append_many(self, records: Iterable[dict]):
+        """Append several records as part of the current group"""
+        with self._lock:
+            f = self._open()
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self.records += 1
+                self._pending += 1
+            if self._pending >= self.group_size:
+                self.commit()
+            elif self._pending and self._timer is None:
+                self._timer = threading.Timer(self.group_interval, self.commit)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def commit(self):
+        """Flush and fsync all pending records"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._file is None or not self._pending:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+
+    def reset(self):
+        """Discard the journal once its records are part of a snapshot"""
+        with self._lock:
+            self.commit()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self.records = 0
+
+    def close(self):
+        """Commit pending records and release the file handle"""
+        with self._lock:
+            self.commit()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
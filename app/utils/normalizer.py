@@ -0,0 +1,68 @@
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+
+# Tokens whose value varies between otherwise identical UI strings
+_VARIABLE_TOKEN = re.compile(
+    r"(?P<url>(?:https?://|www\.)\S+?(?=[.,;:!?)\]]*(?:\s|$)))"
+    r"|(?P<email>[\w.+-]+@[\w-]+(?:\.[\w-]+)+)"
+    r"|(?P<placeholder>\{\d+(?:,[^{}]*)?\}|\{\w+\}|\$\{[\w.]+\}|%(?:\d+\$)?[-+ 0#]*\d*(?:\.\d+)?[sdfiuxX])"
+    r"|(?P<number>\d+(?:[.,:]\d+)*)"
+)
+
+
+def normalize_text(text: str) -> str:
+    """The form imported segments are stored in: NFC, without surrounding whitespace"""
+    return unicodedata.normalize("NFC", text).strip()
+
+
+def normalize_segment(text: str) -> Tuple[str, List[str]]:
+    """Mask variable tokens and fold whitespace and case.
+
+    Returns the normalized key and the masked token values in order, e.g.
+    ``"Delete  {0} items"`` -> ``("delete \\x00placeholder\\x00 items", ["{0}"])``.
+    """
+    tokens = []
+
+    def mask(match):
+        tokens.append(match.group(0))
+        return f"\x00{match.lastgroup}\x00"
+
+    key = _VARIABLE_TOKEN.sub(mask, text)
+    return " ".join(key.split()).lower(), tokens
+
+
+def restore_tokens(target: str, stored_tokens: List[str], new_tokens: List[str]) -> Optional[str]:
+    """Swap the stored source's token values in its target for new ones.
+
+    Tokens may appear in any order in the target (translations often
+    reorder placeholders).  Returns None when a token that changed value
+    cannot be located in the target.
+    """
+    used: List[Tuple[int, int, str]] = []
+    for old, new in zip(stored_tokens, new_tokens):
+        # Numbers must not match inside longer numbers ("1" within "10")
+        pattern = re.escape(old)
+        if old[0].isdigit():
+            pattern = r"(?<!\d)" + pattern
+        if old[-1].isdigit():
+            pattern += r"(?!\d)"
+        span = None
+        for match in re.finditer(pattern, target):
+            if not any(s < match.end() and match.start() < e for s, e, _ in used):
+                span = match.span()
+                break
+        if span is None:
+            if old != new:
+                return None
+            continue
+        used.append((span[0], span[1], new))
+
+    parts = []
+    position = 0
+    for start, end, new in sorted(used):
+        parts.append(target[position:start])
+        parts.append(new)
+        position = end
+    parts.append(target[position:])
+    return "".join(parts)
@@ -0,0 +1,307 @@
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from .glossary import Glossary
+from .metrics import REGISTRY, MetricsRegistry
+from .result_cache import ResultCache
+from .segmenter import split_segments
+from .translation_memory import TranslationMemory
+
+# translate_fn(text, source_lang, target_lang, translation_mode, output_script) -> str
+TranslateFn = Callable[[str, str, str, str, Optional[str]], str]
+# batch_translate_fn(texts, source_lang, target_lang, translation_mode, output_script) -> texts
+BatchTranslateFn = Callable[[List[str], str, str, str, Optional[str]], List[str]]
+
+
+class TranslationPipeline:
+    """Segment-level hybrid translation: TM first, the API only for misses.
+
+    The input is split into sentences and lines; every segment is resolved
+    from the translation memory (exact, normalized, then fuzzy match, the
+    latter for all of a request's misses at once), then from the optional
+    result cache, and only the remaining ones are sent to the API, several
+    per request.  Results are reassembled in the original order and layout,
+    and each newly translated segment is stored back in the memory on its
+    own.  The memory only serves and learns requests in ``TM_MODE`` with
+    the default script (see ``uses_tm``); glossary terms are applied per
+    request, so its entries are domain-neutral.  Stage timings, segment
+    sources, characters sent and errors are recorded in a metrics registry.
+    """
+
+    # Misses sent in one API request are joined with this separator
+    SEGMENT_SEPARATOR = "\n"
+    # Translation mode the TM's entries are made with (and TMX imports assumed in)
+    TM_MODE = "formal"
+
+    def __init__(self, tm: TranslationMemory, glossary: Glossary, translate_fn: TranslateFn,
+                 fuzzy_threshold: float = 0.8, max_batch_chars: int = 1000,
+                 batch_translate_fn: BatchTranslateFn = None,
+                 result_cache: ResultCache = None, metrics: MetricsRegistry = None):
+        self.tm = tm
+        self.glossary = glossary
+        self.translate_fn = translate_fn
+        # Sends several requests at once (e.g. SarvamClient.translate_many)
+        self.batch_translate_fn = batch_translate_fn
+        # Shared across pipelines/sessions so identical requests hit the API once
+        self.result_cache = result_cache
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_batch_chars = max_batch_chars
+
+        metrics = metrics or REGISTRY
+        self._requests = metrics.histogram(
+            "translation_request_seconds", "Time to translate one request (batch of texts)")
+        self._stage_seconds = metrics.histogram(
+            "translation_stage_seconds", "Time spent per request in each pipeline stage",
+            ("stage",))
+        self._segments = metrics.counter(
+            "translation_segments_total", "Translated segments by where the translation came from",
+            ("source",))
+        self._lookups = metrics.counter(
+            "translation_tm_lookups_total", "TM lookups by result", ("result",))
+        self._characters = metrics.counter(
+            "translation_characters_total",
+            "Characters of translatable input, served from the TM and sent to the API",
+            ("kind",))
+        self._api_calls = metrics.counter(
+            "translation_api_calls_total", "Translate API calls made by the pipeline")
+        self._errors = metrics.counter(
+            "translation_errors_total", "Failed requests by the stage that failed", ("stage",))
+
+    @classmethod
+    def uses_tm(cls, translation_mode: str, output_script: Optional[str]) -> bool:
+        """Whether requests with these settings are resolved from and stored in the TM.
+
+        TM entries are keyed by source text and language pair only, so they
+        are kept to one mode and the default script; a colloquial or
+        romanized request must not be served a formal translation.
+        """
+        return translation_mode == cls.TM_MODE and output_script in (None, "", "Default")
+
+    @contextmanager
+    def _stage(self, name: str) -> Iterator[None]:
+        """Time a pipeline stage and count its failures"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self._errors.inc(stage=name)
+            raise
+        finally:
+            self._stage_seconds.observe(time.perf_counter() - start, stage=name)
+
+    def translate(self, text: str, source_lang: str, target_lang: str,
+                  translation_mode: str = "formal", output_script: str = None,
+                  domain: str = None) -> Tuple[str, dict]:
+        """Translate text and return (translation, per-request statistics)"""
+        translations, stats = self.translate_batch(
+            [text], source_lang, target_lang, translation_mode, output_script, domain
+        )
+        return translations[0], stats
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str,
+                        translation_mode: str = "formal", output_script: str = None,
+                        domain: str = None) -> Tuple[List[str], dict]:
+        """Translate many texts with shared TM lookups and API batches.
+
+        Misses from all texts are deduplicated and packed into the same API
+        requests, so thousands of short strings cost a handful of calls.
+        Returns the translations in input order and combined statistics.
+        """
+        with self._requests.time():
+            translations, stats = self._translate_batch(
+                texts, source_lang, target_lang, translation_mode, output_script, domain
+            )
+        self._record(stats)
+        return translations, stats
+
+    def _record(self, stats: dict):
+        """Add the statistics of one request to the metrics"""
+        for match_type in ("exact", "normalized", "fuzzy"):
+            self._segments.inc(stats[f"tm_{match_type}"], source=f"tm_{match_type}")
+            self._lookups.inc(stats[f"tm_{match_type}"], result=match_type)
+        self._lookups.inc(stats["tm_misses"], result="miss")
+        self._segments.inc(stats["cache_hits"], source="cache")
+        self._segments.inc(stats["api_segments"], source="api")
+        self._characters.inc(stats["characters"], kind="input")
+        self._characters.inc(stats["tm_characters"], kind="tm")
+        self._characters.inc(stats["api_characters"], kind="api")
+        self._api_calls.inc(stats["api_calls"])
+
+    def _translate_batch(self, texts: List[str], source_lang: str, target_lang: str,
+                         translation_mode: str, output_script: Optional[str],
+                         domain: Optional[str]) -> Tuple[List[str], dict]:
+        documents = [split_segments(text) for text in texts]
+        results = [[piece for piece, _ in pieces] for pieces in documents]
+        stats = {
+            "segments": 0,
+            "tm_exact": 0,
+            "tm_normalized": 0,
+            "tm_fuzzy": 0,
+            "tm_misses": 0,
+            "cache_hits": 0,
+            "api_segments": 0,
+            "api_calls": 0,
+            "characters": 0,
+            "tm_characters": 0,
+            "api_characters": 0,
+        }
+
+        # Step 1: Resolve the distinct segments from the TM in one batch
+        # (exact and normalized each, then one fuzzy pass over the rest);
+        # remember the misses by source.  The TM only holds translations
+        # made with its own settings, so other modes and scripts skip it and
+        # are served by the cache and the API
+        use_tm = self.uses_tm(translation_mode, output_script)
+        places: Dict[str, List[Tuple[int, int]]] = {}
+        for document, pieces in enumerate(documents):
+            for position, (piece, translatable) in enumerate(pieces):
+                if translatable:
+                    stats["segments"] += 1
+                    stats["characters"] += len(piece)
+                    places.setdefault(piece, []).append((document, position))
+        matches = [None] * len(places)
+        if use_tm and places:
+            with self._stage("tm_lookup"):
+                matches = self.tm.lookup_many(list(places), source_lang, target_lang,
+                                              self.fuzzy_threshold)
+
+        misses: Dict[str, List[Tuple[int, int]]] = {}
+        tm_hits: List[Tuple[int, int]] = []
+        for (piece, positions), match in zip(places.items(), matches):
+            if match:
+                translation, _, match_type = match
+                for document, position in positions:
+                    results[document][position] = translation
+                tm_hits.extend(positions)
+                stats[f"tm_{match_type}"] += len(positions)
+                stats["tm_characters"] += len(piece) * len(positions)
+            else:
+                misses[piece] = positions
+                if use_tm:
+                    stats["tm_misses"] += len(positions)
+
+        # Step 2: Serve misses from the result cache, joining identical requests
+        # already in flight; only the remaining ones go to the API
+        translated: Dict[str, str] = {}
+        waiting: Dict[str, Future] = {}
+        leaders = []
+        new_entries = []
+        try:
+            for source in misses:
+                key = ResultCache.make_key(source, source_lang, target_lang,
+                                           translation_mode, output_script, domain)
+                if self.result_cache is None:
+                    leaders.append((source, key))
+                    continue
+                future, is_leader = self.result_cache.claim(key)
+                if is_leader:
+                    leaders.append((source, key))
+                else:
+                    waiting[source] = future
+                    stats["cache_hits"] += len(misses[source])
+
+            translations: List[str] = []
+            if leaders:
+                with self._stage("api"):
+                    translations = self._translate_batches(
+                        [source for source, _ in leaders], source_lang, target_lang,
+                        translation_mode, output_script, stats
+                    )
+
+            # Step 3: Apply the domain's glossary terms to TM matches and new
+            # translations; the TM keeps the unmodified translation, so one
+            # entry serves every domain
+            final = translations
+            if domain and (tm_hits or translations):
+                with self._stage("glossary"):
+                    for document, position in tm_hits:
+                        results[document][position] = self.glossary.apply_glossary(
+                            results[document][position], source_lang, target_lang, domain)
+                    final = [
+                        self.glossary.apply_glossary(translation, source_lang, target_lang,
+                                                     domain)
+                        for translation in translations
+                    ]
+            for (source, key), translation, raw in zip(leaders, final, translations):
+                if self.result_cache is not None:
+                    self.result_cache.resolve(key, translation)
+                translated[source] = translation
+                stats["api_segments"] += len(misses[source])
+                if use_tm:
+                    new_entries.append((source_lang, target_lang, source, raw))
+        except BaseException as e:
+            # Requests waiting on keys this one claimed must not block forever
+            # (fail is a no-op for keys already resolved)
+            if self.result_cache is not None:
+                for _, key in leaders:
+                    self.result_cache.fail(key, e)
+            raise
+
+        # Step 4: Store each new segment in the TM
+        if new_entries:
+            with self._stage("tm_write"):
+                self.tm.add_translations(new_entries)
+
+        for source, future in waiting.items():
+            translated[source] = future.result()
+        for source, positions in misses.items():
+            for document, position in positions:
+                results[document][position] = translated[source]
+
+        stats["tm_segments"] = stats["tm_exact"] + stats["tm_normalized"] + stats["tm_fuzzy"]
+        stats["characters_saved"] = stats["characters"] - stats["api_characters"]
+        return ["".join(pieces) for pieces in results], stats
+
+    def _batches(self, sources: List[str]) -> List[List[str]]:
+        """Group segments into requests of at most max_batch_chars characters"""
+        batches = []
+        current: List[str] = []
+        size = 0
+        for source in sources:
+            added = len(source) + (len(self.SEGMENT_SEPARATOR) if current else 0)
+            if current and size + added > self.max_batch_chars:
+                batches.append(current)
+                current, size = [], 0
+                added = len(source)
+            current.append(source)
+            size += added
+        if current:
+            batches.append(current)
+        return batches
+
+    def _translate_batches(self, sources: List[str], source_lang: str, target_lang: str,
+                           translation_mode: str, output_script: Optional[str],
+                           stats: dict) -> List[str]:
+        """Translate segments, several per API call, preserving their order"""
+        batches = self._batches(sources)
+        requests = [self.SEGMENT_SEPARATOR.join(batch) for batch in batches]
+        stats["api_calls"] += len(requests)
+        # Segment text only: separators are not input, and a segment re-sent
+        # on its own below is counted once
+        stats["api_characters"] += sum(len(source) for source in sources)
+        if self.batch_translate_fn and len(requests) > 1:
+            results = self.batch_translate_fn(requests, source_lang, target_lang,
+                                              translation_mode, output_script)
+        else:
+            results = [self.translate_fn(request, source_lang, target_lang,
+                                         translation_mode, output_script)
+                       for request in requests]
+
+        translations = []
+        for batch, result in zip(batches, results):
+            parts = result.split(self.SEGMENT_SEPARATOR)
+            if len(batch) == 1:
+                translations.append(result.strip())
+                continue
+            if len(parts) == len(batch):
+                translations.extend(part.strip() for part in parts)
+                continue
+
+            # The API merged or split lines: fall back to one call per segment
+            for source in batch:
+                stats["api_calls"] += 1
+                translations.append(self.translate_fn(
+                    source, source_lang, target_lang, translation_mode, output_script
+                ).strip())
+        return translations
@@ -0,0 +1,143 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Escapes of .properties values besides \uXXXX; any other escaped
+# character stands for itself
+_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "f": "\f"}
+_UNESCAPES = {"\t": "\\t", "\n": "\\n", "\r": "\\r", "\f": "\\f", "\\": "\\\\"}
+_SEPARATOR = re.compile(r"(?<!\\)(?:\\\\)*[=:\s]")
+
+
+def unescape(text: str) -> str:
+    """Decode backslash escapes, including \\uXXXX, of a key or value"""
+    if "\\" not in text:
+        return text
+    out = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char != "\\" or i + 1 == len(text):
+            out.append(char)
+            i += 1
+            continue
+        char = text[i + 1]
+        if char == "u" and re.fullmatch(r"[0-9a-fA-F]{4}", text[i + 2:i + 6]):
+            out.append(chr(int(text[i + 2:i + 6], 16)))
+            i += 6
+            continue
+        out.append(_ESCAPES.get(char, char))
+        i += 2
+    text = "".join(out)
+    if re.search("[\ud800-\udfff]", text):
+        # Join escaped surrogate pairs into the characters they encode
+        text = text.encode("utf-16-le", "surrogatepass").decode("utf-16-le", "replace")
+    return text
+
+
+def escape(text: str, is_key: bool = False) -> str:
+    """Encode a key or value as ASCII, writing other characters as \\uXXXX"""
+    out = []
+    for position, char in enumerate(text):
+        if char in _UNESCAPES:
+            out.append(_UNESCAPES[char])
+        elif char == " " and (is_key or position == 0):
+            out.append("\\ ")
+        elif is_key and char in "=:#!":
+            out.append("\\" + char)
+        elif ord(char) < 0x20 or ord(char) > 0x7e:
+            # Characters outside the BMP become surrogate pairs, as in Java
+            encoded = char.encode("utf-16-be")
+            for unit in range(0, len(encoded), 2):
+                out.append("\\u%04X" % int.from_bytes(encoded[unit:unit + 2], "big"))
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def _logical_lines(text: str):
+    """Yield (raw lines, logical line) with continuation lines joined"""
+    raw: List[str] = []
+    logical = ""
+    for line in text.splitlines():
+        if not raw and line.lstrip(" \t\f")[:1] in ("#", "!"):
+            # Comments never continue onto the next line
+            yield [line], line
+            continue
+        stripped = line if not raw else line.lstrip(" \t\f")
+        raw.append(line)
+        # An odd number of trailing backslashes continues the line
+        trailing = len(stripped) - len(stripped.rstrip("\\"))
+        if trailing % 2:
+            logical += stripped[:-1]
+            continue
+        yield raw, logical + stripped
+        raw = []
+        logical = ""
+    if raw:
+        yield raw, logical
+
+
+class PropertiesFile:
+    """A parsed .properties file that keeps its layout.
+
+    Comments, blank lines and key order are preserved so a bundle can be
+    written back in the shape of its source.  ``lines`` holds
+    ``(raw lines, key)`` items, with key None for comments and blank lines.
+    """
+
+    def __init__(self):
+        self.lines: List[Tuple[List[str], Optional[str]]] = []
+        self.values: Dict[str, str] = {}
+
+    @classmethod
+    def parse(cls, text: str) -> "PropertiesFile":
+        bundle = cls()
+        for raw, logical in _logical_lines(text):
+            line = logical.lstrip(" \t\f")
+            if not line or line[0] in "#!":
+                bundle.lines.append((raw, None))
+                continue
+            match = _SEPARATOR.search(line)
+            if match is None:
+                key, value = line, ""
+            else:
+                key = line[:match.end() - 1]
+                value = line[match.end():].lstrip(" \t\f")
+                # "key = value": whitespace may surround a single = or :
+                if match.group(0)[-1] in " \t\f" and value[:1] in ("=", ":"):
+                    value = value[1:].lstrip(" \t\f")
+            key = unescape(key)
+            if key not in bundle.values:
+                bundle.lines.append((raw, key))
+            bundle.values[key] = unescape(value)
+        return bundle
+
+    @classmethod
+    def load(cls, path: str) -> "PropertiesFile":
+        # .properties files are ISO-8859-1 with \uXXXX escapes, but UTF-8
+        # bundles are common; accept both
+        with open(path, "rb") as f:
+            data = f.read()
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            text = data.decode("latin-1")
+        return cls.parse(text)
+
+    def render(self, values: Dict[str, str] = None) -> str:
+        """Render the file, optionally with other values for its keys.
+
+        Keys missing from ``values`` are left out; comments are kept as is.
+        """
+        values = self.values if values is None else values
+        out = []
+        for raw, key in self.lines:
+            if key is None:
+                out.extend(raw)
+            elif key in values:
+                out.append(f"{escape(key, is_key=True)}={escape(values[key])}")
+        return "\n".join(out) + "\n"
+
+    def save(self, path: str, values: Dict[str, str] = None):
+        with open(path, "w", encoding="ascii", newline="\n") as f:
+            f.write(self.render(values))
@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class ResultCache:
+    """In-process LRU cache of translation results with TTL and single-flight.
+
+    Keys are full request tuples (text, languages, mode, script, domain).
+    The first caller to miss on a key becomes its leader and computes the
+    value; identical requests arriving meanwhile wait on the leader's
+    future instead of starting their own upstream call.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: float = 24 * 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(text: str, source_lang: str, target_lang: str, translation_mode: str = None,
+                 output_script: str = None, domain: str = None) -> tuple:
+        """Build the cache key of one translation request"""
+        return (text, source_lang, target_lang, translation_mode, output_script, domain)
+
+    def _get_fresh(self, key: Hashable) -> Optional[str]:
+        """Return a live cached value (caller holds the lock)"""
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """Return the cached value for key, if present and not expired"""
+        with self._lock:
+            value = self._get_fresh(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: str):
+        """Store a value, evicting the least recently used entries"""
+        with self._lock:
+            self._put(key, value)
+
+    def _put(self, key: Hashable, value: str):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def claim(self, key: Hashable) -> Tuple[Future, bool]:
+        """Return (future, is_leader) for a key.
+
+        The future is already resolved on a cache hit and shared with the
+        leader while another caller computes the value.  A leader must call
+        ``resolve`` or ``fail`` for the key.
+        """
+        with self._lock:
+            value = self._get_fresh(key)
+            if value is not None:
+                self.hits += 1
+                future = Future()
+                future.set_result(value)
+                return future, False
+            if key in self._inflight:
+                self.coalesced += 1
+                return self._inflight[key], False
+            self.misses += 1
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def resolve(self, key: Hashable, value: str):
+        """Publish a leader's result to the cache and to waiting callers"""
+        with self._lock:
+            self._put(key, value)
+            future = self._inflight.pop(key, None)
+        if future is not None:
+            future.set_result(value)
+
+    def fail(self, key: Hashable, error: BaseException):
+        """Propagate a leader's error to waiting callers without caching it"""
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is not None:
+            future.set_exception(error)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], str]) -> str:
+        """Return the cached value or compute it once across concurrent callers"""
+        future, leader = self.claim(key)
+        if leader:
+            try:
+                self.resolve(key, compute())
+            except BaseException as e:
+                self.fail(key, e)
+                raise
+        return future.result()
+
+    def clear(self):
+        """Drop all cached values (in-flight requests are unaffected)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_statistics(self) -> dict:
+        """Hit, miss and coalescing counters of the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "in_flight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0
+            }
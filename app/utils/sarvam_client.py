@@ -0,0 +1,188 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from .metrics import REGISTRY, MetricsRegistry
+
+DEFAULT_ENDPOINT = "https://api.sarvam.ai/translate"
+
+
+class SarvamAPIError(Exception):
+    """The translation API rejected a request or kept failing after retries"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 response_text: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response_text = response_text
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests per second, bursts of ``capacity``"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity,
+                                   self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SarvamClient:
+    """Pooled, rate-limited client for the Sarvam AI translate endpoint.
+
+    One ``requests.Session`` keeps connections alive across calls, every
+    request goes through a token bucket, and 429/5xx responses or network
+    errors are retried with exponential backoff (honouring ``Retry-After``).
+    ``translate_many`` runs requests on a bounded thread pool.  Request
+    latency, outcomes, retries and failures are recorded as metrics.
+    """
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, api_key: str, endpoint: str = DEFAULT_ENDPOINT,
+                 timeout: float = 30.0, connect_timeout: float = 5.0,
+                 max_retries: int = 4, backoff: float = 0.5, max_backoff: float = 8.0,
+                 rate_limit: float = 10.0, burst: int = 10, max_workers: int = 8,
+                 metrics: MetricsRegistry = None):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.timeout = (connect_timeout, timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(rate_limit, burst)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "api-subscription-key": api_key,
+            "Content-Type": "application/json"
+        })
+        # Worker threads are only started when translate_many needs them
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="sarvam")
+
+        metrics = metrics or REGISTRY
+        self._request_seconds = metrics.histogram(
+            "sarvam_api_request_seconds", "Latency of single HTTP requests to the translate API")
+        self._responses = metrics.counter(
+            "sarvam_api_requests_total", "HTTP requests to the translate API by outcome",
+            ("status",))
+        self._retries = metrics.counter(
+            "sarvam_api_retries_total", "Retried requests by reason", ("reason",))
+        self._failures = metrics.counter(
+            "sarvam_api_failures_total", "Translations that failed after retries")
+        self._wait_seconds = metrics.histogram(
+            "sarvam_api_rate_limit_wait_seconds", "Time spent waiting for the client rate limiter")
+
+    @classmethod
+    def from_env(cls, api_key: str = None, endpoint: str = None) -> "SarvamClient":
+        """Build a client from SARVAM_* environment variables"""
+        return cls(
+            api_key=api_key or os.getenv("SARVAM_API_KEY", ""),
+            endpoint=endpoint or os.getenv("SARVAM_API_ENDPOINT", DEFAULT_ENDPOINT),
+            timeout=float(os.getenv("SARVAM_TIMEOUT", "30")),
+            max_retries=int(os.getenv("SARVAM_MAX_RETRIES", "4")),
+            rate_limit=float(os.getenv("SARVAM_RATE_LIMIT", "10")),
+            burst=int(os.getenv("SARVAM_BURST", "10")),
+            max_workers=int(os.getenv("SARVAM_MAX_CONCURRENCY", "8"))
+        )
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        """Exponential backoff with full jitter, or the server's Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.max_backoff)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def translate(self, text: str, source_lang: str, target_lang: str,
+                  translation_mode: str = "formal", output_script: str = None) -> str:
+        """Translate one text, retrying throttled and failed requests"""
+        payload = {
+            "input": text,
+            "source_language_code": source_lang,
+            "target_language_code": target_lang,
+            "mode": translation_mode
+        }
+        if output_script and output_script != "Default":
+            payload["output_script"] = output_script.lower()
+
+        for attempt in range(self.max_retries + 1):
+            with self._wait_seconds.time():
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self.session.post(self.endpoint, json=payload, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                reason = "timeout" if isinstance(e, requests.Timeout) else "connection_error"
+                self._responses.inc(status=reason)
+                if attempt == self.max_retries:
+                    self._failures.inc()
+                    raise SarvamAPIError(f"Request failed: {e}") from e
+                self._retries.inc(reason=reason)
+                time.sleep(self._retry_delay(attempt))
+                continue
+            finally:
+                self._request_seconds.observe(time.perf_counter() - start)
+
+            self._responses.inc(status=str(response.status_code))
+            if response.status_code == 200:
+                try:
+                    translation = response.json()["translated_text"]
+                    if not isinstance(translation, str):
+                        raise TypeError("translated_text is not a string")
+                except (ValueError, KeyError, TypeError) as e:
+                    # Not retried: the same request would get the same body
+                    self._failures.inc()
+                    raise SarvamAPIError("Malformed response", 200, response.text) from e
+                return translation
+            if response.status_code not in self.RETRY_STATUSES or attempt == self.max_retries:
+                self._failures.inc()
+                raise SarvamAPIError(f"API Error: {response.status_code}",
+                                     response.status_code, response.text)
+            self._retries.inc(reason=str(response.status_code))
+            time.sleep(self._retry_delay(attempt, response))
+
+    def translate_many(self, texts: List[str], source_lang: str, target_lang: str,
+                       translation_mode: str = "formal", output_script: str = None) -> List[str]:
+        """Translate several texts concurrently, returning results in order"""
+        if len(texts) <= 1:
+            return [self.translate(text, source_lang, target_lang, translation_mode,
+                                   output_script) for text in texts]
+        futures = [
+            self._executor.submit(self.translate, text, source_lang, target_lang,
+                                  translation_mode, output_script)
+            for text in texts
+        ]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Shut down the worker pool and close pooled connections"""
+        self._executor.shutdown(wait=False)
+        self.session.close()
@@ -0,0 +1,37 @@
+import re
+from typing import List, Tuple
+
+# Line breaks, or whitespace after sentence-final punctuation (including the
+# Devanagari danda), separate segments.  The separators themselves are kept.
+_BOUNDARY = re.compile(r"(\s*\n\s*|(?<=[.!?।॥])\s+)")
+_EDGE_SPACE = re.compile(r"^(\s*)(.*?)(\s*)$", re.DOTALL)
+
+
+def is_translatable(piece: str) -> bool:
+    """Whether a piece contains any letters worth sending for translation"""
+    return any(char.isalpha() for char in piece)
+
+
+def split_segments(text: str) -> List[Tuple[str, bool]]:
+    """Split text into (piece, translatable) tuples.
+
+    Joining the pieces gives back the original text exactly: separators,
+    surrounding whitespace and letter-free pieces (numbers, bullets,
+    punctuation) are returned as non-translatable pieces so formatting
+    survives reassembly.
+    """
+    pieces = []
+    for index, part in enumerate(_BOUNDARY.split(text)):
+        if not part:
+            continue
+        if index % 2:
+            pieces.append((part, False))
+            continue
+        leading, core, trailing = _EDGE_SPACE.match(part).groups()
+        if leading:
+            pieces.append((leading, False))
+        if core:
+            pieces.append((core, is_translatable(core)))
+        if trailing:
+            pieces.append((trailing, False))
+    return pieces
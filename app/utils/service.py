@@ -0,0 +1,64 @@
+import os
+import threading
+from .glossary import Glossary
+from .pipeline import TranslationPipeline
+from .result_cache import ResultCache
+from .sarvam_client import SarvamClient
+from .tm_storage import open_storage
+from .translation_memory import TranslationMemory
+
+
+class TranslationService:
+    """TM, glossary, API client and result cache wired into one pipeline.
+
+    Configured from the environment (TM_STORAGE_URL, GLOSSARY_DIR and the
+    SARVAM_* client settings) so every entry point, and every worker
+    process, builds the same setup.  Use a SQLite or Postgres TM when
+    several processes run at once.
+
+    The service only reads the glossary; it is edited by another process
+    (the Streamlit app or ``python -m utils.glossary``) and reloaded by
+    ``refresh_glossary`` once its files change.
+    """
+
+    def __init__(self, storage_url: str = None, glossary_dir: str = None):
+        self.tm = TranslationMemory(storage=open_storage(storage_url))
+        self.glossary_dir = glossary_dir or os.getenv("GLOSSARY_DIR", "app/data/glossaries")
+        self._glossary_lock = threading.Lock()
+        self._glossary_state = Glossary.file_state(self.glossary_dir)
+        self.glossary = Glossary(self.glossary_dir, repair_journal=False)
+        self.client = SarvamClient.from_env()
+        self.result_cache = ResultCache(
+            max_entries=int(os.getenv("RESULT_CACHE_SIZE", "10000")),
+            ttl=float(os.getenv("RESULT_CACHE_TTL", str(24 * 3600)))
+        )
+        self.pipeline = TranslationPipeline(
+            self.tm, self.glossary, self.client.translate,
+            batch_translate_fn=self.client.translate_many,
+            result_cache=self.result_cache
+        )
+
+    def refresh_glossary(self) -> bool:
+        """Reload the glossary if its files changed since it was loaded.
+
+        The new glossary is loaded aside and swapped in, so requests in
+        progress keep using the old one; cached results, which have
+        glossary terms applied, are dropped.  Returns whether the glossary
+        was reloaded.
+        """
+        with self._glossary_lock:
+            state = Glossary.file_state(self.glossary_dir)
+            if state == self._glossary_state:
+                return False
+            glossary = Glossary(self.glossary_dir, repair_journal=False)
+            self._glossary_state = state
+            self.glossary = self.pipeline.glossary = glossary
+            self.result_cache.clear()
+            return True
+
+    def close(self):
+        """Flush pending writes and release connections"""
+        self.tm.flush()
+        self.tm.storage.close()
+        self.glossary.journal.close()
+        self.client.close()
@@ -0,0 +1,117 @@
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+import unicodedata
+
+
+def _is_word_char(char: str) -> bool:
+    """Letters, digits, underscores and combining marks (Indic vowel signs)"""
+    return char.isalnum() or char == "_" or unicodedata.category(char).startswith("M")
+
+
+def _lower_same_length(text: str) -> str:
+    """Lowercase text without changing its length, so offsets stay valid"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over the source terms of one glossary slice.
+
+    ``replace`` scans the text once, picks leftmost-longest matches that
+    start and end on word boundaries, and substitutes their translations.
+    Matching is case-insensitive; a capitalized occurrence gets a
+    capitalized translation.
+    """
+
+    def __init__(self, terms: Dict[str, str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        self._terminal: List[bool] = [False]
+        # Nearest terminal node on the failure chain, or -1
+        self._output: List[int] = [-1]
+        self._translations: List[Optional[str]] = [None]
+
+        for term, translation in terms.items():
+            if term:
+                self._insert(term.lower(), translation)
+        self._build_failure_links()
+
+    def __len__(self) -> int:
+        return sum(self._terminal)
+
+    def _insert(self, term: str, translation: str):
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[node] + 1)
+                self._terminal.append(False)
+                self._output.append(-1)
+                self._translations.append(None)
+                self._goto[node][char] = next_node
+            node = next_node
+        self._terminal[node] = True
+        self._translations[node] = translation
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                fail = self._fail[child]
+                self._output[child] = fail if self._terminal[fail] else self._output[fail]
+                queue.append(child)
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """Yield (start, end, translation) for every word-bounded match"""
+        lowered = _lower_same_length(text)
+        node = 0
+        for position, char in enumerate(lowered):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+
+            end = position + 1
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            match = node if self._terminal[node] else self._output[node]
+            while match > 0:
+                start = end - self._depth[match]
+                if start == 0 or not _is_word_char(text[start - 1]):
+                    yield start, end, self._translations[match]
+                match = self._output[match]
+
+    def replace(self, text: str) -> str:
+        """Replace leftmost-longest glossary matches in a single pass"""
+        longest: Dict[int, Tuple[int, str]] = {}
+        for start, end, translation in self.find(text):
+            if start not in longest or end > longest[start][0]:
+                longest[start] = (end, translation)
+        if not longest:
+            return text
+
+        parts = []
+        position = 0
+        for start in sorted(longest):
+            if start < position:
+                continue
+            end, translation = longest[start]
+            surface = text[start:end]
+            if surface[:1].isupper():
+                translation = translation[:1].upper() + translation[1:]
+            parts.append(text[position:start])
+            parts.append(translation)
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
@@ -0,0 +1,201 @@
+import heapq
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from .fuzzy_index import FuzzyIndex
+from .journal import write_json_atomic
+from .normalizer import normalize_segment, restore_tokens
+from .translation_memory import TranslationMemory
+
+# Policy applied to language pairs without one of their own
+DEFAULT_POLICY = "*"
+
+
+def pair_key(source_lang: str, target_lang: str) -> str:
+    return f"{source_lang}->{target_lang}"
+
+
+class RetentionPolicy:
+    """How many and which entries of a language pair the TM keeps.
+
+    ``max_entries`` caps the pair, evicting the least recently used
+    ("lru") or least frequently used ("lfu") entries first;
+    ``max_age_days`` expires entries not used (or, if never used, not
+    written) for that long.  Entries imported from TMX are never removed
+    while ``pin_imported`` is set.
+    """
+
+    STRATEGIES = ("lru", "lfu")
+
+    def __init__(self, max_entries: Optional[int] = None, strategy: str = "lru",
+                 max_age_days: Optional[float] = None, pin_imported: bool = True):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown eviction strategy: {strategy}")
+        self.max_entries = max_entries
+        self.strategy = strategy
+        self.max_age_days = max_age_days
+        self.pin_imported = pin_imported
+
+    def to_dict(self) -> dict:
+        return {
+            "max_entries": self.max_entries,
+            "strategy": self.strategy,
+            "max_age_days": self.max_age_days,
+            "pin_imported": self.pin_imported
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RetentionPolicy":
+        return cls(**data)
+
+    def is_pinned(self, entry: dict) -> bool:
+        return self.pin_imported and entry.get("origin") == "tmx"
+
+
+def load_policies(path: str) -> Dict[str, RetentionPolicy]:
+    """Read policies keyed by "src->tgt" (or "*" for the default)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return {key: RetentionPolicy.from_dict(value) for key, value in json.load(f).items()}
+
+
+def save_policies(path: str, policies: Dict[str, RetentionPolicy]):
+    write_json_atomic(path, {key: policy.to_dict() for key, policy in policies.items()},
+                      indent=2)
+
+
+def _last_active(entry: dict) -> str:
+    """When an entry was last used, or written if it never was"""
+    return entry.get("last_used") or entry.get("timestamp") or ""
+
+
+def apply_retention(tm: TranslationMemory, policies: Dict[str, RetentionPolicy],
+                    now: datetime = None) -> List[dict]:
+    """Expire and evict entries of every language pair by its policy.
+
+    Returns one statistics dict per pair that has a policy.
+    """
+    now = now or datetime.now()
+    tm.flush_usage()
+    results = []
+    for source_lang, target_lang in tm.storage.language_pairs():
+        policy = policies.get(pair_key(source_lang, target_lang), policies.get(DEFAULT_POLICY))
+        if policy is None:
+            continue
+        stats = {"language_pair": pair_key(source_lang, target_lang), "entries": 0,
+                 "pinned": 0, "expired": 0, "evicted": 0, "remaining": 0}
+        # (eviction order key, source) of the entries that may be removed
+        candidates: List[Tuple[tuple, str]] = []
+        doomed = []
+        cutoff = None
+        if policy.max_age_days:
+            cutoff = (now - timedelta(days=policy.max_age_days)).isoformat()
+        for _, _, source, entry in tm.storage.iter_entries(source_lang, target_lang):
+            stats["entries"] += 1
+            if policy.is_pinned(entry):
+                stats["pinned"] += 1
+                continue
+            last_active = _last_active(entry)
+            if cutoff and last_active < cutoff:
+                doomed.append(source)
+                stats["expired"] += 1
+                continue
+            if policy.strategy == "lfu":
+                order = (entry.get("hits", 0), last_active)
+            else:
+                order = (last_active, entry.get("hits", 0))
+            candidates.append((order, source))
+
+        kept = stats["entries"] - stats["expired"]
+        if policy.max_entries is not None and kept > policy.max_entries:
+            candidates.sort()
+            excess = min(kept - policy.max_entries, len(candidates))
+            doomed.extend(source for _, source in candidates[:excess])
+            stats["evicted"] = excess
+
+        if doomed:
+            tm.delete_translations((source_lang, target_lang, source) for source in doomed)
+        stats["remaining"] = stats["entries"] - len(doomed)
+        results.append(stats)
+    return results
+
+
+def most_used(tm: TranslationMemory, source_lang: str, target_lang: str,
+              limit: int = 20) -> List[Tuple[int, str, str, str]]:
+    """(hits, last used, source, translation) of a pair's most used entries.
+
+    Scans the whole pair, keeping only the ``limit`` best in memory.
+    """
+    tm.flush_usage()
+    return heapq.nlargest(limit, (
+        (entry.get("hits", 0), entry.get("last_used") or "", source, entry["text"])
+        for _, _, source, entry in tm.storage.iter_entries(source_lang, target_lang)
+        if entry.get("hits")
+    ))
+
+
+def compact_duplicates(tm: TranslationMemory, source_lang: str, target_lang: str,
+                       similarity: Optional[float] = 0.95, pin_imported: bool = True) -> dict:
+    """Remove entries that another entry of the pair already covers.
+
+    An entry is a duplicate when the TM would produce its exact
+    translation from a kept entry anyway: its source normalizes to the
+    same key (numbers, placeholders, case or whitespace differ) and
+    adapting the kept translation reproduces its own, or, with
+    ``similarity``, its source is at least that similar and the
+    translations are identical.  The most used entries are kept and
+    inherit the hit counts of their duplicates.
+    """
+    tm.flush_usage()
+    entries = list(enumerate(
+        (source, entry) for _, _, source, entry in tm.storage.iter_entries(source_lang, target_lang)
+    ))
+
+    def pinned(entry: dict) -> bool:
+        return pin_imported and entry.get("origin") == "tmx"
+
+    # Pinned entries first, then by use, then in insertion order
+    entries.sort(key=lambda item: (not pinned(item[1][1]), -item[1][1].get("hits", 0), item[0]))
+
+    keepers: Dict[str, dict] = {}
+    by_key: Dict[str, Tuple[str, List[str]]] = {}
+    index = FuzzyIndex() if similarity is not None and similarity < 1 else None
+    doomed = []
+    merged = set()
+    stats = {"language_pair": pair_key(source_lang, target_lang), "entries": len(entries),
+             "normalized_duplicates": 0, "similar_duplicates": 0}
+    for _, (source, entry) in entries:
+        key, tokens = normalize_segment(source)
+        keeper = None
+        if not pinned(entry):
+            stored = by_key.get(key)
+            if stored and restore_tokens(keepers[stored[0]]["text"], stored[1], tokens) == entry["text"]:
+                keeper = stored[0]
+                stats["normalized_duplicates"] += 1
+            elif index is not None:
+                match = index.search(source, similarity)
+                if match and keepers[match[0]]["text"] == entry["text"]:
+                    keeper = match[0]
+                    stats["similar_duplicates"] += 1
+
+        if keeper is None:
+            keepers[source] = entry
+            by_key.setdefault(key, (source, tokens))
+            if index is not None:
+                index.add(source)
+            continue
+
+        doomed.append((source_lang, target_lang, source))
+        if entry.get("hits"):
+            kept = keepers[keeper]
+            kept["hits"] = kept.get("hits", 0) + entry["hits"]
+            kept["last_used"] = max(kept.get("last_used") or "", entry.get("last_used") or "") or None
+            merged.add(keeper)
+
+    if doomed:
+        tm.storage.put_many((source_lang, target_lang, source, keepers[source]) for source in merged)
+        tm.delete_translations(doomed)
+    stats["remaining"] = len(entries) - len(doomed)
+    return stats
@@ -0,0 +1,293 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b"TMSNAP01"
+# Magic, directory offset, directory length
+_HEADER = struct.Struct("<8sQQ")
+# Stored for entries without a timestamp (or with one kept verbatim in meta)
+NO_TIMESTAMP = -(2 ** 63)
+_NO_CONTEXT = 0xFFFFFFFF
+_MICROSECOND = timedelta(microseconds=1)
+
+# Sections of a language pair, in file order: (name, array typecode or None for bytes)
+_SECTIONS = (
+    ("source_offsets", "Q"),
+    ("target_offsets", "Q"),
+    ("meta_offsets", "Q"),
+    ("context_offsets", "Q"),
+    ("timestamps", "q"),
+    ("context_ids", "I"),
+    ("slots", "I"),
+    ("sources", None),
+    ("targets", None),
+    ("metas", None),
+    ("contexts", None),
+)
+
+
+def _timestamp_micros(timestamp: Optional[str]) -> Optional[int]:
+    """Encode a naive ISO timestamp as microseconds since datetime.min.
+
+    Returns None when the value would not survive the round trip (other
+    formats, time zones); such timestamps are kept verbatim in meta.
+    """
+    if not timestamp:
+        return NO_TIMESTAMP
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is not None or moment.isoformat() != timestamp:
+        return None
+    return (moment - datetime.min) // _MICROSECOND
+
+
+def _timestamp_iso(micros: int) -> Optional[str]:
+    if micros == NO_TIMESTAMP:
+        return None
+    return (datetime.min + micros * _MICROSECOND).isoformat()
+
+
+class TMRecord:
+    """One translation, without the per-entry dict of the JSON format"""
+
+    __slots__ = ("text", "context", "timestamp", "meta")
+
+    def __init__(self, text: str, context: Optional[str] = None,
+                 timestamp: Optional[str] = None, meta: Optional[dict] = None):
+        self.text = text
+        self.context = context
+        self.timestamp = timestamp
+        self.meta = meta
+
+    @classmethod
+    def from_entry(cls, entry: dict) -> "TMRecord":
+        extra = {key: value for key, value in entry.items()
+                 if key not in ("text", "context", "timestamp")}
+        return cls(entry["text"], entry.get("context"), entry.get("timestamp"), extra or None)
+
+    def to_entry(self) -> dict:
+        entry = {"text": self.text, "context": self.context, "timestamp": self.timestamp}
+        if self.meta:
+            entry.update(self.meta)
+        return entry
+
+
+def _hash(data: bytes) -> int:
+    return zlib.crc32(data)
+
+
+def _table_size(count: int) -> int:
+    """Power-of-two slot count keeping the hash index at most half full"""
+    size = 8
+    while size < count * 2:
+        size *= 2
+    return size
+
+
+def _encode_pair(records: Iterable[Tuple[str, TMRecord]]) -> Tuple[int, Dict[str, object]]:
+    """Build the sections of one language pair"""
+    sections = {name: (array(code) if code else bytearray()) for name, code in _SECTIONS}
+    for name in ("source_offsets", "target_offsets", "meta_offsets", "context_offsets"):
+        sections[name].append(0)
+    context_ids: Dict[str, int] = {}
+    hashes = []
+    for source, record in records:
+        data = source.encode("utf-8")
+        hashes.append(_hash(data))
+        sections["sources"] += data
+        sections["source_offsets"].append(len(sections["sources"]))
+        sections["targets"] += record.text.encode("utf-8")
+        sections["target_offsets"].append(len(sections["targets"]))
+
+        meta = dict(record.meta) if record.meta else {}
+        micros = _timestamp_micros(record.timestamp)
+        if micros is None:
+            meta["timestamp"] = record.timestamp
+            micros = NO_TIMESTAMP
+        sections["timestamps"].append(micros)
+        if meta:
+            sections["metas"] += json.dumps(meta, ensure_ascii=False).encode("utf-8")
+        sections["meta_offsets"].append(len(sections["metas"]))
+
+        # Contexts repeat across entries ("TMX Import"), so store each once
+        if record.context is None:
+            sections["context_ids"].append(_NO_CONTEXT)
+        else:
+            if record.context not in context_ids:
+                context_ids[record.context] = len(context_ids)
+                sections["contexts"] += record.context.encode("utf-8")
+                sections["context_offsets"].append(len(sections["contexts"]))
+            sections["context_ids"].append(context_ids[record.context])
+
+    # Open-addressing hash index; slots hold entry index + 1, 0 when empty
+    size = _table_size(len(hashes))
+    slots = array("I", bytes(4 * size))
+    for index, value in enumerate(hashes):
+        slot = value & (size - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = index + 1
+    sections["slots"] = slots
+    return len(hashes), sections
+
+
+def write_snapshot(path: str, pairs: Iterable[Tuple[str, str, Iterable[Tuple[str, TMRecord]]]]):
+    """Write language pairs of (source, record) items to a snapshot file.
+
+    Items keep their order, which becomes the insertion order of the pair.
+    The file is written next to ``path`` and atomically moved over it.
+    """
+    tmp_path = f"{path}.tmp"
+    directory = {"byteorder": sys.byteorder, "pairs": []}
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, 0, 0))
+        for source_lang, target_lang, records in pairs:
+            count, sections = _encode_pair(records)
+            layout = {}
+            for name, _ in _SECTIONS:
+                # Align every section for zero-copy memoryview casts
+                f.write(bytes(-f.tell() % 8))
+                data = sections[name]
+                data = data.tobytes() if isinstance(data, array) else bytes(data)
+                layout[name] = [f.tell(), len(data)]
+                f.write(data)
+            directory["pairs"].append({
+                "source_lang": source_lang,
+                "target_lang": target_lang,
+                "count": count,
+                "sections": layout
+            })
+        data = json.dumps(directory, ensure_ascii=False).encode("utf-8")
+        offset = f.tell()
+        f.write(data)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, offset, len(data)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SnapshotPair:
+    """Read-only view of one language pair of a mapped snapshot.
+
+    Arrays are memoryviews over the mapping, so nothing is decoded until an
+    entry is looked up and only the touched pages are read from disk.
+    """
+
+    def __init__(self, buffer: memoryview, info: dict, swap: bool):
+        self.source_lang = info["source_lang"]
+        self.target_lang = info["target_lang"]
+        self.count = info["count"]
+        for name, code in _SECTIONS:
+            offset, length = info["sections"][name]
+            view = buffer[offset:offset + length]
+            if code is not None:
+                if swap:
+                    # Written on a machine of the other byte order: copy once
+                    view = array(code, view.tobytes())
+                    view.byteswap()
+                else:
+                    view = view.cast(code)
+            setattr(self, name, view)
+        self._mask = len(self.slots) - 1
+
+    def find(self, source_text: str) -> int:
+        """Index of a source segment, or -1"""
+        data = source_text.encode("utf-8")
+        offsets = self.source_offsets
+        slot = _hash(data) & self._mask
+        while True:
+            index = self.slots[slot] - 1
+            if index < 0:
+                return -1
+            if self.sources[offsets[index]:offsets[index + 1]] == data:
+                return index
+            slot = (slot + 1) & self._mask
+
+    def source(self, index: int) -> str:
+        offsets = self.source_offsets
+        return str(self.sources[offsets[index]:offsets[index + 1]], "utf-8")
+
+    def timestamp(self, index: int) -> Optional[str]:
+        start, end = self.meta_offsets[index], self.meta_offsets[index + 1]
+        if end > start:
+            meta = json.loads(str(self.metas[start:end], "utf-8"))
+            if "timestamp" in meta:
+                return meta["timestamp"]
+        return _timestamp_iso(self.timestamps[index])
+
+    def record(self, index: int) -> TMRecord:
+        offsets = self.target_offsets
+        text = str(self.targets[offsets[index]:offsets[index + 1]], "utf-8")
+        context = None
+        context_id = self.context_ids[index]
+        if context_id != _NO_CONTEXT:
+            offsets = self.context_offsets
+            context = str(self.contexts[offsets[context_id]:offsets[context_id + 1]], "utf-8")
+        meta = None
+        start, end = self.meta_offsets[index], self.meta_offsets[index + 1]
+        if end > start:
+            meta = json.loads(str(self.metas[start:end], "utf-8"))
+        timestamp = _timestamp_iso(self.timestamps[index])
+        if meta and "timestamp" in meta:
+            timestamp = meta.pop("timestamp")
+        return TMRecord(text, context, timestamp, meta or None)
+
+    def __iter__(self) -> Iterator[Tuple[str, TMRecord]]:
+        for index in range(self.count):
+            yield self.source(index), self.record(index)
+
+
+class Snapshot:
+    """Memory-mapped snapshot file with lazily opened language pairs.
+
+    Opening reads only the header and the pair directory; a pair's arrays
+    are mapped on its first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, offset, length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a TM snapshot")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        directory = json.loads(self._mmap[offset:offset + length].decode("utf-8"))
+        self._swap = directory["byteorder"] != sys.byteorder
+        self._infos = {(info["source_lang"], info["target_lang"]): info
+                       for info in directory["pairs"]}
+        self._pairs: Dict[Tuple[str, str], SnapshotPair] = {}
+
+    def language_pairs(self) -> List[Tuple[str, str]]:
+        return list(self._infos)
+
+    def count(self, source_lang: str, target_lang: str) -> int:
+        info = self._infos.get((source_lang, target_lang))
+        return info["count"] if info else 0
+
+    def pair(self, source_lang: str, target_lang: str) -> Optional[SnapshotPair]:
+        """The pair's view, mapping it on first use"""
+        key = (source_lang, target_lang)
+        pair = self._pairs.get(key)
+        if pair is None and key in self._infos:
+            pair = self._pairs.setdefault(
+                key, SnapshotPair(memoryview(self._mmap), self._infos[key], self._swap)
+            )
+        return pair
+
+    def close(self):
+        """Unmap the file; pair views must no longer be in use"""
+        self._pairs.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views still referenced elsewhere; the mapping goes with them
+            pass
@@ -0,0 +1,996 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from .journal import Journal, write_json_atomic
+from .tm_snapshot import Snapshot, TMRecord, write_snapshot
+
+# (source_lang, target_lang, source_text, entry)
+StoredEntry = Tuple[str, str, str, dict]
+# (source_lang, target_lang, source_text, hits, last_used)
+UsageUpdate = Tuple[str, str, str, int, str]
+
+# Guards the bulk() nesting depth of every storage
+_BULK_LOCK = threading.Lock()
+
+
+class StorageLockedError(RuntimeError):
+    """A file-backed TM is already open for writing elsewhere"""
+
+
+def _lock_file(path: str):
+    """Open ``path`` and hold an exclusive lock on it until the file is closed.
+
+    Journal-backed storages keep their state in one process; a second
+    writer would lose its entries when either one compacts, so it is
+    refused with StorageLockedError instead.
+    """
+    f = open(path, "a+b")
+    try:
+        try:
+            import fcntl
+        except ImportError:
+            # Windows
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        raise StorageLockedError(
+            f"{os.path.dirname(path) or '.'} is already open in another process (or "
+            f"storage object); use a sqlite: or postgresql:// TM_STORAGE_URL to share a TM "
+            f"between processes"
+        )
+    return f
+
+
+def _with_usage(entry: dict, hits: int, last_used: str) -> dict:
+    """A copy of an entry with hits added and the later last-used time"""
+    return dict(entry, hits=entry.get("hits", 0) + hits,
+                last_used=max(entry.get("last_used") or "", last_used))
+
+
+def source_hash(source_text: str) -> str:
+    """Stable hash of a source segment, used as the lookup key in SQL backends"""
+    return hashlib.sha1(source_text.encode("utf-8")).hexdigest()
+
+
+class TMStorage(ABC):
+    """Where a TranslationMemory keeps its entries.
+
+    Entries are dicts with at least ``text``, ``context`` and ``timestamp``,
+    keyed by (source_lang, target_lang, source_text).  ``iter_sources``
+    returns sources in insertion order with a cursor, so in-process indexes
+    can catch up with entries written by other processes.  ``epoch`` is
+    bumped whenever existing cursors become invalid (a compaction that
+    dropped deleted entries) or, in shared backends, when entries are
+    deleted; indexes must then be rebuilt.
+    """
+
+    epoch = 0
+
+    @abstractmethod
+    def get(self, source_lang: str, target_lang: str, source_text: str) -> Optional[dict]:
+        """Return the entry stored for a source segment"""
+
+    @abstractmethod
+    def put_many(self, entries: Iterable[StoredEntry]):
+        """Insert or replace entries"""
+
+    @abstractmethod
+    def delete_many(self, keys: Iterable[Tuple[str, str, str]]) -> int:
+        """Delete (source_lang, target_lang, source_text) entries; returns how many existed"""
+
+    @abstractmethod
+    def add_usage(self, updates: Iterable[UsageUpdate]) -> int:
+        """Add hit counts and last-used times to stored entries; returns how many existed.
+
+        Only the usage fields change, so a translation replaced or deleted
+        since the hits were counted is neither overwritten nor brought
+        back.  Never compacts: it runs on the lookup path.
+        """
+
+    @abstractmethod
+    def iter_entries(self, source_lang: str = None, target_lang: str = None,
+                     modified_since: str = None) -> Iterator[StoredEntry]:
+        """Iterate over entries, optionally of one pair or newer than an ISO time"""
+
+    @abstractmethod
+    def iter_sources(self, source_lang: str, target_lang: str,
+                     after: int = 0) -> Iterator[Tuple[int, str]]:
+        """Yield (cursor, source_text) for sources added after a cursor"""
+
+    @abstractmethod
+    def language_pairs(self) -> List[Tuple[str, str]]:
+        """List the (source_lang, target_lang) pairs that hold entries"""
+
+    @abstractmethod
+    def count(self, source_lang: str = None, target_lang: str = None) -> int:
+        """Number of stored entries, optionally of one language pair"""
+
+    def flush(self):
+        """Make every write so far durable"""
+
+    def compact(self):
+        """Reorganize storage for faster loading (no-op where not needed)"""
+
+    # Open bulk() blocks; automatic compaction waits until none is left
+    _bulk_depth = 0
+
+    @contextmanager
+    def bulk(self) -> Iterator[None]:
+        """Defer automatic compaction until a block of many writes ends.
+
+        Journal-backed storages fold the journal into their snapshot every
+        ``COMPACT_EVERY`` records, rewriting the whole store, which makes a
+        large import quadratic.  Inside ``bulk`` they compact at most once,
+        when the outermost block ends.
+        """
+        with _BULK_LOCK:
+            self._bulk_depth += 1
+        try:
+            yield
+        finally:
+            with _BULK_LOCK:
+                self._bulk_depth -= 1
+            self._compact_if_due()
+
+    def _compact_if_due(self):
+        """Compact if the journal outgrew its limit (journal-backed storages)"""
+
+    def close(self):
+        """Release files and connections"""
+
+
+class JSONStorage(TMStorage):
+    """Nested dicts in memory, persisted as a JSON snapshot plus a journal.
+
+    Suited to a single process with a small TM: everything is loaded at
+    startup, writes are appended to the journal and fsync'd in groups, and
+    ``compact`` folds the journal into the snapshot.  The directory is
+    locked while open; opening it again raises StorageLockedError.
+    """
+
+    # Journal records are fsync'd in groups of this size (or after a second)
+    JOURNAL_GROUP_SIZE = 64
+    # Fold the journal into the JSON snapshot once it holds this many records
+    COMPACT_EVERY = 10000
+
+    def __init__(self, tm_dir: str = "app/data/tm"):
+        self.tm_dir = tm_dir
+        self.memory: Dict[str, Dict[str, dict]] = {}
+        # Sources of each pair in insertion order, for iter_sources cursors;
+        # deleted sources stay until the next compaction
+        self._order: Dict[Tuple[str, str], List[str]] = {}
+        self._deleted = False
+        self._lock = threading.RLock()
+        os.makedirs(self.tm_dir, exist_ok=True)
+        self._lock_file = _lock_file(os.path.join(self.tm_dir, "translation_memory.json.lock"))
+
+        # Load JSON TM if exists
+        self.snapshot_path = os.path.join(self.tm_dir, "translation_memory.json")
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                self.memory = json.load(f)
+        for src_lang, translations in self.memory.items():
+            for tgt_lang, pairs in translations.items():
+                self._order[(src_lang, tgt_lang)] = list(pairs)
+
+        # Replay translations added since the snapshot was written
+        self.journal = Journal(
+            os.path.join(self.tm_dir, "translation_memory.journal.jsonl"),
+            group_size=self.JOURNAL_GROUP_SIZE
+        )
+        for record in self.journal.replay():
+            self._apply_record(record)
+
+    def _apply_record(self, record: dict):
+        """Apply one journal record to the in-memory TM"""
+        if record.get("op") == "add":
+            self._store(record["source_lang"], record["target_lang"],
+                        record["source"], record["entry"])
+        elif record.get("op") == "delete":
+            self._delete(record["source_lang"], record["target_lang"], record["source"])
+        elif record.get("op") == "usage":
+            self._add_usage(record["source_lang"], record["target_lang"], record["source"],
+                            record["hits"], record["last_used"])
+
+    def _add_usage(self, source_lang: str, target_lang: str, source_text: str,
+                   hits: int, last_used: str) -> bool:
+        pairs = self.memory.get(source_lang, {}).get(target_lang, {})
+        entry = pairs.get(source_text)
+        if entry is None:
+            return False
+        pairs[source_text] = _with_usage(entry, hits, last_used)
+        return True
+
+    def _delete(self, source_lang: str, target_lang: str, source_text: str) -> bool:
+        pairs = self.memory.get(source_lang, {}).get(target_lang, {})
+        if pairs.pop(source_text, None) is None:
+            return False
+        self._deleted = True
+        return True
+
+    def _store(self, source_lang: str, target_lang: str, source_text: str, entry: dict):
+        pairs = self.memory.setdefault(source_lang, {}).setdefault(target_lang, {})
+        if source_text not in pairs:
+            self._order.setdefault((source_lang, target_lang), []).append(source_text)
+        pairs[source_text] = entry
+
+    def get(self, source_lang: str, target_lang: str, source_text: str) -> Optional[dict]:
+        return self.memory.get(source_lang, {}).get(target_lang, {}).get(source_text)
+
+    def put_many(self, entries: Iterable[StoredEntry]):
+        with self._lock:
+            records = []
+            for source_lang, target_lang, source_text, entry in entries:
+                self._store(source_lang, target_lang, source_text, entry)
+                records.append({
+                    "op": "add",
+                    "source_lang": source_lang,
+                    "target_lang": target_lang,
+                    "source": source_text,
+                    "entry": entry
+                })
+            self.journal.append_many(records)
+            self._compact_if_due()
+
+    def delete_many(self, keys: Iterable[Tuple[str, str, str]]) -> int:
+        with self._lock:
+            records = [{"op": "delete", "source_lang": source_lang,
+                        "target_lang": target_lang, "source": source_text}
+                       for source_lang, target_lang, source_text in keys
+                       if self._delete(source_lang, target_lang, source_text)]
+            self.journal.append_many(records)
+            return len(records)
+
+    def add_usage(self, updates: Iterable[UsageUpdate]) -> int:
+        with self._lock:
+            records = [{"op": "usage", "source_lang": source_lang, "target_lang": target_lang,
+                        "source": source_text, "hits": hits, "last_used": last_used}
+                       for source_lang, target_lang, source_text, hits, last_used in updates
+                       if self._add_usage(source_lang, target_lang, source_text, hits, last_used)]
+            self.journal.append_many(records)
+            return len(records)
+
+    def iter_entries(self, source_lang: str = None, target_lang: str = None,
+                     modified_since: str = None) -> Iterator[StoredEntry]:
+        for src_lang in list(self.memory):
+            if source_lang and src_lang != source_lang:
+                continue
+            for tgt_lang in list(self.memory[src_lang]):
+                if target_lang and tgt_lang != target_lang:
+                    continue
+                pairs = self.memory[src_lang][tgt_lang]
+                # Iterate over a key snapshot so concurrent adds are harmless
+                for source in list(pairs):
+                    entry = pairs.get(source)
+                    if entry is None:
+                        continue
+                    if modified_since and (entry.get("timestamp") or "") <= modified_since:
+                        continue
+                    yield src_lang, tgt_lang, source, entry
+
+    def iter_sources(self, source_lang: str, target_lang: str,
+                     after: int = 0) -> Iterator[Tuple[int, str]]:
+        order = self._order.get((source_lang, target_lang), [])
+        pairs = self.memory.get(source_lang, {}).get(target_lang, {})
+        for position in range(after, len(order)):
+            if order[position] in pairs:
+                yield position + 1, order[position]
+
+    def language_pairs(self) -> List[Tuple[str, str]]:
+        return [(src_lang, tgt_lang) for src_lang, translations in list(self.memory.items())
+                for tgt_lang in list(translations)]
+
+    def count(self, source_lang: str = None, target_lang: str = None) -> int:
+        return sum(len(self.memory[src][tgt]) for src, tgt in self.language_pairs()
+                   if (not source_lang or src == source_lang)
+                   and (not target_lang or tgt == target_lang))
+
+    def _compact_if_due(self):
+        with self._lock:
+            if not self._bulk_depth and self.journal.records >= self.COMPACT_EVERY:
+                self.compact()
+
+    def flush(self):
+        self.journal.commit()
+
+    def compact(self):
+        """Compact the journal into the JSON snapshot"""
+        with self._lock:
+            self.journal.commit()
+            write_json_atomic(self.snapshot_path, self.memory)
+            self.journal.reset()
+            if self._deleted:
+                # Drop deleted sources from the order; positions shift
+                self._order = {(src_lang, tgt_lang): list(pairs)
+                               for src_lang, translations in self.memory.items()
+                               for tgt_lang, pairs in translations.items()}
+                self._deleted = False
+                self.epoch += 1
+
+    def close(self):
+        self.journal.close()
+        self._lock_file.close()
+
+
+class SnapshotStorage(TMStorage):
+    """Memory-mapped binary snapshot plus a journal; the default backend.
+
+    The snapshot (see ``tm_snapshot``) keeps each language pair as string
+    tables, offset arrays and a hash index, so opening the TM reads only
+    its directory and a session pages in just the pairs it queries.  Writes
+    since the last ``compact`` live in a small overlay of slotted records
+    and are appended to the journal.  A JSON snapshot left in ``tm_dir`` by
+    ``JSONStorage`` is converted on first open.
+
+    One process owns the directory: compaction rewrites the snapshot from
+    this process's view and resets the journal, which would drop entries
+    appended by any other writer.  The directory is therefore locked while
+    open and a second open raises StorageLockedError; use SQLite or
+    Postgres to share a TM between processes.
+    """
+
+    JOURNAL_GROUP_SIZE = 64
+    COMPACT_EVERY = 10000
+
+    def __init__(self, tm_dir: str = "app/data/tm"):
+        self.tm_dir = tm_dir
+        self._lock = threading.RLock()
+        # Entries written since the snapshot, per pair; None marks a deletion
+        self._overlay: Dict[Tuple[str, str], Dict[str, Optional[TMRecord]]] = {}
+        # Overlay sources not in the snapshot, in insertion order
+        self._added: Dict[Tuple[str, str], List[str]] = {}
+        os.makedirs(self.tm_dir, exist_ok=True)
+        self._lock_file = _lock_file(os.path.join(self.tm_dir, "translation_memory.tmsnap.lock"))
+
+        self.snapshot_path = os.path.join(self.tm_dir, "translation_memory.tmsnap")
+        self.journal = Journal(
+            os.path.join(self.tm_dir, "translation_memory.tmsnap.journal.jsonl"),
+            group_size=self.JOURNAL_GROUP_SIZE
+        )
+        self.snapshot: Optional[Snapshot] = None
+        if not os.path.exists(self.snapshot_path):
+            self._convert_json()
+        if os.path.exists(self.snapshot_path):
+            self.snapshot = Snapshot(self.snapshot_path)
+        for record in self.journal.replay():
+            if record.get("op") == "add":
+                self._store(record["source_lang"], record["target_lang"],
+                            record["source"], TMRecord.from_entry(record["entry"]))
+            elif record.get("op") == "delete":
+                self._store(record["source_lang"], record["target_lang"], record["source"], None)
+            elif record.get("op") == "usage":
+                self._add_usage(record["source_lang"], record["target_lang"], record["source"],
+                                record["hits"], record["last_used"])
+
+    def _convert_json(self):
+        """Write the snapshot from a JSON TM in the same directory, if any"""
+        if not os.path.exists(os.path.join(self.tm_dir, "translation_memory.json")):
+            return
+        legacy = JSONStorage(self.tm_dir)
+        try:
+            write_snapshot(self.snapshot_path, (
+                (src_lang, tgt_lang,
+                 ((source, TMRecord.from_entry(entry))
+                  for _, _, source, entry in legacy.iter_entries(src_lang, tgt_lang)))
+                for src_lang, tgt_lang in legacy.language_pairs()
+            ))
+        finally:
+            legacy.close()
+
+    def _snapshot_pair(self, source_lang: str, target_lang: str):
+        return self.snapshot.pair(source_lang, target_lang) if self.snapshot else None
+
+    def _store(self, source_lang: str, target_lang: str, source_text: str,
+               record: Optional[TMRecord]):
+        key = (source_lang, target_lang)
+        overlay = self._overlay.setdefault(key, {})
+        if source_text not in overlay:
+            pair = self._snapshot_pair(source_lang, target_lang)
+            if pair is None or pair.find(source_text) < 0:
+                self._added.setdefault(key, []).append(source_text)
+        overlay[source_text] = record
+
+    def _is_deleted(self, source_lang: str, target_lang: str, source_text: str) -> bool:
+        overlay = self._overlay.get((source_lang, target_lang), {})
+        return source_text in overlay and overlay[source_text] is None
+
+    def get(self, source_lang: str, target_lang: str, source_text: str) -> Optional[dict]:
+        overlay = self._overlay.get((source_lang, target_lang), {})
+        if source_text in overlay:
+            record = overlay[source_text]
+            return record.to_entry() if record is not None else None
+        pair = self._snapshot_pair(source_lang, target_lang)
+        index = pair.find(source_text) if pair else -1
+        return pair.record(index).to_entry() if index >= 0 else None
+
+    def put_many(self, entries: Iterable[StoredEntry]):
+        with self._lock:
+            records = []
+            for source_lang, target_lang, source_text, entry in entries:
+                self._store(source_lang, target_lang, source_text, TMRecord.from_entry(entry))
+                records.append({
+                    "op": "add",
+                    "source_lang": source_lang,
+                    "target_lang": target_lang,
+                    "source": source_text,
+                    "entry": entry
+                })
+            self.journal.append_many(records)
+            self._compact_if_due()
+
+    def delete_many(self, keys: Iterable[Tuple[str, str, str]]) -> int:
+        with self._lock:
+            records = []
+            for source_lang, target_lang, source_text in keys:
+                if self.get(source_lang, target_lang, source_text) is None:
+                    continue
+                self._store(source_lang, target_lang, source_text, None)
+                records.append({"op": "delete", "source_lang": source_lang,
+                                "target_lang": target_lang, "source": source_text})
+            self.journal.append_many(records)
+            return len(records)
+
+    def _add_usage(self, source_lang: str, target_lang: str, source_text: str,
+                   hits: int, last_used: str) -> bool:
+        entry = self.get(source_lang, target_lang, source_text)
+        if entry is None:
+            return False
+        self._store(source_lang, target_lang, source_text,
+                    TMRecord.from_entry(_with_usage(entry, hits, last_used)))
+        return True
+
+    def add_usage(self, updates: Iterable[UsageUpdate]) -> int:
+        with self._lock:
+            records = [{"op": "usage", "source_lang": source_lang, "target_lang": target_lang,
+                        "source": source_text, "hits": hits, "last_used": last_used}
+                       for source_lang, target_lang, source_text, hits, last_used in updates
+                       if self._add_usage(source_lang, target_lang, source_text, hits, last_used)]
+            self.journal.append_many(records)
+            return len(records)
+
+    def _iter_pair(self, source_lang: str, target_lang: str) -> Iterator[Tuple[str, TMRecord]]:
+        """Current (source, record) items of a pair in insertion order"""
+        overlay = self._overlay.get((source_lang, target_lang), {})
+        pair = self._snapshot_pair(source_lang, target_lang)
+        if pair is not None:
+            for index in range(pair.count):
+                source = pair.source(index)
+                if source not in overlay:
+                    yield source, pair.record(index)
+                elif overlay[source] is not None:
+                    yield source, overlay[source]
+        for source in list(self._added.get((source_lang, target_lang), [])):
+            if overlay[source] is not None:
+                yield source, overlay[source]
+
+    def iter_entries(self, source_lang: str = None, target_lang: str = None,
+                     modified_since: str = None) -> Iterator[StoredEntry]:
+        for src_lang, tgt_lang in self.language_pairs():
+            if (source_lang and src_lang != source_lang) or (target_lang and tgt_lang != target_lang):
+                continue
+            for source, record in self._iter_pair(src_lang, tgt_lang):
+                if modified_since and (record.timestamp or "") <= modified_since:
+                    continue
+                yield src_lang, tgt_lang, source, record.to_entry()
+
+    def iter_sources(self, source_lang: str, target_lang: str,
+                     after: int = 0) -> Iterator[Tuple[int, str]]:
+        pair = self._snapshot_pair(source_lang, target_lang)
+        stored = pair.count if pair else 0
+        # Deleted sources keep their position until the next compaction
+        for position in range(after, stored):
+            source = pair.source(position)
+            if not self._is_deleted(source_lang, target_lang, source):
+                yield position + 1, source
+        added = self._added.get((source_lang, target_lang), [])
+        for position in range(max(after - stored, 0), len(added)):
+            if not self._is_deleted(source_lang, target_lang, added[position]):
+                yield stored + position + 1, added[position]
+
+    def language_pairs(self) -> List[Tuple[str, str]]:
+        pairs = self.snapshot.language_pairs() if self.snapshot else []
+        return pairs + [pair for pair in list(self._added) if pair not in pairs]
+
+    def count(self, source_lang: str = None, target_lang: str = None) -> int:
+        total = 0
+        for src_lang, tgt_lang in self.language_pairs():
+            if (source_lang and src_lang != source_lang) or (target_lang and tgt_lang != target_lang):
+                continue
+            stored = self.snapshot.count(src_lang, tgt_lang) if self.snapshot else 0
+            deleted = sum(1 for record in self._overlay.get((src_lang, tgt_lang), {}).values()
+                          if record is None)
+            total += stored + len(self._added.get((src_lang, tgt_lang), [])) - deleted
+        return total
+
+    def _compact_if_due(self):
+        with self._lock:
+            if not self._bulk_depth and self.journal.records >= self.COMPACT_EVERY:
+                self.compact()
+
+    def flush(self):
+        self.journal.commit()
+
+    def compact(self):
+        """Fold the overlay into a new snapshot and remap it"""
+        with self._lock:
+            self.journal.commit()
+            write_snapshot(self.snapshot_path, (
+                (src_lang, tgt_lang, self._iter_pair(src_lang, tgt_lang))
+                for src_lang, tgt_lang in self.language_pairs()
+            ))
+            deleted = any(record is None for overlay in self._overlay.values()
+                          for record in overlay.values())
+            # Readers may still hold views of the old mapping; it is
+            # released once they are gone
+            self.snapshot = Snapshot(self.snapshot_path)
+            self._overlay = {}
+            self._added = {}
+            self.journal.reset()
+            if deleted:
+                # Deleted entries are gone from the new snapshot; positions shift
+                self.epoch += 1
+
+    def close(self):
+        self.journal.close()
+        if self.snapshot is not None:
+            self.snapshot.close()
+        self._lock_file.close()
+
+
+def _entry_columns(entry: dict) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+    """Split an entry into (target, context, timestamp, meta JSON) columns"""
+    extra = {key: value for key, value in entry.items()
+             if key not in ("text", "context", "timestamp")}
+    meta = json.dumps(extra, ensure_ascii=False) if extra else None
+    return entry["text"], entry.get("context"), entry.get("timestamp"), meta
+
+
+def _entry_from_row(target: str, context: Optional[str], timestamp: Optional[str],
+                    meta: Optional[str]) -> dict:
+    entry = {"text": target, "context": context, "timestamp": timestamp}
+    if meta:
+        entry.update(json.loads(meta))
+    return entry
+
+
+class SQLiteStorage(TMStorage):
+    """SQLite database in WAL mode, shareable by several worker processes.
+
+    Lookups go through a unique index on (source_lang, target_lang,
+    source_hash), so nothing but the rows asked for is read into memory.
+    Each thread gets its own connection; WAL lets readers proceed while
+    one writer commits.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tm_entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            source_hash TEXT NOT NULL,
+            source TEXT NOT NULL,
+            target TEXT NOT NULL,
+            context TEXT,
+            timestamp TEXT,
+            meta TEXT
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS tm_entries_lookup
+            ON tm_entries (source_lang, target_lang, source_hash);
+        CREATE INDEX IF NOT EXISTS tm_entries_timestamp ON tm_entries (timestamp);
+        CREATE TABLE IF NOT EXISTS tm_epoch (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            epoch INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO tm_epoch (id, epoch) VALUES (0, 0);
+    """
+
+    def __init__(self, path: str = "app/data/tm/translation_memory.sqlite3",
+                 busy_timeout: float = 30.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def get(self, source_lang: str, target_lang: str, source_text: str) -> Optional[dict]:
+        row = self._connection().execute(
+            "SELECT target, context, timestamp, meta FROM tm_entries "
+            "WHERE source_lang = ? AND target_lang = ? AND source_hash = ?",
+            (source_lang, target_lang, source_hash(source_text))
+        ).fetchone()
+        return _entry_from_row(*row) if row else None
+
+    def put_many(self, entries: Iterable[StoredEntry]):
+        rows = [(source_lang, target_lang, source_hash(source_text), source_text)
+                + _entry_columns(entry)
+                for source_lang, target_lang, source_text, entry in entries]
+        if not rows:
+            return
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT INTO tm_entries "
+                "(source_lang, target_lang, source_hash, source, target, context, timestamp, meta) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source_lang, target_lang, source_hash) DO UPDATE SET "
+                "target = excluded.target, context = excluded.context, "
+                "timestamp = excluded.timestamp, meta = excluded.meta",
+                rows
+            )
+
+    def delete_many(self, keys: Iterable[Tuple[str, str, str]]) -> int:
+        rows = [(source_lang, target_lang, source_hash(source_text))
+                for source_lang, target_lang, source_text in keys]
+        if not rows:
+            return 0
+        connection = self._connection()
+        with connection:
+            before = connection.total_changes
+            connection.executemany(
+                "DELETE FROM tm_entries "
+                "WHERE source_lang = ? AND target_lang = ? AND source_hash = ?",
+                rows
+            )
+            deleted = connection.total_changes - before
+            if deleted:
+                # Other processes' indexes still hold the deleted sources
+                connection.execute("UPDATE tm_epoch SET epoch = epoch + 1")
+            return deleted
+
+    @property
+    def epoch(self) -> int:
+        return self._connection().execute("SELECT epoch FROM tm_epoch").fetchone()[0]
+
+    def add_usage(self, updates: Iterable[UsageUpdate]) -> int:
+        rows = [(hits, last_used, source_lang, target_lang, source_hash(source_text))
+                for source_lang, target_lang, source_text, hits, last_used in updates]
+        if not rows:
+            return 0
+        connection = self._connection()
+        with connection:
+            before = connection.total_changes
+            # Usage lives in the meta JSON; the row is updated in place
+            connection.executemany(
+                "UPDATE tm_entries SET meta = json_set(COALESCE(meta, '{}'), "
+                "'$.hits', COALESCE(json_extract(meta, '$.hits'), 0) + ?, "
+                "'$.last_used', max(COALESCE(json_extract(meta, '$.last_used'), ''), ?)) "
+                "WHERE source_lang = ? AND target_lang = ? AND source_hash = ?",
+                rows
+            )
+            return connection.total_changes - before
+
+    def iter_entries(self, source_lang: str = None, target_lang: str = None,
+                     modified_since: str = None) -> Iterator[StoredEntry]:
+        conditions, params = [], []
+        for column, value in (("source_lang", source_lang), ("target_lang", target_lang)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if modified_since:
+            conditions.append("timestamp > ?")
+            params.append(modified_since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        cursor = self._connection().execute(
+            "SELECT source_lang, target_lang, source, target, context, timestamp, meta "
+            f"FROM tm_entries {where} ORDER BY id", params
+        )
+        for src_lang, tgt_lang, source, *columns in cursor:
+            yield src_lang, tgt_lang, source, _entry_from_row(*columns)
+
+    def iter_sources(self, source_lang: str, target_lang: str,
+                     after: int = 0) -> Iterator[Tuple[int, str]]:
+        yield from self._connection().execute(
+            "SELECT id, source FROM tm_entries "
+            "WHERE id > ? AND source_lang = ? AND target_lang = ? ORDER BY id",
+            (after, source_lang, target_lang)
+        )
+
+    def language_pairs(self) -> List[Tuple[str, str]]:
+        return [tuple(row) for row in self._connection().execute(
+            "SELECT DISTINCT source_lang, target_lang FROM tm_entries"
+        )]
+
+    def count(self, source_lang: str = None, target_lang: str = None) -> int:
+        conditions, params = [], []
+        for column, value in (("source_lang", source_lang), ("target_lang", target_lang)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM tm_entries {where}", params
+        ).fetchone()[0]
+
+    def compact(self):
+        """Checkpoint the WAL into the main database file"""
+        self._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+class PostgresStorage(TMStorage):
+    """PostgreSQL table behind a thread-safe connection pool.
+
+    Ids come from a sequence, so a transaction committing after a later
+    one can be missed by ``iter_sources`` cursors; exact lookups are not
+    affected, and rebuilding the TM's indexes picks such rows up.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tm_entries (
+            id BIGSERIAL PRIMARY KEY,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            source_hash TEXT NOT NULL,
+            source TEXT NOT NULL,
+            target TEXT NOT NULL,
+            context TEXT,
+            timestamp TEXT,
+            meta TEXT
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS tm_entries_lookup
+            ON tm_entries (source_lang, target_lang, source_hash);
+        CREATE INDEX IF NOT EXISTS tm_entries_timestamp ON tm_entries (timestamp);
+        CREATE TABLE IF NOT EXISTS tm_epoch (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            epoch BIGINT NOT NULL
+        );
+        INSERT INTO tm_epoch (id, epoch) VALUES (0, 0) ON CONFLICT (id) DO NOTHING;
+    """
+
+    def __init__(self, dsn: str, min_connections: int = 1, max_connections: int = 10):
+        # Imported here so the other backends work without the driver installed
+        from psycopg2.extras import execute_values
+        from psycopg2.pool import ThreadedConnectionPool
+
+        self.dsn = dsn
+        self._execute_values = execute_values
+        self.pool = ThreadedConnectionPool(min_connections, max_connections, dsn)
+        with self._cursor() as cursor:
+            cursor.execute(self.SCHEMA)
+
+    class _PooledCursor:
+        """Borrow a pooled connection for one transaction"""
+
+        def __init__(self, pool, name: str = None):
+            self.pool = pool
+            self.name = name
+
+        def __enter__(self):
+            self.connection = self.pool.getconn()
+            self.cursor = self.connection.cursor(name=self.name)
+            return self.cursor
+
+        def __exit__(self, exc_type, exc, traceback):
+            try:
+                self.cursor.close()
+                if exc_type is None:
+                    self.connection.commit()
+                else:
+                    self.connection.rollback()
+            finally:
+                self.pool.putconn(self.connection)
+
+    def _cursor(self, name: str = None) -> "PostgresStorage._PooledCursor":
+        return self._PooledCursor(self.pool, name)
+
+    def get(self, source_lang: str, target_lang: str, source_text: str) -> Optional[dict]:
+        with self._cursor() as cursor:
+            cursor.execute(
+                "SELECT target, context, timestamp, meta FROM tm_entries "
+                "WHERE source_lang = %s AND target_lang = %s AND source_hash = %s",
+                (source_lang, target_lang, source_hash(source_text))
+            )
+            row = cursor.fetchone()
+        return _entry_from_row(*row) if row else None
+
+    def put_many(self, entries: Iterable[StoredEntry]):
+        rows = [(source_lang, target_lang, source_hash(source_text), source_text)
+                + _entry_columns(entry)
+                for source_lang, target_lang, source_text, entry in entries]
+        if not rows:
+            return
+        with self._cursor() as cursor:
+            self._execute_values(
+                cursor,
+                "INSERT INTO tm_entries "
+                "(source_lang, target_lang, source_hash, source, target, context, timestamp, meta) "
+                "VALUES %s "
+                "ON CONFLICT (source_lang, target_lang, source_hash) DO UPDATE SET "
+                "target = EXCLUDED.target, context = EXCLUDED.context, "
+                "timestamp = EXCLUDED.timestamp, meta = EXCLUDED.meta",
+                rows, page_size=1000
+            )
+
+    def delete_many(self, keys: Iterable[Tuple[str, str, str]]) -> int:
+        rows = [(source_lang, target_lang, source_hash(source_text))
+                for source_lang, target_lang, source_text in keys]
+        if not rows:
+            return 0
+        with self._cursor() as cursor:
+            self._execute_values(
+                cursor,
+                "DELETE FROM tm_entries USING (VALUES %s) AS doomed (source_lang, target_lang, source_hash) "
+                "WHERE tm_entries.source_lang = doomed.source_lang "
+                "AND tm_entries.target_lang = doomed.target_lang "
+                "AND tm_entries.source_hash = doomed.source_hash",
+                rows, page_size=len(rows)
+            )
+            deleted = cursor.rowcount
+            if deleted:
+                # Other processes' indexes still hold the deleted sources
+                cursor.execute("UPDATE tm_epoch SET epoch = epoch + 1")
+            return deleted
+
+    @property
+    def epoch(self) -> int:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT epoch FROM tm_epoch")
+            return cursor.fetchone()[0]
+
+    def add_usage(self, updates: Iterable[UsageUpdate]) -> int:
+        rows = [(source_lang, target_lang, source_hash(source_text), hits, last_used)
+                for source_lang, target_lang, source_text, hits, last_used in updates]
+        if not rows:
+            return 0
+        with self._cursor() as cursor:
+            # Usage lives in the meta JSON; the row is updated in place
+            self._execute_values(
+                cursor,
+                "UPDATE tm_entries SET meta = (COALESCE(meta, '{}')::jsonb || jsonb_build_object("
+                "'hits', COALESCE((meta::jsonb ->> 'hits')::bigint, 0) + used.hits, "
+                "'last_used', GREATEST(COALESCE(meta::jsonb ->> 'last_used', ''), used.last_used)"
+                "))::text "
+                "FROM (VALUES %s) AS used (source_lang, target_lang, source_hash, hits, last_used) "
+                "WHERE tm_entries.source_lang = used.source_lang "
+                "AND tm_entries.target_lang = used.target_lang "
+                "AND tm_entries.source_hash = used.source_hash",
+                rows, page_size=len(rows)
+            )
+            return cursor.rowcount
+
+    def iter_entries(self, source_lang: str = None, target_lang: str = None,
+                     modified_since: str = None) -> Iterator[StoredEntry]:
+        conditions, params = [], []
+        for column, value in (("source_lang", source_lang), ("target_lang", target_lang)):
+            if value:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        if modified_since:
+            conditions.append("timestamp > %s")
+            params.append(modified_since)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        # A named (server-side) cursor streams rows instead of fetching them all
+        with self._cursor(name="tm_iter_entries") as cursor:
+            cursor.itersize = 5000
+            cursor.execute(
+                "SELECT source_lang, target_lang, source, target, context, timestamp, meta "
+                f"FROM tm_entries {where} ORDER BY id", params
+            )
+            for src_lang, tgt_lang, source, *columns in cursor:
+                yield src_lang, tgt_lang, source, _entry_from_row(*columns)
+
+    def iter_sources(self, source_lang: str, target_lang: str,
+                     after: int = 0) -> Iterator[Tuple[int, str]]:
+        with self._cursor(name="tm_iter_sources") as cursor:
+            cursor.itersize = 5000
+            cursor.execute(
+                "SELECT id, source FROM tm_entries "
+                "WHERE id > %s AND source_lang = %s AND target_lang = %s ORDER BY id",
+                (after, source_lang, target_lang)
+            )
+            yield from cursor
+
+    def language_pairs(self) -> List[Tuple[str, str]]:
+        with self._cursor() as cursor:
+            cursor.execute("SELECT DISTINCT source_lang, target_lang FROM tm_entries")
+            return [tuple(row) for row in cursor.fetchall()]
+
+    def count(self, source_lang: str = None, target_lang: str = None) -> int:
+        conditions, params = [], []
+        for column, value in (("source_lang", source_lang), ("target_lang", target_lang)):
+            if value:
+                conditions.append(f"{column} = %s")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM tm_entries {where}", params)
+            return cursor.fetchone()[0]
+
+    def close(self):
+        self.pool.closeall()
+
+
+def open_storage(url: str = None) -> TMStorage:
+    """Open a storage backend from a URL.
+
+    ``snapshot:<directory>``, ``json:<directory>``, ``sqlite:<path>`` or
+    ``postgresql://...``; a bare path is treated as a snapshot TM directory.
+    Defaults to the ``TM_STORAGE_URL`` environment variable, then
+    ``snapshot:app/data/tm``.
+    """
+    url = url or os.getenv("TM_STORAGE_URL") or "snapshot:app/data/tm"
+    if url.startswith(("postgresql://", "postgres://")):
+        return PostgresStorage(url)
+    if url.startswith("sqlite:"):
+        return SQLiteStorage(url[len("sqlite:"):])
+    if url.startswith("json:"):
+        return JSONStorage(url[len("json:"):])
+    if url.startswith("snapshot:"):
+        return SnapshotStorage(url[len("snapshot:"):])
+    return SnapshotStorage(url)
+
+
+def migrate(source_url: str, target_url: str, batch_size: int = 5000) -> int:
+    """Copy every entry from one storage backend to another"""
+    source = open_storage(source_url)
+    target = open_storage(target_url)
+    copied = 0
+    batch = []
+    try:
+        with target.bulk():
+            for item in source.iter_entries():
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    target.put_many(batch)
+                    copied += len(batch)
+                    batch = []
+            target.put_many(batch)
+            copied += len(batch)
+        target.flush()
+        target.compact()
+    finally:
+        source.close()
+        target.close()
+    return copied
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Translation memory storage tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser(
+        "migrate", help="Copy a TM between backends, e.g. json:app/data/tm "
+                        "sqlite:app/data/tm/translation_memory.sqlite3"
+    )
+    migrate_parser.add_argument("source", help="Storage URL to read from")
+    migrate_parser.add_argument("target", help="Storage URL to write to")
+    migrate_parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    if args.command == "migrate":
+        copied = migrate(args.source, args.target, args.batch_size)
+        print(f"Migrated {copied} entries from {args.source} to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import itertools
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from .normalizer import normalize_text
+from .tm_storage import open_storage
+from .translation_memory import TranslationMemory
+
+# How a TU whose source is already in the TM, with another translation, is merged
+CONFLICT_POLICIES = ("newest", "keep_existing", "keep_both")
+
+_WHITESPACE = re.compile(r"\s+")
+
+# (source_lang, target_lang, source_text, target_text, content hash, date)
+IngestUnit = Tuple[str, str, str, str, str, str]
+
+
+def content_hash(source_lang: str, target_lang: str, source_text: str, target_text: str) -> str:
+    """Hash of a translation unit's content; whitespace runs do not count"""
+    parts = [source_lang, target_lang,
+             _WHITESPACE.sub(" ", normalize_text(source_text)),
+             _WHITESPACE.sub(" ", normalize_text(target_text))]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def _tmx_date(value: Optional[str]) -> Optional[str]:
+    """ISO form of a TMX date (YYYYMMDDThhmmssZ), None if missing or invalid"""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value.rstrip("Z"), "%Y%m%dT%H%M%S").isoformat()
+    except ValueError:
+        return None
+
+
+def collect_tmx_files(paths: Iterable[str]) -> List[str]:
+    """TMX files named, or found (recursively) in the directories named"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if name.lower().endswith(".tmx"))
+        else:
+            files.append(path)
+    # The same file named twice is imported once
+    return list(dict.fromkeys(files))
+
+
+def parse_tmx_file(path: str) -> dict:
+    """Parse, normalize and hash the units of one TMX file (run in a worker).
+
+    Segments are normalized as ``TranslationMemory.import_tmx`` stores
+    them, so both import paths agree on keys.  Units without a date of
+    their own get the file's modification time.  Units repeated within the
+    file are dropped here.  A file that cannot be parsed yields no units
+    and an ``error``.
+    """
+    result = {"path": path, "units": [], "processed": 0, "skipped": 0, "duplicates": 0,
+              "error": None}
+    try:
+        file_date = datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+        seen = set()
+        units: List[IngestUnit] = []
+        for source_lang, target_lang, source_text, target_text, date in \
+                TranslationMemory._iter_tmx_units(path, {}, dates=True):
+            result["processed"] += 1
+            if not (source_text and target_text and source_lang and target_lang):
+                result["skipped"] += 1
+                continue
+            unit_hash = content_hash(source_lang, target_lang, source_text, target_text)
+            if unit_hash in seen:
+                result["duplicates"] += 1
+                continue
+            seen.add(unit_hash)
+            units.append((source_lang, target_lang, source_text, target_text, unit_hash,
+                          _tmx_date(date) or file_date))
+        result["units"] = units
+    except (ET.ParseError, OSError) as e:
+        result["error"] = str(e)
+    return result
+
+
+def _entry_hashes(source_lang: str, target_lang: str, source_text: str, entry: dict) -> set:
+    """Content hashes of a stored entry's translation and its alternatives"""
+    texts = [entry["text"]] + [alternative["text"] for alternative in entry.get("alternatives", [])]
+    return {content_hash(source_lang, target_lang, source_text, text) for text in texts}
+
+
+def ingest_tmx(tm: TranslationMemory, paths: Iterable[str], policy: str = "newest",
+               workers: int = None, batch_size: int = 5000,
+               progress_callback: Callable[[dict], None] = None) -> dict:
+    """Import many TMX files (or directories of them) into the memory.
+
+    Files are parsed in parallel worker processes; the parent merges their
+    units in file order.  A unit whose content hash matches the stored
+    translation of its source (or one of its alternatives) is skipped, so
+    re-importing the same files writes nothing.  Other conflicts follow
+    ``policy``:
+
+    - ``newest``: the translation with the later TMX changedate (or file
+      date) wins; stored entries are dated by their changedate, else by
+      when they were written
+    - ``keep_existing``: the first translation seen (stored, then in file
+      order) is kept
+    - ``keep_both``: the first translation stays in use and later ones
+      are kept in the entry's ``alternatives``
+
+    Entries are written after each file (and every ``batch_size`` entries
+    within a large one) and marked as TMX imports; the storage is
+    compacted at most once, after the ingest.  ``progress_callback``
+    receives the running counts after each file; the same counts are
+    returned, with parse errors per file.
+    """
+    if policy not in CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy: {policy}")
+    files = collect_tmx_files(paths)
+    stats = {"files": len(files), "files_done": 0, "processed": 0, "imported": 0,
+             "replaced": 0, "alternatives": 0, "kept_existing": 0, "duplicates": 0,
+             "skipped": 0, "failed": {}, "progress": 0.0}
+    timestamp = datetime.now().isoformat()
+    # Entries to write, by (source_lang, target_lang, source_text)
+    pending: Dict[Tuple[str, str, str], dict] = {}
+
+    def write_pending():
+        if pending:
+            tm.storage.put_many((key + (entry,)) for key, entry in pending.items())
+            pending.clear()
+
+    def merge(unit: IngestUnit):
+        source_lang, target_lang, source_text, target_text, unit_hash, date = unit
+        key = (source_lang, target_lang, source_text)
+        incoming = {"text": target_text, "context": None, "timestamp": timestamp,
+                    "origin": "tmx", "changedate": date}
+        entry = pending.get(key)
+        if entry is None:
+            entry = tm.storage.get(*key)
+        if entry is None:
+            pending[key] = incoming
+            stats["imported"] += 1
+            return
+        if unit_hash in _entry_hashes(source_lang, target_lang, source_text, entry):
+            stats["duplicates"] += 1
+            return
+
+        if policy == "newest" and date > (entry.get("changedate") or entry.get("timestamp") or ""):
+            pending[key] = incoming
+            stats["replaced"] += 1
+        elif policy == "keep_both":
+            alternative = {name: incoming[name] for name in ("text", "changedate", "timestamp")}
+            pending[key] = dict(entry, alternatives=entry.get("alternatives", []) + [alternative])
+            stats["alternatives"] += 1
+        else:
+            stats["kept_existing"] += 1
+
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    with tm.storage.bulk():
+        for result in _parse_files(files, workers):
+            stats["files_done"] += 1
+            stats["processed"] += result["processed"]
+            stats["skipped"] += result["skipped"]
+            stats["duplicates"] += result["duplicates"]
+            if result["error"]:
+                stats["failed"][result["path"]] = result["error"]
+            for unit in result["units"]:
+                merge(unit)
+                if len(pending) >= batch_size:
+                    write_pending()
+            # Each file's entries are stored before the next file is merged
+            write_pending()
+            tm.storage.flush()
+            stats["progress"] = stats["files_done"] / len(files)
+            if progress_callback:
+                progress_callback(dict(stats, failed=dict(stats["failed"])))
+    stats["progress"] = 1.0
+    return stats
+
+
+def _parse_files(files: List[str], workers: int) -> Iterator[dict]:
+    """``parse_tmx_file`` results in file order, parsed by ``workers`` processes.
+
+    At most two files per worker are submitted ahead of the one being
+    merged, so parsed units never pile up in the parent however many
+    files there are.
+    """
+    if workers <= 1:
+        yield from map(parse_tmx_file, files)
+        return
+    # Spawned workers stay safe when the parent runs threads (Streamlit, uvicorn)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        queued = iter(files)
+        running = deque(pool.submit(parse_tmx_file, path)
+                        for path in itertools.islice(queued, 2 * workers))
+        try:
+            while running:
+                result = running.popleft().result()
+                for path in itertools.islice(queued, 1):
+                    running.append(pool.submit(parse_tmx_file, path))
+                yield result
+        finally:
+            # An abandoned ingest does not wait for files it no longer needs
+            for future in running:
+                future.cancel()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Import TMX files into the translation memory")
+    parser.add_argument("paths", nargs="+", help="TMX files or directories of them")
+    parser.add_argument("--storage", default=None,
+                        help="TM storage URL (default: TM_STORAGE_URL or snapshot:app/data/tm)")
+    parser.add_argument("--policy", choices=CONFLICT_POLICIES, default="newest",
+                        help="How to merge a different translation of a stored source")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Parser processes (default: one per CPU)")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    storage = open_storage(args.storage)
+    try:
+        tm = TranslationMemory(storage=storage)
+        stats = ingest_tmx(tm, args.paths, args.policy, args.workers, args.batch_size,
+                           progress_callback=lambda s: print(
+                               f"{s['files_done']}/{s['files']} files, "
+                               f"{s['imported']} imported", flush=True))
+    finally:
+        storage.close()
+    print(f"{stats['imported']} imported, {stats['replaced']} replaced, "
+          f"{stats['alternatives']} kept as alternatives, {stats['kept_existing']} conflicts "
+          f"kept the existing translation, {stats['duplicates']} duplicates and "
+          f"{stats['skipped']} incomplete units skipped")
+    for path, error in stats["failed"].items():
+        print(f"Failed to parse {path}: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,123 +1,481 @@
 import xml.etree.ElementTree as ET
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 import os
-import json
+import re
+import threading
 from datetime import datetime
-import difflib
+from xml.sax.saxutils import escape, quoteattr
+from .fuzzy_index import FuzzyIndex
+from .normalizer import normalize_segment, normalize_text, restore_tokens
+from .tm_storage import SnapshotStorage, TMStorage
+
+XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+
+# Java-style \uXXXX escapes, as found in TMX files generated from .properties
+_UNICODE_ESCAPE = re.compile(r"(?:\\u[0-9a-fA-F]{4})+")
+
+
+def unescape_unicode(text: str) -> str:
+    """Decode literal \\uXXXX escapes (including surrogate pairs) in text"""
+    if "\\u" not in text:
+        return text
+
+    def decode(match):
+        units = match.group(0).split("\\u")[1:]
+        raw = b"".join(int(unit, 16).to_bytes(2, "big") for unit in units)
+        return raw.decode("utf-16-be", errors="replace")
+
+    return _UNICODE_ESCAPE.sub(decode, text)
+
 
 class TranslationMemory:
-    def __init__(self, tm_dir: str = "app/data/tm"):
+    # Pending usage counts are written to storage once this many entries were used
+    USAGE_FLUSH_EVERY = 256
+    # lookup_many fuzzy-matches at least this many misses with find_matches
+    BATCH_FUZZY_MIN = 32
+
+    def __init__(self, tm_dir: str = "app/data/tm", storage: TMStorage = None):
         self.tm_dir = tm_dir
-        self.memory: Dict[str, Dict[str, dict]] = {}
+        # Binary snapshot + journal in tm_dir unless another backend is given
+        self.storage = storage or SnapshotStorage(tm_dir)
+        self._lock = threading.RLock()
+        # (source_lang, target_lang, source) -> [hits, last used] not yet stored
+        self._usage: Dict[Tuple[str, str, str], list] = {}
         self.initialize_tm()
 
     def initialize_tm(self):
-        """Initialize translation memory from stored files"""
-        os.makedirs(self.tm_dir, exist_ok=True)
-        
-        # Load JSON TM if exists
-        json_path = os.path.join(self.tm_dir, "translation_memory.json")
-        if os.path.exists(json_path):
-            with open(json_path, 'r', encoding='utf-8') as f:
-                self.memory = json.load(f)
+        """Reset the in-process lookup indexes; they are rebuilt from storage on use"""
+        self._fuzzy_indexes: Dict[Tuple[str, str], FuzzyIndex] = {}
+        # Normalized key -> stored source, per language pair
+        self._normalized_indexes: Dict[Tuple[str, str], Dict[str, str]] = {}
+        # How far each pair's indexes have read storage.iter_sources
+        self._index_cursors: Dict[Tuple[str, str], int] = {}
+        # N-gram vector indexes for batch matching, built on first find_matches
+        self._vector_indexes: Dict[Tuple[str, str], "NgramVectorIndex"] = {}
+        self._vector_cursors: Dict[Tuple[str, str], int] = {}
+        self._epoch = self.storage.epoch
+
+    def _check_epoch(self):
+        """Rebuild indexes whose storage cursors were invalidated (caller holds the lock)"""
+        if self._epoch != self.storage.epoch:
+            self.initialize_tm()
 
     def save_tm(self):
-        """Save translation memory to JSON file"""
-        json_path = os.path.join(self.tm_dir, "translation_memory.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(self.memory, f, ensure_ascii=False, indent=2)
-
-    def import_tmx(self, tmx_file: str):
-        """Import translations from TMX file"""
-        tree = ET.parse(tmx_file)
-        root = tree.getroot()
-        
-        for tu in root.findall(".//tu"):
-            source_lang = None
-            target_lang = None
-            source_text = None
-            target_text = None
-            
-            for tuv in tu.findall("tuv"):
-                lang = tuv.get("{http://www.w3.org/XML/1998/namespace}lang")
-                seg = tuv.find("seg")
-                
-                if seg is not None:
-                    if source_lang is None:
-                        source_lang = lang
-                        source_text = seg.text
-                    else:
-                        target_lang = lang
-                        target_text = seg.text
-            
-            if source_text and target_text and source_lang and target_lang:
-                self.add_translation(
-                    source_text,
-                    target_text,
-                    source_lang,
-                    target_lang
-                )
-
-    def export_tmx(self, output_file: str):
-        """Export translations to TMX file"""
-        root = ET.Element("tmx", version="1.4")
-        header = ET.SubElement(root, "header", 
-                             creationdate=datetime.now().strftime("%Y%m%dT%H%M%S"),
-                             srclang="en-IN")
-        body = ET.SubElement(root, "body")
-
-        for src_lang, translations in self.memory.items():
-            for tgt_lang, pairs in translations.items():
-                for source, target in pairs.items():
-                    tu = ET.SubElement(body, "tu")
-                    
-                    # Source
-                    tuv_src = ET.SubElement(tu, "tuv", {"xml:lang": src_lang})
-                    seg_src = ET.SubElement(tuv_src, "seg")
-                    seg_src.text = source
-                    
-                    # Target
-                    tuv_tgt = ET.SubElement(tu, "tuv", {"xml:lang": tgt_lang})
-                    seg_tgt = ET.SubElement(tuv_tgt, "seg")
-                    seg_tgt.text = target["text"]
-
-        tree = ET.ElementTree(root)
-        tree.write(output_file, encoding="utf-8", xml_declaration=True)
+        """Compact the storage (fold the journal into the snapshot)"""
+        self.flush_usage()
+        self.storage.compact()
+
+    def flush(self):
+        """Make every translation added so far durable"""
+        self.flush_usage()
+        self.storage.flush()
+
+    def _record_use(self, source_lang: str, target_lang: str, source_text: str):
+        """Count a lookup served by a stored entry"""
+        with self._lock:
+            usage = self._usage.setdefault((source_lang, target_lang, source_text), [0, None])
+            usage[0] += 1
+            usage[1] = datetime.now().isoformat()
+            pending = len(self._usage)
+        if pending >= self.USAGE_FLUSH_EVERY:
+            self.flush_usage()
+
+    def flush_usage(self) -> int:
+        """Add pending hit counts and last-used times to the stored entries.
+
+        Usage is buffered in memory and written in batches, so counts of
+        the last batch are lost if the process dies without flushing.  Only
+        the usage fields of entries that still exist are updated.
+        """
+        with self._lock:
+            usage, self._usage = self._usage, {}
+        return self.storage.add_usage(
+            (source_lang, target_lang, source_text, hits, last_used)
+            for (source_lang, target_lang, source_text), (hits, last_used) in usage.items()
+        )
+
+    def delete_translations(self, keys: Iterable[Tuple[str, str, str]]) -> int:
+        """Delete (source_lang, target_lang, source_text) entries"""
+        keys = list(keys)
+        with self._lock:
+            for key in keys:
+                self._usage.pop(key, None)
+            deleted = self.storage.delete_many(keys)
+            # Deleted sources must not be offered by the lookup indexes
+            self.initialize_tm()
+        self.storage.flush()
+        return deleted
+
+    def import_tmx(self, tmx_file: str, progress_callback: Callable[[dict], None] = None,
+                   batch_size: int = 5000) -> dict:
+        """Stream translations from a TMX file into the memory.
+
+        The file is parsed incrementally and every processed ``<tu>`` is
+        cleared, so memory use does not depend on the file size.  Entries
+        are inserted in batches of ``batch_size`` with one storage commit per
+        batch, and the storage is compacted at most once, after the import.
+        ``progress_callback`` receives the running counts after each batch;
+        the same counts are returned at the end.
+        """
+        stats = {"processed": 0, "imported": 0, "skipped": 0, "duplicates": 0,
+                 "progress": 0.0}
+        batch = []
+
+        def commit_batch():
+            # Imported entries are marked so retention policies can pin them
+            self.add_translations(batch, origin="tmx")
+            batch.clear()
+            if progress_callback:
+                progress_callback(dict(stats))
+
+        with self.storage.bulk():
+            for unit in self._iter_tmx_units(tmx_file, stats):
+                stats["processed"] += 1
+                source_lang, target_lang, source_text, target_text = unit
+                if not (source_text and target_text and source_lang and target_lang):
+                    stats["skipped"] += 1
+                    continue
+
+                existing = self.storage.get(source_lang, target_lang, source_text)
+                if existing is not None and existing["text"] == target_text:
+                    stats["duplicates"] += 1
+                    continue
+
+                batch.append(unit)
+                stats["imported"] += 1
+                if len(batch) >= batch_size:
+                    commit_batch()
+
+            stats["progress"] = 1.0
+            commit_batch()
+        return stats
+
+    @staticmethod
+    def _iter_tmx_units(tmx_file, stats: dict, dates: bool = False) -> Iterator[tuple]:
+        """Yield (source_lang, target_lang, source_text, target_text) per <tu>.
+
+        Segments are normalized with ``normalize_text``, so both TMX import
+        paths store a source under the same key.
+        With ``dates`` the unit's changedate (or creationdate) attribute is
+        yielded as a fifth item, None if it has neither.
+        ``stats["progress"]`` is kept up to date with the fraction of the
+        input consumed, when the input size can be determined.
+        """
+        own_file = isinstance(tmx_file, str)
+        f = open(tmx_file, 'rb') if own_file else tmx_file
+        try:
+            total_size = None
+            if hasattr(f, "seek") and hasattr(f, "tell"):
+                start = f.tell()
+                f.seek(0, os.SEEK_END)
+                total_size = f.tell() - start
+                f.seek(start)
+
+            body = None
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if elem.tag == "body":
+                        body = elem
+                    continue
+                if elem.tag != "tu":
+                    continue
+
+                source_lang = None
+                target_lang = None
+                source_text = None
+                target_text = None
+
+                for tuv in elem.findall("tuv"):
+                    lang = tuv.get(XML_LANG) or tuv.get("lang")
+                    seg = tuv.find("seg")
+
+                    if seg is not None:
+                        text = normalize_text(unescape_unicode("".join(seg.itertext())))
+                        if source_lang is None:
+                            source_lang = lang
+                            source_text = text
+                        else:
+                            target_lang = lang
+                            target_text = text
+
+                date = elem.get("changedate") or elem.get("creationdate")
+                # Drop the processed unit so the tree never grows
+                elem.clear()
+                if body is not None:
+                    body.clear()
+                if total_size:
+                    stats["progress"] = min(f.tell() / total_size, 1.0)
+                if dates:
+                    yield source_lang, target_lang, source_text, target_text, date
+                else:
+                    yield source_lang, target_lang, source_text, target_text
+        finally:
+            if own_file:
+                f.close()
+
+    def export_tmx(self, output_file, source_lang: str = None, target_lang: str = None,
+                   modified_since: datetime = None) -> int:
+        """Stream translations to a TMX file path or binary file-like object.
+
+        Returns the number of translation units written.
+        """
+        own_file = isinstance(output_file, str)
+        f = open(output_file, 'wb') if own_file else output_file
+        counter = {"units": 0}
+        try:
+            for chunk in self.iter_tmx(source_lang, target_lang, modified_since, counter):
+                f.write(chunk)
+        finally:
+            if own_file:
+                f.close()
+        return counter["units"]
+
+    def iter_tmx(self, source_lang: str = None, target_lang: str = None,
+                 modified_since: datetime = None, counter: dict = None,
+                 units_per_chunk: int = 1000) -> Iterator[bytes]:
+        """Yield a TMX document as UTF-8 chunks of ``units_per_chunk`` units.
+
+        Only pairs matching ``source_lang``/``target_lang`` are exported when
+        given, and only entries stored after ``modified_since`` when given.
+        """
+        header_srclang = source_lang or "en-IN"
+        yield (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<tmx version="1.4">\n'
+            f'  <header creationdate="{datetime.now().strftime("%Y%m%dT%H%M%S")}" '
+            f'srclang={quoteattr(header_srclang)} segtype="sentence" '
+            'datatype="plaintext" adminlang="en-us" o-tmf="json" '
+            'creationtool="translation-agent" creationtoolversion="1.0"/>\n'
+            '  <body>\n'
+        ).encode("utf-8")
+
+        since = modified_since.isoformat() if modified_since else None
+        chunk = []
+        for src_lang, tgt_lang, source, entry in self.storage.iter_entries(
+                source_lang, target_lang, since):
+            chunk.append(self._format_tu(source, entry, src_lang, tgt_lang))
+            if counter is not None:
+                counter["units"] = counter.get("units", 0) + 1
+            if len(chunk) >= units_per_chunk:
+                yield "".join(chunk).encode("utf-8")
+                chunk = []
+
+        chunk.append("  </body>\n</tmx>\n")
+        yield "".join(chunk).encode("utf-8")
+
+    @staticmethod
+    def _format_tu(source: str, entry: dict, src_lang: str, tgt_lang: str) -> str:
+        """Serialize one translation unit as TMX"""
+        attributes = ""
+        if entry.get("timestamp"):
+            changedate = datetime.fromisoformat(entry["timestamp"]).strftime("%Y%m%dT%H%M%SZ")
+            attributes = f' changedate="{changedate}"'
+        return (
+            f"    <tu{attributes}>\n"
+            f"      <tuv xml:lang={quoteattr(src_lang)}><seg>{escape(source)}</seg></tuv>\n"
+            f"      <tuv xml:lang={quoteattr(tgt_lang)}><seg>{escape(entry['text'])}</seg></tuv>\n"
+            "    </tu>\n"
+        )
 
     def add_translation(self, source_text: str, target_text: str, 
                        source_lang: str, target_lang: str, context: str = None):
         """Add a translation pair to the memory"""
-        if source_lang not in self.memory:
-            self.memory[source_lang] = {}
-        
-        if target_lang not in self.memory[source_lang]:
-            self.memory[source_lang][target_lang] = {}
-        
-        self.memory[source_lang][target_lang][source_text] = {
+        entry = {
             "text": target_text,
             "context": context,
             "timestamp": datetime.now().isoformat()
         }
-        self.save_tm()
+        self.storage.put_many([(source_lang, target_lang, source_text, entry)])
+
+    def add_translations(self, translations: Iterable[Tuple[str, str, str, str]],
+                         context: str = None, origin: str = None):
+        """Add many (source_lang, target_lang, source_text, target_text) pairs
+        with a single storage commit"""
+        timestamp = datetime.now().isoformat()
+        extra = {"origin": origin} if origin else {}
+        self.storage.put_many(
+            (source_lang, target_lang, source_text,
+             dict({"text": target_text, "context": context, "timestamp": timestamp}, **extra))
+            for source_lang, target_lang, source_text, target_text in translations
+        )
+        self.storage.flush()
+
+    def _sync_indexes(self, source_lang: str, target_lang: str):
+        """Bring a pair's fuzzy and normalized indexes up to date with storage.
+
+        Indexes are built on first use and then only read sources added
+        since the last sync, including those written by other processes
+        sharing the same storage.  Callers hold ``self._lock``.
+        """
+        self._check_epoch()
+        key = (source_lang, target_lang)
+        fuzzy = self._fuzzy_indexes.setdefault(key, FuzzyIndex())
+        normalized = self._normalized_indexes.setdefault(key, {})
+        cursor = self._index_cursors.get(key, 0)
+        for cursor, source in self.storage.iter_sources(source_lang, target_lang, cursor):
+            fuzzy.add(source)
+            normalized.setdefault(normalize_segment(source)[0], source)
+        self._index_cursors[key] = cursor
 
     def find_match(self, source_text: str, source_lang: str, 
                   target_lang: str, threshold: float = 0.8) -> Optional[Tuple[str, float]]:
         """Find the best matching translation from memory"""
-        if source_lang not in self.memory or target_lang not in self.memory[source_lang]:
+        match = self._fuzzy_match(source_text, source_lang, target_lang, threshold)
+        return match[1:] if match else None
+
+    def _fuzzy_match(self, source_text: str, source_lang: str, target_lang: str,
+                     threshold: float) -> Optional[Tuple[str, str, float]]:
+        """(stored_source, translation, ratio) of the best fuzzy match.
+
+        A query whose bigrams are too common for the bigram index to narrow
+        down (see ``FuzzyIndex.selective``) is matched with the n-gram vector
+        index of ``find_matches`` instead, when numpy and scipy are installed.
+        """
+        with self._lock:
+            self._sync_indexes(source_lang, target_lang)
+            index = self._fuzzy_indexes[(source_lang, target_lang)]
+            selective = index.selective(source_text, threshold)
+        if not selective:
+            try:
+                found = self.find_matches([source_text], source_lang, target_lang, threshold,
+                                          candidates=index.MAX_CANDIDATES)
+            except ImportError:
+                pass
+            else:
+                return found[0][0] if found[0] else None
+
+        with self._lock:
+            match = index.search(source_text, threshold)
+        if match is None:
             return None
 
-        best_match = None
-        best_ratio = 0
+        stored_source, best_ratio = match
+        entry = self.storage.get(source_lang, target_lang, stored_source)
+        best_match = entry["text"] if entry else None
+        return (stored_source, best_match, best_ratio) if best_match else None
+
+    def find_matches(self, segments: List[str], source_lang: str, target_lang: str,
+                     threshold: float = 0.8, top_k: int = 1,
+                     candidates: int = 50) -> List[List[Tuple[str, str, float]]]:
+        """Find the best fuzzy matches of many segments in one pass.
+
+        All segments are scored against the pair's sources at once with
+        sparse n-gram vectors; the ``candidates`` most similar sources of
+        each segment are then re-ranked with the same ratio as
+        ``find_match``.  Returns, per segment, up to ``top_k``
+        (stored_source, translation, score) tuples, best first.
+        """
+        # numpy/scipy are only needed for batch matching
+        from .vector_index import NgramVectorIndex
+
+        key = (source_lang, target_lang)
+        with self._lock:
+            self._check_epoch()
+            index = self._vector_indexes.setdefault(key, NgramVectorIndex())
+            cursor = self._vector_cursors.get(key, 0)
+            for cursor, source in self.storage.iter_sources(source_lang, target_lang, cursor):
+                index.add(source)
+            self._vector_cursors[key] = cursor
+            found = index.search_many(segments, threshold, top_k, candidates)
+
+        results = []
+        for matches in found:
+            resolved = []
+            for stored_source, score in matches:
+                entry = self.storage.get(source_lang, target_lang, stored_source)
+                if entry and entry["text"]:
+                    resolved.append((stored_source, entry["text"], score))
+            results.append(resolved)
+        return results
+
+    def find_normalized(self, source_text: str, source_lang: str,
+                        target_lang: str) -> Optional[str]:
+        """Find a stored segment that differs only in numbers, placeholders,
+        URLs, emails, whitespace or case, and adapt its translation"""
+        match = self._normalized_match(source_text, source_lang, target_lang)
+        return match[1] if match else None
+
+    def _normalized_match(self, source_text: str, source_lang: str,
+                          target_lang: str) -> Optional[Tuple[str, str]]:
+        """(stored_source, adapted translation) of a normalized match"""
+        key, tokens = normalize_segment(source_text)
+        with self._lock:
+            self._sync_indexes(source_lang, target_lang)
+            stored_source = self._normalized_indexes[(source_lang, target_lang)].get(key)
+        if stored_source is None:
+            return None
+
+        entry = self.storage.get(source_lang, target_lang, stored_source)
+        if not entry or not entry["text"]:
+            return None
+        translation = restore_tokens(entry["text"], normalize_segment(stored_source)[1], tokens)
+        return (stored_source, translation) if translation else None
+
+    def get_exact(self, source_text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        """Return the stored translation of exactly this source text"""
+        entry = self.storage.get(source_lang, target_lang, source_text)
+        return entry["text"] if entry else None
+
+    def lookup(self, source_text: str, source_lang: str, target_lang: str,
+               threshold: float = 0.8) -> Optional[Tuple[str, float, str]]:
+        """Find a translation trying exact, then normalized, then fuzzy matches.
+
+        Returns (translation, score, match_type) where match_type is
+        "exact", "normalized" or "fuzzy".  The stored entry that served the
+        lookup has its hit count and last-used time updated.
+        """
+        translation = self.get_exact(source_text, source_lang, target_lang)
+        if translation:
+            self._record_use(source_lang, target_lang, source_text)
+            return translation, 1.0, "exact"
+
+        match = self._normalized_match(source_text, source_lang, target_lang)
+        if match:
+            self._record_use(source_lang, target_lang, match[0])
+            return match[1], 1.0, "normalized"
+
+        match = self._fuzzy_match(source_text, source_lang, target_lang, threshold)
+        if match:
+            self._record_use(source_lang, target_lang, match[0])
+            return match[1], match[2], "fuzzy"
+        return None
+
+    def lookup_many(self, segments: List[str], source_lang: str, target_lang: str,
+                    threshold: float = 0.8) -> List[Optional[Tuple[str, float, str]]]:
+        """``lookup`` for many segments, with one fuzzy pass over the misses.
 
-        for stored_source, translation in self.memory[source_lang][target_lang].items():
-            ratio = difflib.SequenceMatcher(None, source_text.lower(), 
-                                          stored_source.lower()).ratio()
-            
-            if ratio > threshold and ratio > best_ratio:
-                best_ratio = ratio
-                best_match = translation["text"]
+        Exact and normalized matches are tried per segment.  When at least
+        ``BATCH_FUZZY_MIN`` segments are left, they are fuzzy-matched
+        together with ``find_matches``, whose n-gram prefilter can miss a
+        match ``lookup`` would find; fewer are matched one by one.
+        """
+        results: List[Optional[Tuple[str, float, str]]] = [None] * len(segments)
+        misses = []
+        for position, source_text in enumerate(segments):
+            translation = self.get_exact(source_text, source_lang, target_lang)
+            if translation:
+                self._record_use(source_lang, target_lang, source_text)
+                results[position] = (translation, 1.0, "exact")
+                continue
+            match = self._normalized_match(source_text, source_lang, target_lang)
+            if match:
+                self._record_use(source_lang, target_lang, match[0])
+                results[position] = (match[1], 1.0, "normalized")
+            else:
+                misses.append(position)
 
-        return (best_match, best_ratio) if best_match else None
+        if len(misses) >= self.BATCH_FUZZY_MIN:
+            found = self.find_matches([segments[position] for position in misses],
+                                      source_lang, target_lang, threshold)
+            matches = [best[0] if best else None for best in found]
+        else:
+            matches = [self._fuzzy_match(segments[position], source_lang, target_lang, threshold)
+                       for position in misses]
+        for position, match in zip(misses, matches):
+            if match:
+                self._record_use(source_lang, target_lang, match[0])
+                results[position] = (match[1], match[2], "fuzzy")
+        return results
 
     def get_statistics(self) -> dict:
         """Get statistics about the translation memory"""
@@ -128,12 +486,11 @@ class TranslationMemory:
             "target_languages": set()
         }
         
-        for src_lang, translations in self.memory.items():
+        for src_lang, tgt_lang in self.storage.language_pairs():
             stats["source_languages"].add(src_lang)
-            for tgt_lang, pairs in translations.items():
-                stats["target_languages"].add(tgt_lang)
-                stats["total_pairs"] += len(pairs)
-                stats["language_pairs"].append(f"{src_lang}->{tgt_lang}")
+            stats["target_languages"].add(tgt_lang)
+            stats["total_pairs"] += self.storage.count(src_lang, tgt_lang)
+            stats["language_pairs"].append(f"{src_lang}->{tgt_lang}")
         
         stats["source_languages"] = list(stats["source_languages"])
         stats["target_languages"] = list(stats["target_languages"])
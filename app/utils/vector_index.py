@@ -0,0 +1,200 @@
+import difflib
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+
+
+class NgramVectorIndex:
+    """Sparse TF-IDF character n-gram vectors of one language pair's sources.
+
+    ``search_many`` scores a whole batch of queries against every stored
+    source with one sparse matrix product (cosine similarity), keeps the
+    best ``candidates`` per query and re-ranks those with the same
+    ``SequenceMatcher`` ratio as ``FuzzyIndex``.  The cosine step is a
+    prefilter, so a match outside a query's candidate set can be missed;
+    raise ``candidates`` to trade speed for recall.
+    """
+
+    NGRAM_SIZE = 3
+    # Hashed feature space; collisions only blur the prefilter
+    FEATURES = 1 << 20
+    # Queries multiplied against the matrix at once, and the cap on
+    # queries x sources per product that bounds its memory use
+    QUERY_CHUNK = 256
+    CHUNK_CELLS = 1 << 24
+    # Character count buckets behind the vectorized upper bound of the ratio
+    CHAR_BUCKETS = 1024
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+        self._sources: List[str] = []
+        self._lowered: List[str] = []
+        self._indices = array("i")
+        self._counts = array("f")
+        self._indptr = array("q", [0])
+        self._lengths = array("i")
+        self._char_indices = array("i")
+        self._char_counts = array("H")
+        self._char_indptr = array("q", [0])
+        self._matrix_t: Optional[sparse.csr_matrix] = None
+        self._chars: Optional[sparse.csr_matrix] = None
+        self._idf: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    @classmethod
+    def _features(cls, lowered: str) -> Counter:
+        """Hashed n-gram counts of lowercased text, padded to mark word edges"""
+        padded = f" {lowered} "
+        size = cls.NGRAM_SIZE
+        grams = [padded[i:i + size] for i in range(max(len(padded) - size + 1, 1))]
+        return Counter(hash(gram) & (cls.FEATURES - 1) for gram in grams)
+
+    def add(self, source: str):
+        """Index a stored source (no-op if it is already indexed)"""
+        if source in self._ids:
+            return
+        lowered = source.lower()
+        self._ids[source] = len(self._sources)
+        self._sources.append(source)
+        self._lowered.append(lowered)
+        features = self._features(lowered)
+        for feature in sorted(features):
+            self._indices.append(feature)
+            self._counts.append(features[feature])
+        self._indptr.append(len(self._indices))
+        self._lengths.append(len(lowered))
+        characters = self._char_features(lowered)
+        for bucket in sorted(characters):
+            self._char_indices.append(bucket)
+            self._char_counts.append(min(characters[bucket], 0xFFFF))
+        self._char_indptr.append(len(self._char_indices))
+        self._matrix_t = None
+
+    @classmethod
+    def _char_features(cls, lowered: str) -> Counter:
+        return Counter(ord(char) % cls.CHAR_BUCKETS for char in lowered)
+
+    def _weigh(self, matrix: sparse.csr_matrix) -> sparse.csr_matrix:
+        """Apply IDF weights and scale rows to unit length, in place"""
+        matrix.data *= self._idf[matrix.indices]
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        norms = np.sqrt(np.bincount(rows, weights=matrix.data ** 2, minlength=matrix.shape[0]))
+        norms[norms == 0] = 1.0
+        matrix.data /= norms[rows].astype(np.float32)
+        return matrix
+
+    def _build(self):
+        """(Re)build the weighted source matrix after additions"""
+        indices = np.frombuffer(self._indices, dtype=np.int32)
+        counts = np.frombuffer(self._counts, dtype=np.float32)
+        indptr = np.frombuffer(self._indptr, dtype=np.int64)
+        matrix = sparse.csr_matrix((counts, indices, indptr),
+                                   shape=(len(self._sources), self.FEATURES), copy=True)
+        document_frequency = np.bincount(indices, minlength=self.FEATURES)
+        self._idf = (np.log((len(self._sources) + 1) / (document_frequency + 1)) + 1)
+        self._idf = self._idf.astype(np.float32)
+        self._matrix_t = self._weigh(matrix).T.tocsr()
+        self._chars = sparse.csr_matrix(
+            (np.frombuffer(self._char_counts, dtype=np.uint16).astype(np.int32),
+             np.frombuffer(self._char_indices, dtype=np.int32).copy(),
+             np.frombuffer(self._char_indptr, dtype=np.int64).copy()),
+            shape=(len(self._sources), self.CHAR_BUCKETS)
+        )
+
+    def _vectorize(self, lowered: Sequence[str]) -> sparse.csr_matrix:
+        rows, cols, counts = [], [], []
+        for row, text in enumerate(lowered):
+            for feature, count in self._features(text).items():
+                rows.append(row)
+                cols.append(feature)
+                counts.append(count)
+        matrix = sparse.csr_matrix((np.asarray(counts, dtype=np.float32), (rows, cols)),
+                                   shape=(len(lowered), self.FEATURES))
+        return self._weigh(matrix)
+
+    def _upper_bounds(self, chunk: Sequence[str], owners: np.ndarray,
+                      ids: np.ndarray) -> np.ndarray:
+        """Upper bounds of the ratio of each (query, candidate) pair.
+
+        The length bound and difflib's ``quick_ratio`` (shared character
+        counts, over buckets, which can only overestimate), computed for
+        the candidates of a whole query chunk at once.
+        """
+        query_lengths = np.array([len(query) for query in chunk], dtype=np.int64)[owners]
+        lengths = np.frombuffer(self._lengths, dtype=np.int32)[ids]
+        query_chars = np.zeros((len(chunk), self.CHAR_BUCKETS), dtype=np.int32)
+        for row, query in enumerate(chunk):
+            for bucket, count in self._char_features(query).items():
+                query_chars[row, bucket] = count
+        chars = self._chars[ids]
+        rows = np.repeat(np.arange(len(ids)), np.diff(chars.indptr))
+        shared = np.minimum(chars.data, query_chars[owners[rows], chars.indices])
+        shared = np.bincount(rows, weights=shared, minlength=len(ids))
+        total = np.maximum(lengths + query_lengths, 1)
+        return 2.0 * np.minimum(shared, np.minimum(lengths, query_lengths)) / total
+
+    def _rerank(self, query: str, ids: np.ndarray, bound: np.ndarray, threshold: float,
+                top_k: int) -> List[Tuple[str, float]]:
+        """Exact SequenceMatcher ratios of candidate sources, best first.
+
+        Candidates are visited by decreasing upper bound, stopping as soon
+        as no remaining candidate can enter the top k.
+        """
+        # Same argument order as FuzzyIndex: the ratio is not symmetric
+        matcher = difflib.SequenceMatcher(None, query, "")
+        scored: List[Tuple[float, int]] = []
+        for position in np.argsort(-bound, kind="stable").tolist():
+            # Score a candidate must reach to enter the top k
+            full = len(scored) >= top_k
+            floor = scored[-1][0] if full else threshold
+            if bound[position] <= threshold or (full and bound[position] < floor):
+                break
+            entry_id = int(ids[position])
+            matcher.set_seq2(self._lowered[entry_id])
+            ratio = matcher.ratio()
+            if ratio > threshold and ratio >= floor:
+                scored.append((ratio, entry_id))
+                # Best first, earliest stored source on ties
+                scored.sort(key=lambda item: (-item[0], item[1]))
+                del scored[top_k:]
+        return [(self._sources[entry_id], ratio) for ratio, entry_id in scored]
+
+    def search_many(self, queries: Sequence[str], threshold: float = 0.8, top_k: int = 1,
+                    candidates: int = 50) -> List[List[Tuple[str, float]]]:
+        """Return up to top_k (source, ratio) matches above threshold for
+        every query, best first"""
+        results: List[List[Tuple[str, float]]] = [[] for _ in queries]
+        if not self._sources or not queries or top_k < 1:
+            return results
+        if self._matrix_t is None:
+            self._build()
+        candidates = max(candidates, top_k)
+        lowered = [query.lower() for query in queries]
+        chunk_size = max(1, min(self.QUERY_CHUNK, self.CHUNK_CELLS // len(self._sources)))
+
+        for start in range(0, len(queries), chunk_size):
+            chunk = lowered[start:start + chunk_size]
+            scores = (self._vectorize(chunk) @ self._matrix_t).tocsr()
+            # Keep the most similar candidates of every query
+            selected = []
+            for row in range(len(chunk)):
+                begin, end = scores.indptr[row], scores.indptr[row + 1]
+                ids = scores.indices[begin:end]
+                if len(ids) > candidates:
+                    ids = ids[np.argpartition(-scores.data[begin:end], candidates - 1)[:candidates]]
+                selected.append(ids)
+            sizes = np.array([len(ids) for ids in selected])
+            owners = np.repeat(np.arange(len(chunk)), sizes)
+            ids = np.concatenate(selected)
+            bounds = self._upper_bounds(chunk, owners, ids)
+            offsets = np.concatenate(([0], np.cumsum(sizes)))
+            for row, query in enumerate(chunk):
+                begin, end = offsets[row], offsets[row + 1]
+                if end > begin:
+                    results[start + row] = self._rerank(query, ids[begin:end], bounds[begin:end],
+                                                        threshold, top_k)
+        return results
@@ -0,0 +1,3 @@
+"""
+Offline micro-benchmarks of the TM, glossary and TMX paths
+"""
@@ -0,0 +1,104 @@
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+# (metric, path into a result, True if larger is better)
+METRICS = (
+    ("p50_ms", ("latency_ms", "p50"), False),
+    ("p90_ms", ("latency_ms", "p90"), False),
+    ("p99_ms", ("latency_ms", "p99"), False),
+    ("throughput", ("throughput_per_s",), True),
+    ("peak_rss_mb", ("peak_rss_mb",), False),
+)
+# Latency changes below this are timer noise, whatever their ratio
+MIN_LATENCY_DELTA_MS = 0.05
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _metric(result: dict, path: Tuple[str, ...]):
+    value = result
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.2,
+            memory_tolerance: float = 0.2) -> List[dict]:
+    """Compare the cases two runs have in common.
+
+    Returns one row per (operation, size, metric) with the relative change
+    and a status of "regression", "improvement" or "ok": a latency or
+    memory metric regresses when it grows by more than its tolerance, and
+    throughput when it drops by more than ``tolerance``.
+    """
+    cases: Dict[Tuple[str, int], dict] = {
+        (result["operation"], result["size"]): result for result in baseline["results"]
+    }
+    rows = []
+    for result in current["results"]:
+        base = cases.get((result["operation"], result["size"]))
+        if base is None:
+            continue
+        for name, path, higher_is_better in METRICS:
+            old, new = _metric(base, path), _metric(result, path)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            limit = memory_tolerance if name == "peak_rss_mb" else tolerance
+            worse = -change if higher_is_better else change
+            status = "ok"
+            if name.endswith("_ms") and abs(new - old) < MIN_LATENCY_DELTA_MS:
+                pass
+            elif worse > limit:
+                status = "regression"
+            elif worse < -limit:
+                status = "improvement"
+            rows.append({
+                "operation": result["operation"],
+                "size": result["size"],
+                "metric": name,
+                "baseline": old,
+                "current": new,
+                "change": change,
+                "status": status
+            })
+    return rows
+
+
+def format_rows(rows: List[dict]) -> str:
+    lines = [f"{'operation':<16} {'size':>9} {'metric':<12} {'baseline':>12} "
+             f"{'current':>12} {'change':>8}  status"]
+    for row in rows:
+        lines.append(
+            f"{row['operation']:<16} {row['size']:>9} {row['metric']:<12} "
+            f"{row['baseline']:>12.3f} {row['current']:>12.3f} {row['change']:>+8.1%}  "
+            f"{row['status']}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Flag regressions between two benchmark runs")
+    parser.add_argument("baseline", help="Results JSON of the reference run")
+    parser.add_argument("current", help="Results JSON of the run to check")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown of latency and throughput (default 0.2)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2,
+                        help="Allowed relative growth of peak memory (default 0.2)")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.current),
+                   args.tolerance, args.memory_tolerance)
+    print(format_rows(rows))
+    regressions = [row for row in rows if row["status"] == "regression"]
+    print(f"\n{len(regressions)} regression(s) in {len(rows)} comparisons")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
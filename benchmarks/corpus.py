@@ -0,0 +1,202 @@
+import os
+import random
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import Dict, Iterator, List, Tuple
+from xml.sax.saxutils import escape
+from app.utils.properties import PropertiesFile
+from app.utils.tm_snapshot import TMRecord, write_snapshot
+from app.utils.translation_memory import XML_LANG, unescape_unicode
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_LANG = "en"
+# Bump when the generator changes, so cached fixtures are rebuilt
+CORPUS_VERSION = 1
+
+# Syllables of the made-up word that makes every synthetic segment unique
+_SYLLABLES = ["ka", "lo", "mi", "ra", "tu", "ne", "so", "vi",
+              "da", "pe", "gu", "ha", "jo", "ri", "ba", "ze"]
+
+Seeds = Dict[Tuple[str, str], List[Tuple[str, str]]]
+Segment = Tuple[str, str, str, str]
+
+
+def _tmx_seeds(path: str) -> Iterator[Tuple[str, str, str, str]]:
+    for tu in ET.parse(path).getroot().iter("tu"):
+        segments = []
+        for tuv in tu.findall("tuv"):
+            seg = tuv.find("seg")
+            if seg is not None:
+                segments.append((tuv.get(XML_LANG) or tuv.get("lang"),
+                                 unescape_unicode("".join(seg.itertext()).strip())))
+        if len(segments) == 2:
+            (source_lang, source), (target_lang, target) = segments
+            yield source_lang, target_lang, source, target
+
+
+def _bundle_seeds(root: str) -> Iterator[Tuple[str, str, str, str]]:
+    source = PropertiesFile.load(os.path.join(root, f"MessageResources_{SOURCE_LANG}.properties"))
+    for name in sorted(os.listdir(root)):
+        stem, extension = os.path.splitext(name)
+        if extension != ".properties" or not stem.startswith("MessageResources_"):
+            continue
+        target_lang = stem[len("MessageResources_"):]
+        if target_lang == SOURCE_LANG:
+            continue
+        target = PropertiesFile.load(os.path.join(root, name))
+        for key, value in source.values.items():
+            if target.values.get(key):
+                yield SOURCE_LANG, target_lang, value, target.values[key]
+
+
+def load_seeds(root: str = REPO_ROOT) -> Seeds:
+    """Unique (source, target) seed pairs per language pair from the bundled
+    tm_en_*.tmx files and MessageResources_*.properties bundles"""
+    seeds: Seeds = {}
+    seen = set()
+    units = []
+    for name in sorted(os.listdir(root)):
+        if name.startswith("tm_") and name.endswith(".tmx"):
+            units.extend(_tmx_seeds(os.path.join(root, name)))
+    units.extend(_bundle_seeds(root))
+    for source_lang, target_lang, source, target in units:
+        key = (source_lang, target_lang, source)
+        if source and target and key not in seen:
+            seen.add(key)
+            seeds.setdefault((source_lang, target_lang), []).append((source, target))
+    return seeds
+
+
+def unique_word(index: int) -> str:
+    """A pronounceable word that no other index maps to"""
+    syllables = []
+    while True:
+        index, digit = divmod(index, len(_SYLLABLES))
+        syllables.append(_SYLLABLES[digit])
+        if not index:
+            return "".join(syllables)
+
+
+class SyntheticCorpus:
+    """Translation segments scaled up from the seed pairs.
+
+    Segment ``i`` joins one to three seed sentences of a language pair
+    (chosen in proportion to the seeds) and a word unique to ``i``, in the
+    source and the target alike.  Segments are generated from their index,
+    so corpora of any size agree on their common prefix and any segment
+    can be recreated without generating the ones before it.
+    """
+
+    def __init__(self, seeds: Seeds = None, seed: int = 42):
+        self.seeds = seeds or load_seeds()
+        self.seed = seed
+        self.pairs = sorted(self.seeds)
+        self._weights = [len(self.seeds[pair]) for pair in self.pairs]
+
+    def segment(self, index: int) -> Segment:
+        """(source_lang, target_lang, source, target) of segment ``index``"""
+        rng = random.Random((self.seed << 32) | index)
+        pair = rng.choices(self.pairs, self._weights)[0]
+        parts = [rng.choice(self.seeds[pair]) for _ in range(rng.randint(1, 3))]
+        word = unique_word(index)
+        return (pair[0], pair[1],
+                " ".join(source for source, _ in parts) + f" ({word})",
+                " ".join(target for _, target in parts) + f" ({word})")
+
+    def segments(self, size: int, start: int = 0) -> Iterator[Segment]:
+        for index in range(start, start + size):
+            yield self.segment(index)
+
+    def pair_segments(self, size: int, pair: Tuple[str, str]) -> Iterator[Tuple[str, str]]:
+        for source_lang, target_lang, source, target in self.segments(size):
+            if (source_lang, target_lang) == pair:
+                yield source, target
+
+    def queries(self, size: int, count: int, pair: Tuple[str, str]) -> List[Tuple[str, str]]:
+        """``count`` (kind, text) lookups of a corpus of ``size`` segments,
+        in equal parts "exact" (a stored source), "fuzzy" (a stored source
+        with one word dropped) and "miss" (unrelated made-up words)"""
+        rng = random.Random(self.seed)
+        queries = []
+        while len(queries) < count:
+            kind = ("exact", "fuzzy", "miss")[len(queries) % 3]
+            if kind == "miss":
+                words = [unique_word(rng.randrange(1 << 40)) for _ in range(rng.randint(3, 8))]
+                queries.append((kind, " ".join(words)))
+                continue
+            source_lang, target_lang, source, _ = self.segment(rng.randrange(size))
+            if (source_lang, target_lang) != pair:
+                continue
+            if kind == "fuzzy":
+                words = source.split()
+                if len(words) > 2:
+                    del words[rng.randrange(len(words) - 1)]
+                else:
+                    words.append("now")
+                source = " ".join(words)
+            queries.append((kind, source))
+        return queries
+
+    def write_tm(self, tm_dir: str, size: int):
+        """Write the first ``size`` segments as a TM snapshot"""
+        os.makedirs(tm_dir, exist_ok=True)
+        timestamp = datetime(2024, 1, 1).isoformat()
+        write_snapshot(
+            os.path.join(tm_dir, "translation_memory.tmsnap"),
+            ((pair[0], pair[1],
+              ((source, TMRecord(target, None, timestamp))
+               for source, target in self.pair_segments(size, pair)))
+             for pair in self.pairs)
+        )
+
+    def write_tmx(self, path: str, size: int):
+        """Write the first ``size`` segments as a TMX file"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<tmx version="1.4">\n'
+                    f'  <header srclang="{SOURCE_LANG}" segtype="sentence" '
+                    'datatype="plaintext" adminlang="en-us" o-tmf="synthetic" '
+                    'creationtool="benchmarks" creationtoolversion="1.0"/>\n  <body>\n')
+            for source_lang, target_lang, source, target in self.segments(size):
+                f.write(f'    <tu>\n'
+                        f'      <tuv xml:lang="{source_lang}"><seg>{escape(source)}</seg></tuv>\n'
+                        f'      <tuv xml:lang="{target_lang}"><seg>{escape(target)}</seg></tuv>\n'
+                        f'    </tu>\n')
+            f.write("  </body>\n</tmx>\n")
+
+    def glossary_terms(self, count: int) -> Iterator[Tuple[str, str, str, str]]:
+        """``count`` (source_lang, target_lang, term, translation) glossary
+        entries: the seeds' short segments, then made-up terms"""
+        produced = 0
+        for (source_lang, target_lang), pairs in sorted(self.seeds.items()):
+            for source, target in pairs:
+                if produced < count and len(source.split()) <= 3:
+                    yield source_lang, target_lang, source, target
+                    produced += 1
+        index = 0
+        while produced < count:
+            source_lang, target_lang = self.pairs[index % len(self.pairs)]
+            word = unique_word(index)
+            yield source_lang, target_lang, f"{word} term", f"{word} shabd"
+            produced += 1
+            index += 1
+
+
+def fixture_dir(cache_dir: str, size: int, seed: int) -> str:
+    return os.path.join(cache_dir, f"v{CORPUS_VERSION}-seed{seed}-{size}")
+
+
+def build_fixtures(corpus: SyntheticCorpus, cache_dir: str, size: int) -> Dict[str, str]:
+    """Create (or reuse) the TM snapshot and TMX file of a corpus size.
+
+    Returns their paths; the TM directory is a template that benchmarks
+    copy before writing to it.
+    """
+    directory = fixture_dir(cache_dir, size, corpus.seed)
+    paths = {"tm_dir": os.path.join(directory, "tm"),
+             "tmx": os.path.join(directory, "corpus.tmx")}
+    if not os.path.exists(os.path.join(paths["tm_dir"], "translation_memory.tmsnap")):
+        corpus.write_tm(paths["tm_dir"], size)
+    if not os.path.exists(paths["tmx"]):
+        corpus.write_tmx(paths["tmx"] + ".tmp", size)
+        os.replace(paths["tmx"] + ".tmp", paths["tmx"])
+    return paths
@@ -0,0 +1,336 @@
+"""
+End-to-end load test of the translate flow against a local mock API.
+
+    python -m benchmarks.load_test --requests 2000 --concurrency 16 --repeat-rate 0.3
+
+starts ``benchmarks.mock_sarvam`` on a free port, builds the translation
+service on a fresh TM wired to it (or drives a running service with
+``--service-url``), replays a generated request mix and reports
+throughput, tail latency, TM hit ratio and upstream calls saved.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import requests
+from .corpus import REPO_ROOT, SyntheticCorpus
+from .run import latency_summary
+
+# translate(text, source_lang, target_lang) -> (translation, pipeline stats)
+Target = Callable[[str, str, str], Tuple[str, dict]]
+LoadRequest = Tuple[str, str, str]
+
+
+class Workload:
+    """A reproducible mix of translate requests.
+
+    A share ``repeat_rate`` of requests resends an earlier request
+    verbatim.  The others join a number of segments (1 plus an
+    exponentially distributed extra, averaging ``mean_segments`` and
+    capped at ``max_segments``); each segment is new (a seed sentence made
+    unique) with probability ``new_segment_rate`` and otherwise one of the
+    recurring seed sentences.  Language pairs are drawn by weight.
+    """
+
+    def __init__(self, corpus: SyntheticCorpus, pairs: List[Tuple[str, str, float]],
+                 repeat_rate: float = 0.3, new_segment_rate: float = 0.4,
+                 mean_segments: float = 2.5, max_segments: int = 20, seed: int = 42):
+        self.corpus = corpus
+        self.pairs = pairs
+        self.repeat_rate = repeat_rate
+        self.new_segment_rate = new_segment_rate
+        self.mean_segments = mean_segments
+        self.max_segments = max_segments
+        self.seed = seed
+        self._sources = {
+            (source_lang, target_lang): [source for source, _ in pairs]
+            for (source_lang, target_lang), pairs in corpus.seeds.items()
+        }
+        self._all_sources = [source for sources in self._sources.values() for source in sources]
+
+    def _seed_sources(self, source_lang: str, target_lang: str) -> List[str]:
+        # Seeds are keyed by bare codes ("en", "hi"); API codes are "en-IN"
+        key = (source_lang.split("-")[0], target_lang.split("-")[0])
+        return self._sources.get(key) or self._all_sources
+
+    @staticmethod
+    def _sentence(text: str) -> str:
+        """End a segment with punctuation so the segmenter keeps it apart"""
+        return text if text[-1:] in ".!?" else text + "."
+
+    def requests(self, count: int) -> List[LoadRequest]:
+        rng = random.Random(self.seed)
+        weights = [weight for _, _, weight in self.pairs]
+        history: List[LoadRequest] = []
+        next_segment = 0
+        for _ in range(count):
+            if history and rng.random() < self.repeat_rate:
+                history.append(rng.choice(history))
+                continue
+            source_lang, target_lang, _ = rng.choices(self.pairs, weights)[0]
+            extra = rng.expovariate(1 / (self.mean_segments - 1)) if self.mean_segments > 1 else 0
+            segments = []
+            for _ in range(min(self.max_segments, 1 + int(extra))):
+                if rng.random() < self.new_segment_rate:
+                    segments.append(self.corpus.segment(next_segment)[2])
+                    next_segment += 1
+                else:
+                    segments.append(rng.choice(self._seed_sources(source_lang, target_lang)))
+            history.append((" ".join(self._sentence(segment) for segment in segments),
+                            source_lang, target_lang))
+        return history
+
+
+def parse_pairs(values: List[str]) -> List[Tuple[str, str, float]]:
+    """["en-IN:hi-IN=0.7", ...] -> [("en-IN", "hi-IN", 0.7), ...]"""
+    pairs = []
+    for value in values:
+        pair, _, weight = value.partition("=")
+        source_lang, _, target_lang = pair.partition(":")
+        if not source_lang or not target_lang:
+            raise ValueError(f"Expected source:target[=weight], got {value!r}")
+        pairs.append((source_lang, target_lang, float(weight) if weight else 1.0))
+    return pairs
+
+
+def run_load(target: Target, load: List[LoadRequest], concurrency: int) -> dict:
+    """Send the requests from ``concurrency`` closed-loop workers"""
+    latencies: List[float] = []
+    totals: Dict[str, int] = {}
+    errors: Dict[str, int] = {}
+    lock = threading.Lock()
+    pending = iter(load)
+
+    def worker():
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                return
+            start = time.perf_counter()
+            try:
+                _, stats = target(*item)
+            except Exception as e:
+                with lock:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                for name, value in stats.items():
+                    totals[name] = totals.get(name, 0) + value
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    duration = time.perf_counter() - start
+    return {"duration_s": duration, "latencies": latencies, "stats": totals, "errors": errors}
+
+
+def summarize(load: List[LoadRequest], outcome: dict, max_chars: int,
+              upstream: Optional[dict] = None) -> dict:
+    stats = outcome["stats"]
+    duration = outcome["duration_s"]
+    segments = stats.get("segments", 0)
+    completed = len(outcome["latencies"])
+    # What a client without TM, cache or batching would send: every
+    # request on its own, split at the API input limit
+    naive_calls = sum(max(1, math.ceil(len(text) / max_chars)) for text, _, _ in load)
+    api_calls = stats.get("api_calls", 0)
+    return {
+        "requests": len(load),
+        "completed": completed,
+        "failed": sum(outcome["errors"].values()),
+        "errors": outcome["errors"],
+        "duration_s": duration,
+        "throughput_rps": completed / duration if duration else None,
+        "segments_per_s": segments / duration if duration else None,
+        "latency_ms": latency_summary(outcome["latencies"]),
+        "segments": segments,
+        "tm_hit_ratio": stats.get("tm_segments", 0) / segments if segments else None,
+        "cache_hit_ratio": stats.get("cache_hits", 0) / segments if segments else None,
+        "api_calls": api_calls,
+        "naive_api_calls": naive_calls,
+        "upstream_calls_saved": naive_calls - api_calls,
+        "upstream_saved_ratio": 1 - api_calls / naive_calls if naive_calls else None,
+        "upstream": upstream,
+        "stats": stats
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("Mock server exited during startup")
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Mock server not ready after {timeout}s")
+
+
+def start_mock(args) -> Tuple[subprocess.Popen, str]:
+    """Run benchmarks.mock_sarvam in a child process; returns it and its base URL"""
+    port = _free_port()
+    command = [sys.executable, "-m", "benchmarks.mock_sarvam", "--port", str(port),
+               "--latency-ms", str(args.mock_latency_ms),
+               "--jitter-ms", str(args.mock_jitter_ms),
+               "--per-char-ms", str(args.mock_per_char_ms),
+               "--error-rate", str(args.mock_error_rate),
+               "--max-chars", str(args.max_chars),
+               "--seed", str(args.seed)]
+    if args.mock_rate_limit:
+        command += ["--rate-limit", str(args.mock_rate_limit), "--burst", str(args.mock_burst)]
+    process = subprocess.Popen(command, cwd=REPO_ROOT)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        _wait_ready(f"{base_url}/health", process)
+    except Exception:
+        process.terminate()
+        raise
+    return process, base_url
+
+
+def _upstream_stats(base_url: Optional[str], reset: bool = False) -> Optional[dict]:
+    """Request counters of the mock server, if the endpoint is one"""
+    if not base_url:
+        return None
+    try:
+        if reset:
+            return requests.post(f"{base_url}/stats/reset", timeout=5).json()
+        return requests.get(f"{base_url}/stats", timeout=5).json()
+    except (requests.RequestException, ValueError):
+        return None
+
+
+def service_target(service_url: str, concurrency: int) -> Target:
+    """POST /translate of a running headless service"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    def translate(text: str, source_lang: str, target_lang: str) -> Tuple[str, dict]:
+        response = session.post(f"{service_url.rstrip('/')}/translate", timeout=120, json={
+            "text": text, "source_lang": source_lang, "target_lang": target_lang
+        })
+        response.raise_for_status()
+        body = response.json()
+        return body["translation"], body.get("stats", {})
+
+    return translate
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the translate flow offline")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight")
+    parser.add_argument("--pairs", nargs="+", default=["en-IN:hi-IN=0.7", "en-IN:ta-IN=0.3"],
+                        help="Language pairs with weights, as source:target=weight")
+    parser.add_argument("--repeat-rate", type=float, default=0.3,
+                        help="Share of requests repeating an earlier one verbatim")
+    parser.add_argument("--new-segment-rate", type=float, default=0.4,
+                        help="Share of segments never sent before")
+    parser.add_argument("--mean-segments", type=float, default=2.5,
+                        help="Average segments per request")
+    parser.add_argument("--max-segments", type=int, default=20)
+    parser.add_argument("--max-chars", type=int, default=1000, help="API input limit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--endpoint", default=None,
+                        help="Translate endpoint to use instead of starting the mock server "
+                             "(with --service-url, only read for the mock's counters)")
+    parser.add_argument("--service-url", default=None,
+                        help="Drive a running headless service (app/api.py) instead of an "
+                             "in-process pipeline; it must be configured with the endpoint")
+    parser.add_argument("--storage", default=None,
+                        help="TM storage URL for the in-process pipeline (default: empty TM)")
+    parser.add_argument("--mock-latency-ms", type=float, default=150.0)
+    parser.add_argument("--mock-jitter-ms", type=float, default=50.0)
+    parser.add_argument("--mock-per-char-ms", type=float, default=0.1)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-rate-limit", type=float, default=None)
+    parser.add_argument("--mock-burst", type=int, default=10)
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    load = Workload(SyntheticCorpus(seed=args.seed), parse_pairs(args.pairs), args.repeat_rate,
+                    args.new_segment_rate, args.mean_segments, args.max_segments,
+                    args.seed).requests(args.requests)
+
+    mock, mock_url = None, None
+    if args.endpoint is None and args.service_url is None:
+        mock, mock_url = start_mock(args)
+    elif args.endpoint and urlparse(args.endpoint).hostname in ("127.0.0.1", "localhost"):
+        # A local endpoint is taken to be a mock server and its counters read
+        mock_url = args.endpoint.rsplit("/", 1)[0]
+    service = None
+    workdir = tempfile.TemporaryDirectory(prefix="tm-load-")
+    try:
+        if args.service_url:
+            target = service_target(args.service_url, args.concurrency)
+        else:
+            from app.utils.service import TranslationService
+
+            os.environ["SARVAM_API_ENDPOINT"] = args.endpoint or f"{mock_url}/translate"
+            os.environ.setdefault("SARVAM_API_KEY", "load-test")
+            service = TranslationService(
+                storage_url=args.storage or f"snapshot:{os.path.join(workdir.name, 'tm')}",
+                glossary_dir=os.path.join(workdir.name, "glossaries")
+            )
+            target = service.pipeline.translate
+
+        _upstream_stats(mock_url, reset=True)
+        outcome = run_load(target, load, args.concurrency)
+        report = summarize(load, outcome, args.max_chars, _upstream_stats(mock_url))
+    finally:
+        if service is not None:
+            service.close()
+        if mock is not None:
+            mock.terminate()
+            mock.wait()
+        workdir.cleanup()
+
+    report["config"] = {name: value for name, value in vars(args).items() if name != "output"}
+    latency = report["latency_ms"]
+    print(f"{report['completed']}/{report['requests']} requests in {report['duration_s']:.1f} s "
+          f"({report['throughput_rps']:.1f} req/s, {report['segments_per_s']:.1f} segments/s), "
+          f"{report['failed']} failed")
+    if latency["p50"] is not None:
+        print(f"latency p50 {latency['p50']:.1f} ms, p90 {latency['p90']:.1f} ms, "
+              f"p99 {latency['p99']:.1f} ms, max {latency['max']:.1f} ms")
+    if report["tm_hit_ratio"] is not None:
+        print(f"TM hit ratio {report['tm_hit_ratio']:.1%}, "
+              f"result cache {report['cache_hit_ratio']:.1%} of {report['segments']} segments")
+    print(f"API calls {report['api_calls']} instead of {report['naive_api_calls']} "
+          f"({report['upstream_calls_saved']} saved)")
+    if report["upstream"]:
+        print("upstream: " + ", ".join(f"{name} {value}"
+                                       for name, value in report["upstream"].items()))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
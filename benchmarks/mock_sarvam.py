@@ -0,0 +1,179 @@
+"""
+Local stand-in for the Sarvam AI translate endpoint, for load tests.
+
+    python -m benchmarks.mock_sarvam --port 8900 --latency-ms 200 --error-rate 0.01 \\
+        --rate-limit 20
+
+then point the app at it with SARVAM_API_ENDPOINT=http://127.0.0.1:8900/translate.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+import uuid
+from typing import List, Optional
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+
+
+class MockConfig:
+    """Behaviour of the mock server.
+
+    Each request waits ``latency_ms`` plus ``per_char_ms`` per input
+    character, jittered by up to ``jitter_ms`` either way.  A fraction
+    ``error_rate`` of requests fails with a random status of
+    ``error_statuses``.  Requests beyond ``rate_limit`` per second (with
+    bursts of ``burst``) get 429 and a Retry-After header, and inputs
+    longer than ``max_chars`` are rejected with 400 like the real API.
+    """
+
+    def __init__(self, latency_ms: float = 150.0, jitter_ms: float = 50.0,
+                 per_char_ms: float = 0.1, error_rate: float = 0.0,
+                 error_statuses: List[int] = None, rate_limit: Optional[float] = None,
+                 burst: int = 10, max_chars: int = 1000, api_key: Optional[str] = None,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.per_char_ms = per_char_ms
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses or [500, 503]
+        self.rate_limit = rate_limit
+        self.burst = burst
+        self.max_chars = max_chars
+        self.api_key = api_key
+        self.seed = seed
+
+
+class _Throttle:
+    """Non-blocking token bucket: ``take`` says how long to wait, or 0"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+
+def mock_translation(text: str, target_lang: str) -> str:
+    """Tag every line with the target language, keeping the line structure
+    the pipeline relies on when it batches segments"""
+    return "\n".join(f"[{target_lang}] {line}" if line.strip() else line
+                     for line in text.split("\n"))
+
+
+def create_app(config: MockConfig = None) -> FastAPI:
+    config = config or MockConfig()
+    rng = random.Random(config.seed)
+    throttle = _Throttle(config.rate_limit, config.burst) if config.rate_limit else None
+    stats = {"requests": 0, "translated": 0, "characters": 0, "throttled": 0,
+             "errors": 0, "rejected": 0}
+    app = FastAPI(title="Mock Sarvam translate API")
+
+    def reject(status: int, message: str, counter: str, headers: dict = None) -> JSONResponse:
+        stats[counter] += 1
+        return JSONResponse(status_code=status, headers=headers,
+                            content={"error": {"message": message, "code": status}})
+
+    @app.post("/translate")
+    async def translate(request: Request,
+                        api_subscription_key: Optional[str] = Header(None)):
+        stats["requests"] += 1
+        if config.api_key is not None and api_subscription_key != config.api_key:
+            return reject(403, "Invalid API key", "rejected")
+        if throttle is not None:
+            wait = throttle.take()
+            if wait:
+                return reject(429, "Rate limit exceeded", "throttled",
+                              {"Retry-After": f"{wait:.3f}"})
+
+        try:
+            payload = await request.json()
+        except ValueError:
+            return reject(400, "Body is not valid JSON", "rejected")
+        text = payload.get("input") if isinstance(payload, dict) else None
+        if not isinstance(text, str) or not text.strip():
+            return reject(400, "input must be a non-empty string", "rejected")
+        if not payload.get("source_language_code") or not payload.get("target_language_code"):
+            return reject(400, "source_language_code and target_language_code are required",
+                          "rejected")
+        if len(text) > config.max_chars:
+            return reject(400, f"input exceeds {config.max_chars} characters", "rejected")
+
+        delay = config.latency_ms + config.per_char_ms * len(text)
+        delay += rng.uniform(-config.jitter_ms, config.jitter_ms)
+        await asyncio.sleep(max(delay, 0) / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            return reject(rng.choice(config.error_statuses), "Simulated upstream failure",
+                          "errors")
+
+        stats["translated"] += 1
+        stats["characters"] += len(text)
+        return {
+            "request_id": uuid.uuid4().hex,
+            "translated_text": mock_translation(text, payload["target_language_code"]),
+            "source_language_code": payload["source_language_code"]
+        }
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/stats")
+    async def get_stats():
+        """Requests seen so far, by outcome"""
+        return stats
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        for name in stats:
+            stats[name] = 0
+        return stats
+
+    return app
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Mock Sarvam translate API for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=150.0,
+                        help="Base response time of a request")
+    parser.add_argument("--jitter-ms", type=float, default=50.0,
+                        help="Uniform jitter added to or taken from the response time")
+    parser.add_argument("--per-char-ms", type=float, default=0.1,
+                        help="Extra response time per input character")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests failing with a 5xx status")
+    parser.add_argument("--error-statuses", type=int, nargs="+", default=[500, 503])
+    parser.add_argument("--rate-limit", type=float, default=None,
+                        help="Requests per second before answering 429 (default: unlimited)")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--max-chars", type=int, default=1000,
+                        help="Longest accepted input")
+    parser.add_argument("--api-key", default=None,
+                        help="Require this api-subscription-key (default: accept any)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.per_char_ms, args.error_rate,
+                        args.error_statuses, args.rate_limit, args.burst, args.max_chars,
+                        args.api_key, args.seed)
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional
+from app.utils.glossary import Glossary
+from app.utils.tm_storage import SnapshotStorage
+from app.utils.translation_memory import TranslationMemory
+from .compare import compare, format_rows, load_results
+from .corpus import REPO_ROOT, SyntheticCorpus, build_fixtures
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCHMARK_DIR = os.path.join(REPO_ROOT, "benchmarks")
+DEFAULT_SIZES = [10000, 100000, 1000000]
+# Language pair that lookups and glossary runs use
+PAIR = ("en", "hi")
+
+
+def _peak_rss_mb() -> Optional[float]:
+    # ru_maxrss survives exec, so a worker would report the parent's peak;
+    # Linux tracks the high-water mark per process image as well
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / (1 << 10)
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def latency_summary(durations_ms: List[float]) -> dict:
+    """p50/p90/p99/max/mean of latencies in milliseconds (None if empty)"""
+    ordered = sorted(durations_ms)
+    if not ordered:
+        return {"p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    return {
+        "p50": percentile(0.50),
+        "p90": percentile(0.90),
+        "p99": percentile(0.99),
+        "max": ordered[-1],
+        "mean": sum(ordered) / len(ordered)
+    }
+
+
+class Case:
+    """One operation at one corpus size, run in its own process"""
+
+    def __init__(self, operation: str, size: int, samples: int, fixtures: Dict[str, str],
+                 corpus: SyntheticCorpus, workdir: str):
+        self.operation = operation
+        self.size = size
+        self.samples = samples
+        self.fixtures = fixtures
+        self.corpus = corpus
+        self.workdir = workdir
+        # Nanoseconds of each measured unit of work
+        self.durations: List[int] = []
+        self.items = 0
+        self.unit = "call"
+        self.warmup_ms: Optional[float] = None
+        self.setup_rss_mb: Optional[float] = None
+        self.params: dict = {}
+
+    def open_tm(self) -> TranslationMemory:
+        """A private copy of the corpus TM, so writes never reach the cache"""
+        tm_dir = os.path.join(self.workdir, "tm")
+        shutil.copytree(self.fixtures["tm_dir"], tm_dir)
+        return TranslationMemory(tm_dir, storage=SnapshotStorage(tm_dir))
+
+    def setup_done(self):
+        """Mark the end of setup; memory measured so far is reported apart"""
+        self.setup_rss_mb = _peak_rss_mb()
+
+    def time(self, fn: Callable, *args):
+        start = time.perf_counter_ns()
+        result = fn(*args)
+        self.durations.append(time.perf_counter_ns() - start)
+        return result
+
+    def result(self) -> dict:
+        total = sum(self.durations) / 1e9
+        return {
+            "operation": self.operation,
+            "size": self.size,
+            "samples": len(self.durations),
+            "unit": self.unit,
+            "items": self.items,
+            "total_s": total,
+            "throughput_per_s": self.items / total if total else None,
+            "latency_ms": latency_summary([duration / 1e6 for duration in self.durations]),
+            "warmup_ms": self.warmup_ms,
+            "setup_rss_mb": self.setup_rss_mb,
+            "peak_rss_mb": _peak_rss_mb(),
+            "params": self.params
+        }
+
+
+def bench_find_match(case: Case):
+    """Fuzzy lookups of stored, edited and unknown segments"""
+    tm = case.open_tm()
+    queries = case.corpus.queries(case.size, case.samples, PAIR)
+    case.setup_done()
+    # The first lookup builds the pair's fuzzy index
+    start = time.perf_counter_ns()
+    tm.find_match(queries[0][1], *PAIR)
+    case.warmup_ms = (time.perf_counter_ns() - start) / 1e6
+    hits = {"exact": 0, "fuzzy": 0, "miss": 0}
+    for kind, text in queries:
+        if case.time(tm.find_match, text, *PAIR) is not None:
+            hits[kind] += 1
+    case.items = len(queries)
+    case.params = {"queries": {kind: len(queries) // 3 for kind in hits}, "hits": hits}
+
+
+def bench_add_translation(case: Case):
+    """Single-segment writes (journaled) into a TM of the corpus size"""
+    tm = case.open_tm()
+    new = list(case.corpus.segments(case.samples, start=case.size))
+    case.setup_done()
+    for source_lang, target_lang, source, target in new:
+        case.time(tm.add_translation, source, target, source_lang, target_lang)
+    start = time.perf_counter_ns()
+    tm.flush()
+    case.params = {"flush_ms": (time.perf_counter_ns() - start) / 1e6}
+    case.items = len(new)
+    case.unit = "segment"
+
+
+def bench_import_tmx(case: Case):
+    """Streaming import of the corpus TMX into an empty TM"""
+    tm_dir = os.path.join(case.workdir, "tm")
+    storage = SnapshotStorage(tm_dir)
+    tm = TranslationMemory(tm_dir, storage=storage)
+    batch_size = 5000
+    compactions = []
+    compact = storage.compact
+    storage.compact = lambda: (compactions.append(1), compact())
+    case.setup_done()
+    last = [time.perf_counter_ns()]
+
+    def on_batch(_):
+        now = time.perf_counter_ns()
+        case.durations.append(now - last[0])
+        last[0] = now
+
+    stats = tm.import_tmx(case.fixtures["tmx"], progress_callback=on_batch,
+                          batch_size=batch_size)
+    case.items = stats["imported"]
+    case.unit = f"batch of {batch_size} units"
+    case.params = {"batch_size": batch_size, "duplicates": stats["duplicates"],
+                   "compactions": len(compactions)}
+
+
+def bench_export_tmx(case: Case):
+    """Streaming export of the whole TM to a TMX file"""
+    tm = case.open_tm()
+    units_per_chunk = 1000
+    counter = {"units": 0}
+    case.setup_done()
+    with open(os.path.join(case.workdir, "export.tmx"), "wb") as f:
+        chunks = tm.iter_tmx(counter=counter, units_per_chunk=units_per_chunk)
+        while True:
+            chunk = case.time(next, chunks, None)
+            if chunk is None:
+                case.durations.pop()
+                break
+            f.write(chunk)
+    case.items = counter["units"]
+    case.unit = f"chunk of {units_per_chunk} units"
+    case.params = {"units_per_chunk": units_per_chunk}
+
+
+def bench_apply_glossary(case: Case):
+    """Term substitution in corpus segments, with one term per 100 segments"""
+    glossary = Glossary(os.path.join(case.workdir, "glossary"))
+    terms = max(1000, case.size // 100)
+    for source_lang, target_lang, term, translation in case.corpus.glossary_terms(terms):
+        glossary.add_term(term, translation, source_lang, target_lang)
+    glossary.save_glossary()
+    rng = random.Random(case.corpus.seed)
+    texts = []
+    while len(texts) < case.samples:
+        source_lang, target_lang, source, _ = case.corpus.segment(rng.randrange(case.size))
+        if (source_lang, target_lang) == PAIR:
+            texts.append(source)
+    case.setup_done()
+    # The first call compiles the pair's matcher
+    start = time.perf_counter_ns()
+    glossary.apply_glossary(texts[0], *PAIR)
+    case.warmup_ms = (time.perf_counter_ns() - start) / 1e6
+    for text in texts:
+        case.time(glossary.apply_glossary, text, *PAIR)
+    case.items = len(texts)
+    case.unit = "segment"
+    case.params = {"glossary_terms": terms}
+
+
+OPERATIONS: Dict[str, Callable[[Case], None]] = {
+    "find_match": bench_find_match,
+    "add_translation": bench_add_translation,
+    "import_tmx": bench_import_tmx,
+    "export_tmx": bench_export_tmx,
+    "apply_glossary": bench_apply_glossary,
+}
+
+
+def run_case(operation: str, size: int, samples: int, fixtures: Dict[str, str],
+             seed: int) -> dict:
+    """Run one case; called in a fresh process so peak memory is its own"""
+    with tempfile.TemporaryDirectory(prefix="tm-bench-") as workdir:
+        case = Case(operation, size, samples, fixtures, SyntheticCorpus(seed=seed), workdir)
+        OPERATIONS[operation](case)
+        return case.result()
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int], operations: List[str], samples: int = 300, seed: int = 42,
+        cache_dir: str = None, progress: Callable[[dict], None] = None) -> dict:
+    """Run every operation at every size and return the results document"""
+    cache_dir = cache_dir or os.path.join(BENCHMARK_DIR, ".cache")
+    corpus = SyntheticCorpus(seed=seed)
+    results = []
+    for size in sizes:
+        fixtures = build_fixtures(corpus, cache_dir, size)
+        for operation in operations:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                result = pool.submit(run_case, operation, size, samples, fixtures, seed).result()
+            results.append(result)
+            if progress:
+                progress(result)
+    return {
+        "created": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"sizes": sizes, "operations": operations, "samples": samples, "seed": seed,
+                   "seed_pairs": {f"{s}->{t}": len(p) for (s, t), p in corpus.seeds.items()}},
+        "results": results
+    }
+
+
+def _print_result(result: dict):
+    latency = result["latency_ms"]
+    throughput = result["throughput_per_s"]
+    print(f"{result['operation']:<16} {result['size']:>9}  "
+          f"p50 {latency['p50'] or 0:9.3f} ms  p90 {latency['p90'] or 0:9.3f} ms  "
+          f"p99 {latency['p99'] or 0:9.3f} ms  {throughput or 0:12.1f}/s  "
+          f"peak {result['peak_rss_mb'] or 0:8.1f} MB", flush=True)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the TM, glossary and TMX paths offline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Corpus sizes in segments (default: 10000 100000 1000000)")
+    parser.add_argument("--operations", nargs="+", choices=list(OPERATIONS),
+                        default=list(OPERATIONS))
+    parser.add_argument("--samples", type=int, default=300,
+                        help="Calls measured per lookup, write and glossary case")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache-dir", default=None,
+                        help="Where generated corpora are kept (default: benchmarks/.cache)")
+    parser.add_argument("--output", default=None,
+                        help="Results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", default=None,
+                        help="Results of an earlier run to check this one against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--memory-tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    document = run(args.sizes, args.operations, args.samples, args.seed, args.cache_dir,
+                   progress=_print_result)
+    output = args.output or os.path.join(
+        BENCHMARK_DIR, "results", f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.baseline:
+        rows = compare(load_results(args.baseline), document, args.tolerance,
+                       args.memory_tolerance)
+        print(format_rows(rows))
+        regressions = [row for row in rows if row["status"] == "regression"]
+        print(f"\n{len(regressions)} regression(s) in {len(rows)} comparisons")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
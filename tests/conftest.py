@@ -0,0 +1,8 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Library code is imported as app.utils.*; api.py imports utils.* with app/ on the path
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, "app")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
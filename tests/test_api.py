@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from utils.glossary import Glossary
+from utils.metrics import MetricsRegistry
+from utils.pipeline import TranslationPipeline
+from utils.translation_memory import TranslationMemory
+
+
+class FlakyAPI:
+    """Translates every line to "<target>:<line>"; requests containing "fail" are rejected"""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, text, source_lang, target_lang, translation_mode, output_script):
+        self.requests.append(text)
+        if "fail" in text:
+            raise api.SarvamAPIError("API Error: 500", 500, "upstream broke")
+        return "\n".join(f"{target_lang}:{line}" for line in text.split("\n"))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    flaky = FlakyAPI()
+    pipeline = TranslationPipeline(TranslationMemory(str(tmp_path / "tm")),
+                                   Glossary(str(tmp_path / "glossary")), flaky,
+                                   metrics=MetricsRegistry())
+    monkeypatch.setattr(api, "service", SimpleNamespace(pipeline=pipeline, tm=pipeline.tm,
+                                                        glossary=pipeline.glossary))
+    # Without a context manager the lifespan (which builds the real service) does not run
+    test_client = TestClient(api.app)
+    test_client.flaky = flaky
+    return test_client
+
+
+def _item(text, target_lang="hi"):
+    return {"text": text, "source_lang": "en", "target_lang": target_lang}
+
+
+def test_batch_translates_each_group_with_shared_calls(client):
+    response = client.post("/translate/batch", json={"items": [
+        _item("One"), _item("Two", "ta"), _item("Three")]})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [result["translation"] for result in body["results"]] == ["hi:One", "ta:Two", "hi:Three"]
+    assert all(result["error"] is None for result in body["results"])
+    assert body["stats"]["failed"] == 0
+    assert body["stats"]["segments"] == 3
+    assert sorted(client.flaky.requests) == ["One\nThree", "Two"]
+
+
+def test_batch_upstream_failure_only_fails_its_items(client):
+    response = client.post("/translate/batch", json={"items": [
+        _item("Good"), _item("Please fail"), _item("Other", "ta"), _item("Also good")]})
+
+    assert response.status_code == 200
+    body = response.json()
+    results = body["results"]
+    assert [result["translation"] for result in results] == \
+        ["hi:Good", None, "ta:Other", "hi:Also good"]
+    assert results[1]["error"] == {"error": "API Error: 500", "upstream_status": 500,
+                                   "upstream_response": "upstream broke"}
+    assert body["stats"]["failed"] == 1
+
+
+def test_single_text_failure_is_a_bad_gateway(client):
+    response = client.post("/translate", json=_item("fail now"))
+    assert response.status_code == 502
+    assert response.json()["detail"]["upstream_status"] == 500
+
+
+def test_health(client):
+    assert client.get("/health").json() == {"status": "ok"}
+
+
+def test_tm_export_streams_tmx(client, monkeypatch):
+    tm = api.service.tm
+    tm.add_translations([("en", "hi", "Save", "सहेजें"), ("en", "ta", "Save", "சேமி")])
+    chunks = []
+    iter_tmx = tm.iter_tmx
+    monkeypatch.setattr(tm, "iter_tmx", lambda *args: (
+        chunks.append(chunk) or chunk for chunk in iter_tmx(*args, units_per_chunk=1)))
+
+    response = client.get("/tm/export", params={"source_lang": "en", "target_lang": "hi"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-tmx+xml"
+    assert "सहेजें" in response.text and "சேமி" not in response.text
+    assert len(chunks) == 3
+    assert b"".join(chunks).decode("utf-8") == response.text
+
+
+def test_glossary_domains_are_those_the_service_applies(client):
+    api.service.glossary.add_term("server", "सर्वर", "en", "hi", domain="technical")
+    response = client.get("/glossary/domains")
+    assert response.status_code == 200
+    assert response.json() == {"domains": ["technical"]}
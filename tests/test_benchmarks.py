@@ -0,0 +1,94 @@
+import json
+
+from app.utils.tm_snapshot import Snapshot
+from benchmarks.compare import compare, main as compare_main
+from benchmarks.corpus import SyntheticCorpus, unique_word
+from benchmarks.run import latency_summary
+
+SEEDS = {("en", "hi"): [("Save", "सहेजें"), ("Open the file", "फ़ाइल खोलें")],
+         ("en", "ta"): [("Close", "மூடு")]}
+
+
+def _result(operation="find_match", size=1000, p50=1.0, throughput=100.0, rss=50.0):
+    return {"operation": operation, "size": size,
+            "latency_ms": {"p50": p50, "p90": p50, "p99": p50},
+            "throughput_per_s": throughput, "peak_rss_mb": rss}
+
+
+def _statuses(rows):
+    return {row["metric"]: row["status"] for row in rows}
+
+
+def test_latency_summary():
+    summary = latency_summary([float(value) for value in range(100, 0, -1)])
+    assert summary == {"p50": 51.0, "p90": 91.0, "p99": 100.0, "max": 100.0, "mean": 50.5}
+    assert latency_summary([]) == {"p50": None, "p90": None, "p99": None, "max": None,
+                                   "mean": None}
+    assert latency_summary([3.0])["p99"] == 3.0
+
+
+def test_compare_flags_regressions_and_improvements():
+    baseline = {"results": [_result(), _result("export_tmx")]}
+    current = {"results": [_result(p50=1.5, throughput=150.0, rss=55.0),
+                           _result("import_tmx")]}
+
+    rows = compare(baseline, current, tolerance=0.2)
+    assert {(row["operation"], row["size"]) for row in rows} == {("find_match", 1000)}
+    statuses = _statuses(rows)
+    assert statuses["p50_ms"] == "regression"
+    assert statuses["throughput"] == "improvement"
+    assert statuses["peak_rss_mb"] == "ok"
+    assert _statuses(compare(baseline, current, memory_tolerance=0.05))["peak_rss_mb"] == \
+        "regression"
+
+
+def test_compare_ignores_sub_timer_latency_changes():
+    rows = compare({"results": [_result(p50=0.01)]}, {"results": [_result(p50=0.05)]})
+    assert _statuses(rows)["p50_ms"] == "ok"
+
+
+def test_compare_exit_status(tmp_path):
+    paths = []
+    for name, p50 in (("before", 1.0), ("after", 2.0)):
+        path = tmp_path / f"{name}.json"
+        path.write_text(json.dumps({"results": [_result(p50=p50)]}))
+        paths.append(str(path))
+    assert compare_main(paths) == 1
+    assert compare_main(paths + ["--tolerance", "2"]) == 0
+
+
+def test_unique_words_are_unique():
+    words = [unique_word(index) for index in range(5000)]
+    assert len(set(words)) == len(words)
+
+
+def test_corpus_is_deterministic_and_prefix_stable():
+    corpus = SyntheticCorpus(SEEDS, seed=7)
+    assert list(SyntheticCorpus(SEEDS, seed=7).segments(50)) == list(corpus.segments(50))
+    assert list(corpus.segments(20)) == list(corpus.segments(50))[:20]
+    assert list(corpus.segments(5, start=10)) == list(corpus.segments(15))[10:]
+    assert list(SyntheticCorpus(SEEDS, seed=8).segments(50)) != list(corpus.segments(50))
+
+    sources = [source for _, _, source, _ in corpus.segments(200)]
+    assert len(set(sources)) == len(sources)
+    assert corpus.queries(200, 30, ("en", "hi")) == SyntheticCorpus(SEEDS, seed=7).queries(
+        200, 30, ("en", "hi"))
+
+
+def test_queries_are_split_by_kind():
+    corpus = SyntheticCorpus(SEEDS, seed=7)
+    stored = dict(corpus.pair_segments(200, ("en", "hi")))
+    queries = corpus.queries(200, 30, ("en", "hi"))
+    assert [kind for kind, _ in queries] == ["exact", "fuzzy", "miss"] * 10
+    for kind, text in queries:
+        assert (text in stored) == (kind == "exact")
+
+
+def test_write_tm_matches_segments(tmp_path):
+    corpus = SyntheticCorpus(SEEDS, seed=7)
+    corpus.write_tm(str(tmp_path), 40)
+    snapshot = Snapshot(str(tmp_path / "translation_memory.tmsnap"))
+    for pair in (("en", "hi"), ("en", "ta")):
+        stored = [(source, record.text) for source, record in snapshot.pair(*pair)]
+        assert stored == list(corpus.pair_segments(40, pair))
+    snapshot.close()
@@ -0,0 +1,80 @@
+import pytest
+
+from app.utils.bundle_localizer import BundleLocalizer, target_bundle_path
+from app.utils.glossary import Glossary
+from app.utils.metrics import MetricsRegistry
+from app.utils.pipeline import TranslationPipeline
+from app.utils.properties import PropertiesFile
+from app.utils.translation_memory import TranslationMemory
+
+
+class RecordingAPI:
+    """Translates every line to "<target>:<line>" and records the requests"""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, text, source_lang, target_lang, translation_mode, output_script):
+        self.requests.append(text)
+        return "\n".join(f"{target_lang}:{line}" for line in text.split("\n"))
+
+
+@pytest.fixture
+def setup(tmp_path):
+    api = RecordingAPI()
+    pipeline = TranslationPipeline(TranslationMemory(str(tmp_path / "tm")),
+                                   Glossary(str(tmp_path / "glossary")), api,
+                                   metrics=MetricsRegistry())
+    source = tmp_path / "Messages_en.properties"
+    source.write_text("# UI\ntitle=Welcome\nbutton.ok=OK\nbutton.yes=OK\nempty=\n",
+                      encoding="ascii")
+
+    def localizer():
+        return BundleLocalizer(pipeline, str(tmp_path / "state.json"))
+
+    return api, source, localizer
+
+
+def test_target_bundle_path():
+    assert target_bundle_path("dir/Messages_en.properties", "en-IN", "hi-IN") == \
+        "dir/Messages_hi.properties"
+    assert target_bundle_path("dir/Messages.properties", "en-IN", "ta-IN", "out") == \
+        "out/Messages_ta.properties"
+
+
+def test_values_are_deduplicated_and_bundle_written(setup):
+    api, source, localizer = setup
+    stats = localizer().localize([str(source)], "en", "hi")
+
+    target = PropertiesFile.load(str(source.parent / "Messages_hi.properties"))
+    assert target.values == {"title": "hi:Welcome", "button.ok": "hi:OK", "button.yes": "hi:OK",
+                             "empty": ""}
+    assert stats["translated_keys"] == 3 and stats["unique_values"] == 2
+    assert api.requests == ["Welcome\nOK"]
+
+
+def test_rerun_only_retranslates_changed_keys(setup):
+    api, source, localizer = setup
+    localizer().localize([str(source)], "en", "hi")
+    api.requests.clear()
+
+    stats = localizer().localize([str(source)], "en", "hi")
+    assert stats["translated_keys"] == 0 and stats["written"] == 0
+    assert api.requests == []
+
+    source.write_text("# UI\ntitle=Welcome back\nbutton.ok=OK\n", encoding="ascii")
+    stats = localizer().localize([str(source)], "en", "hi")
+    assert stats["translated_keys"] == 1 and stats["removed_keys"] == 2
+    assert api.requests == ["Welcome back"]
+    target = PropertiesFile.load(str(source.parent / "Messages_hi.properties"))
+    assert target.values == {"title": "hi:Welcome back", "button.ok": "hi:OK"}
+
+
+def test_adopt_existing_keeps_current_translations(setup):
+    api, source, localizer = setup
+    (source.parent / "Messages_hi.properties").write_text("title=Swagat\n", encoding="ascii")
+
+    localizer().localize([str(source)], "en", "hi", adopt_existing=True)
+    target = PropertiesFile.load(str(source.parent / "Messages_hi.properties"))
+    assert target.values["title"] == "Swagat"
+    assert api.requests == ["OK"]
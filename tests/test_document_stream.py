@@ -0,0 +1,111 @@
+import io
+import threading
+import time
+import zipfile
+
+import pytest
+
+from app.utils.document_stream import DocumentTranslator, iter_chunks, read_document
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _docx(paragraphs):
+    body = "".join(f"<w:p>{paragraph}</w:p>" for paragraph in paragraphs)
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as archive:
+        archive.writestr("word/document.xml",
+                         f'<w:document xmlns:w="{W_NS}"><w:body>{body}</w:body></w:document>')
+    data.seek(0)
+    return data
+
+
+@pytest.mark.parametrize("max_chars", [5, 40, 1000])
+def test_chunks_join_back_to_the_document_within_the_limit(max_chars):
+    text = ("First paragraph. It has two sentences.\n\n"
+            "Second paragraph without a blank line after it\n"
+            "continues here.\n\n\n"
+            "A very long sentence " + "word " * 30 + "ends. Then one more।\n"
+            "Supercalifragilisticexpialidocious\n")
+    chunks = list(iter_chunks(io.StringIO(text), max_chars))
+    assert "".join(chunks) == text
+    assert all(len(chunk) <= max_chars for chunk in chunks)
+
+
+def test_chunks_end_at_paragraph_boundaries_when_possible():
+    text = "One two.\n\nThree four.\n\nFive six.\n"
+    assert list(iter_chunks(io.StringIO(text), 25)) == \
+        ["One two.\n\nThree four.\n\n", "Five six.\n"]
+
+
+def test_read_document_text_and_docx():
+    assert list(read_document(io.BytesIO("a\r\nनमस्ते\n".encode("utf-8")), "notes.txt")) == \
+        ["a\r\n", "नमस्ते\n"]
+    docx = _docx(["<w:r><w:t>Hello</w:t><w:tab/><w:t>world</w:t></w:r>",
+                  "<w:r><w:t> </w:t></w:r>",
+                  "<w:r><w:t>Line</w:t><w:br/><w:t>break</w:t></w:r>"])
+    assert "".join(read_document(docx, "Report.DOCX")) == "Hello\tworld\n\nLine\nbreak\n\n"
+
+
+def test_text_without_line_breaks_is_read_in_pieces(monkeypatch):
+    from app.utils import document_stream
+
+    monkeypatch.setattr(document_stream, "MAX_LINE_CHARS", 100)
+    text = "Word नमस्ते. " * 200
+    lines = list(read_document(io.BytesIO(text.encode("utf-8")), "notes.md"))
+    assert max(len(line) for line in lines) == 100
+    assert "".join(lines) == text
+
+    chunks = list(iter_chunks(iter(lines), 50))
+    assert max(len(chunk) for chunk in chunks) <= 50
+    assert "".join(chunks) == text
+
+
+def test_stream_yields_in_document_order_while_translating_concurrently():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def translate(text, source_lang, target_lang, mode, script, domain):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        # Earlier chunks finish last
+        time.sleep(0.002 * (10 - int(text.split()[1])))
+        with lock:
+            active[0] -= 1
+        return text.upper(), {"segments": 1}
+
+    lines = [f"chunk {i}\n\n" for i in range(10)]
+    translator = DocumentTranslator(translate, max_chunk_chars=10, max_workers=3, max_in_flight=4)
+    results = list(translator.translate_stream(iter(lines), "en", "hi"))
+
+    assert [source for source, _, _ in results] == lines
+    assert [translation for _, translation, _ in results] == [line.upper() for line in lines]
+    assert 1 < peak[0] <= 3
+
+
+def test_stream_reads_the_document_lazily():
+    read = []
+
+    def lines():
+        for i in range(100):
+            read.append(i)
+            yield f"line {i}\n\n"
+
+    translator = DocumentTranslator(lambda text, *args: (text, {}), max_chunk_chars=10,
+                                    max_workers=2, max_in_flight=2)
+    stream = translator.translate_stream(lines(), "en", "hi")
+    next(stream)
+    stream.close()
+    assert len(read) < 10
+
+
+def test_stream_propagates_translation_errors():
+    def translate(text, *args):
+        if "bad" in text:
+            raise RuntimeError("upstream failed")
+        return text, {}
+
+    translator = DocumentTranslator(translate, max_chunk_chars=10)
+    with pytest.raises(RuntimeError):
+        list(translator.translate_stream(iter(["ok\n\n", "bad\n\n", "ok\n\n"]), "en", "hi"))
@@ -0,0 +1,148 @@
+import difflib
+import random
+
+import pytest
+
+from app.utils.fuzzy_index import FuzzyIndex
+
+
+def _linear_scan(sources, query, threshold):
+    """The reference FuzzyIndex must agree with: first best ratio above threshold"""
+    best, best_ratio = None, threshold
+    for source in sources:
+        ratio = difflib.SequenceMatcher(None, query.lower(), source.lower()).ratio()
+        if ratio > best_ratio:
+            best, best_ratio = source, ratio
+    return (best, best_ratio) if best is not None else None
+
+
+def _corpus(rng, size):
+    words = ["file", "save", "open", "the", "server", "user", "not", "found", "error",
+             "please", "try", "again", "later", "नमस्ते", "फ़ाइल", "was", "is", "a"]
+    sources = []
+    while len(sources) < size:
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+        if sentence not in sources:
+            sources.append(sentence)
+    return sources
+
+
+def _edit(rng, text):
+    chars = list(text)
+    for _ in range(rng.randint(0, 3)):
+        position = rng.randrange(len(chars) + 1)
+        if chars and rng.random() < 0.5:
+            del chars[min(position, len(chars) - 1)]
+        else:
+            chars.insert(position, rng.choice("abcdexyz "))
+    return "".join(chars)
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.5, 0.8, 0.9, 0.99])
+def test_search_matches_linear_scan(threshold):
+    rng = random.Random(7)
+    sources = _corpus(rng, 150)
+    index = FuzzyIndex(sources)
+    queries = [_edit(rng, rng.choice(sources)) for _ in range(60)]
+    queries += ["completely unrelated text", "", "x"]
+    for query in queries:
+        assert index.search(query, threshold) == _linear_scan(sources, query, threshold), query
+
+
+def test_search_is_case_insensitive_and_returns_stored_source():
+    index = FuzzyIndex(["Save the File"])
+    assert index.search("save the file", 0.8) == ("Save the File", 1.0)
+
+
+def test_ties_go_to_the_first_indexed_source():
+    index = FuzzyIndex(["abcd", "abce"])
+    source, _ = index.search("abcf", 0.5)
+    assert source == "abcd"
+
+
+def test_removed_sources_are_not_returned():
+    index = FuzzyIndex(["open the file", "open the files"])
+    index.remove("open the file")
+    assert "open the file" not in index
+    assert len(index) == 1
+    assert index.search("open the file", 0.8)[0] == "open the files"
+    index.remove("open the files")
+    assert index.search("open the file", 0.8) is None
+
+
+def test_add_is_idempotent():
+    index = FuzzyIndex()
+    index.add("hello")
+    index.add("hello")
+    assert len(index) == 1
+
+
+def test_translation_memory_find_match_sees_new_entries(tmp_path):
+    from app.utils.translation_memory import TranslationMemory
+
+    tm = TranslationMemory(str(tmp_path))
+    tm.add_translation("Open the file", "फ़ाइल खोलें", "en", "hi")
+    assert tm.find_match("Open the files", "en", "hi") == ("फ़ाइल खोलें", pytest.approx(0.963, abs=1e-3))
+    # Entries added after the index was built are picked up on the next lookup
+    tm.add_translation("Close the window", "विंडो बंद करें", "en", "hi")
+    assert tm.find_match("Close the windows", "en", "hi")[0] == "विंडो बंद करें"
+    assert tm.find_match("Close the windows", "en", "ta") is None
+
+
+@pytest.mark.parametrize("batch_min", [1, 1000])
+def test_lookup_many_agrees_with_lookup(tmp_path, monkeypatch, batch_min):
+    from app.utils.translation_memory import TranslationMemory
+
+    rng = random.Random(11)
+    sources = _corpus(rng, 80)
+    tm = TranslationMemory(str(tmp_path))
+    tm.add_translations(("en", "hi", source, f"hi:{source}") for source in sources)
+    queries = ([rng.choice(sources) for _ in range(10)]
+               + [_edit(rng, rng.choice(sources)) for _ in range(30)]
+               + ["Delete 5 files", "completely unrelated text"])
+    tm.add_translation("Delete 3 files", "3 फ़ाइलें हटाएं", "en", "hi")
+
+    # Batch fuzzy matching for every batch, or never
+    monkeypatch.setattr(TranslationMemory, "BATCH_FUZZY_MIN", batch_min)
+    expected = [tm.lookup(query, "en", "hi") for query in queries]
+    tm._usage.clear()
+    assert tm.lookup_many(queries, "en", "hi") == expected
+    assert expected[-2] == ("5 फ़ाइलें हटाएं", 1.0, "normalized")
+    assert expected[-1] is None
+    assert {match for _, _, match in filter(None, expected)} == {"exact", "normalized", "fuzzy"}
+    # Every served lookup is counted against the entry that served it
+    assert sum(hits for hits, _ in tm._usage.values()) == sum(1 for match in expected if match)
+
+
+def test_unselective_queries_are_flagged_and_capped(monkeypatch):
+    rng = random.Random(3)
+    sources = _corpus(rng, 150)
+    index = FuzzyIndex(sources)
+    query = _edit(rng, sources[0])
+    assert index.selective(query, 0.8)
+
+    monkeypatch.setattr(FuzzyIndex, "MAX_POSTINGS", 10)
+    monkeypatch.setattr(FuzzyIndex, "MAX_CANDIDATES", 5)
+    assert not index.selective(query, 0.8)
+    assert len(index._candidates(query.lower(), 0.0)) == 5
+    # The kept candidates are those sharing most bigrams, so a near-duplicate survives
+    assert index.search(sources[0], 0.8) == (sources[0], 1.0)
+
+
+def test_translation_memory_uses_vector_index_for_unselective_queries(tmp_path, monkeypatch):
+    from app.utils.translation_memory import TranslationMemory
+
+    tm = TranslationMemory(str(tmp_path))
+    tm.add_translation("Open the file", "फ़ाइल खोलें", "en", "hi")
+    searches = []
+    search = FuzzyIndex.search
+    monkeypatch.setattr(FuzzyIndex, "search",
+                        lambda self, *args: searches.append(args) or search(self, *args))
+
+    assert tm.find_match("Open the files", "en", "hi")[0] == "फ़ाइल खोलें"
+    assert len(searches) == 1
+
+    monkeypatch.setattr(FuzzyIndex, "MAX_POSTINGS", 0)
+    assert tm.find_match("Open the files", "en", "hi") == \
+        ("फ़ाइल खोलें", pytest.approx(0.963, abs=1e-3))
+    assert len(searches) == 1
@@ -0,0 +1,125 @@
+import io
+
+import pytest
+
+from app.utils.glossary import Glossary
+
+TBX = """<?xml version="1.0" encoding="UTF-8"?>
+<martif type="TBX" xml:lang="en">
+  <text><body>
+    <termEntry id="1">
+      <descrip type="subjectField">medical</descrip>
+      <langSet xml:lang="en"><tig><term>dose</term></tig></langSet>
+      <langSet xml:lang="hi">
+        <tig><term>खुराक</term><descrip type="context">दवा की खुराक</descrip></tig>
+      </langSet>
+    </termEntry>
+    <termEntry id="2">
+      <langSet xml:lang="en"><tig><term>file</term></tig></langSet>
+      <langSet xml:lang="hi"><tig><term>फ़ाइल</term></tig></langSet>
+    </termEntry>
+  </body></text>
+</martif>
+"""
+
+
+@pytest.fixture
+def glossary(tmp_path):
+    return Glossary(str(tmp_path / "glossary"))
+
+
+def test_terms_are_kept_per_domain(glossary):
+    glossary.add_term("Server", "सर्वर", "en", "hi", domain="technical")
+    glossary.add_term("server", "परोसने वाला", "en", "hi", domain="hospitality")
+    glossary.add_term("server", "सेवक", "en", "hi", domain="technical")
+
+    assert glossary.get_domains() == ["hospitality", "technical"]
+    # The first term of a domain is the one used for it
+    assert glossary.get_term("server", "en", "hi", "technical") == "सर्वर"
+    assert glossary.get_term("SERVER", "en", "hi", "hospitality") == "परोसने वाला"
+    assert glossary.get_term("server", "en", "hi") == "सर्वर"
+    assert [entry["term"] for entry in glossary.get_terms("server", "en", "hi", "technical")] == \
+        ["सर्वर", "सेवक"]
+    assert glossary.get_domain_terms("en", "hi", "hospitality") == {"server": "परोसने वाला"}
+    assert glossary.get_term("server", "en", "ta", "technical") is None
+
+
+def test_csv_import_with_named_columns_and_quoted_commas(glossary):
+    data = io.StringIO(
+        "domain,source_term,target_term,source_lang,target_lang\n"
+        'legal,"terms, conditions","नियम, शर्तें",en,hi\n'
+        "legal,,missing,en,hi\n"
+        "\n"
+        'legal,"terms, conditions","नियम, शर्तें",en,hi\n'
+    )
+    stats = glossary.import_glossary(data, format="csv")
+
+    assert stats == {"imported": 1, "skipped": 1, "duplicates": 1}
+    assert glossary.get_term("Terms, Conditions", "en", "hi", "legal") == "नियम, शर्तें"
+
+
+def test_csv_import_of_positional_rows_from_a_binary_upload(glossary):
+    data = io.BytesIO("source,target,src,tgt\nbook,किताब,en,hi\ncloud,बादल,en,hi,weather,sky\n"
+                      .encode("utf-8-sig"))
+    stats = glossary.import_glossary(data, format="csv")
+
+    assert stats["imported"] == 2
+    assert glossary.get_terms("book", "en", "hi")[0]["domain"] == "general"
+    assert glossary.get_terms("cloud", "en", "hi") == \
+        [{"term": "बादल", "domain": "weather", "context": "sky"}]
+
+
+def test_tbx_import_uses_subject_field_as_domain(glossary):
+    stats = glossary.import_glossary(io.BytesIO(TBX.encode("utf-8")), format="tbx")
+
+    assert stats["imported"] == 2
+    assert glossary.get_domains() == ["general", "medical"]
+    assert glossary.get_terms("dose", "en", "hi") == \
+        [{"term": "खुराक", "domain": "medical", "context": "दवा की खुराक"}]
+    assert glossary.get_domain_terms("en", "hi", "general") == {"file": "फ़ाइल"}
+
+
+def test_unsupported_format_is_rejected(glossary):
+    with pytest.raises(ValueError):
+        glossary.import_glossary(io.StringIO(""), format="xlsx")
+
+
+def test_export_round_trips_through_import(glossary, tmp_path):
+    glossary.add_term("terms, conditions", "नियम, शर्तें", "en", "hi", domain="legal",
+                      context="contract")
+    glossary.add_term("file", "फ़ाइल", "en", "hi")
+    glossary.add_term("file", "संचिका", "en", "hi", domain="technical")
+    path = str(tmp_path / "export.csv")
+    glossary.export_glossary(path)
+
+    copy = Glossary(str(tmp_path / "copy"))
+    assert copy.import_glossary(path)["imported"] == 3
+    assert copy.terms == glossary.terms
+    assert copy.get_domains() == glossary.get_domains()
+
+
+def test_terms_persist_across_reopen(glossary, tmp_path):
+    glossary.add_terms([("cloud", "बादल", "en", "hi", "weather", None)])
+    glossary.add_term("server", "सर्वर", "en", "hi", domain="technical")
+    glossary.journal.commit()
+
+    reopened = Glossary(glossary.glossary_dir)
+    assert reopened.get_term("cloud", "en", "hi", "weather") == "बादल"
+    assert reopened.get_term("server", "en", "hi", "technical") == "सर्वर"
+    assert reopened.get_domains() == ["technical", "weather"]
+
+
+def test_apply_glossary_per_domain(glossary):
+    glossary.add_term("server", "सर्वर", "en", "hi", domain="technical")
+    glossary.add_term("cloud server", "क्लाउड सर्वर", "en", "hi", domain="technical")
+    glossary.add_term("server", "परोसने वाला", "en", "hi", domain="hospitality")
+
+    assert glossary.apply_glossary("Restart the cloud server", "en", "hi", "technical") == \
+        "Restart the क्लाउड सर्वर"
+    assert glossary.apply_glossary("Call the server", "en", "hi", "hospitality") == \
+        "Call the परोसने वाला"
+    # A term added later invalidates the compiled matcher of its domain
+    glossary.add_term("restart", "पुनः आरंभ", "en", "hi", domain="technical")
+    assert glossary.apply_glossary("restart the server", "en", "hi", "technical") == \
+        "पुनः आरंभ the सर्वर"
+    assert glossary.apply_glossary("server", "en", "ta", "technical") == "server"
@@ -0,0 +1,79 @@
+import json
+import os
+
+import pytest
+
+from app.utils.journal import Journal, write_json_atomic
+
+
+def _journal(tmp_path, **kwargs) -> Journal:
+    return Journal(str(tmp_path / "journal.jsonl"), **kwargs)
+
+
+def test_replay_returns_appended_records_in_order(tmp_path):
+    journal = _journal(tmp_path, group_size=2)
+    journal.append_many([{"n": 1}, {"n": 2}, {"n": 3}])
+    journal.close()
+
+    reopened = _journal(tmp_path)
+    assert list(reopened.replay()) == [{"n": 1}, {"n": 2}, {"n": 3}]
+    assert reopened.records == 3
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_bytes(b'{"n": 1}\n{"n": 2}\n{"n": 3')
+
+    journal = _journal(tmp_path)
+    assert list(journal.replay()) == [{"n": 1}, {"n": 2}]
+    assert path.read_bytes() == b'{"n": 1}\n{"n": 2}\n'
+
+    # New records follow the valid data
+    journal.append({"n": 4})
+    journal.close()
+    assert list(_journal(tmp_path).replay()) == [{"n": 1}, {"n": 2}, {"n": 4}]
+
+
+def test_unreadable_last_line_is_treated_as_torn(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_bytes(b'{"n": 1}\n{"n": \n')
+
+    assert list(_journal(tmp_path).replay()) == [{"n": 1}]
+    assert path.read_bytes() == b'{"n": 1}\n'
+
+
+def test_corrupt_line_before_valid_records_raises(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    content = b'{"n": 1}\nnot json\n{"n": 3}\n'
+    path.write_bytes(content)
+
+    with pytest.raises(ValueError, match="line 2"):
+        list(_journal(tmp_path).replay())
+    # Nothing after the corrupt line was thrown away
+    assert path.read_bytes() == content
+
+
+def test_reset_empties_the_journal(tmp_path):
+    journal = _journal(tmp_path)
+    journal.append({"n": 1})
+    journal.reset()
+    assert journal.records == 0
+    assert list(_journal(tmp_path).replay()) == []
+
+
+def test_write_json_atomic_replaces_file(tmp_path):
+    path = str(tmp_path / "data.json")
+    write_json_atomic(path, {"a": "अ"})
+    write_json_atomic(path, {"b": 2})
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"b": 2}
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_readers_leave_a_torn_last_line_in_place(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    path.write_bytes(b'{"n": 1}\n{"n": 2')
+
+    assert list(_journal(tmp_path).replay(repair=False)) == [{"n": 1}]
+    # The writer may still complete the record
+    assert path.read_bytes() == b'{"n": 1}\n{"n": 2'
@@ -0,0 +1,102 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from benchmarks.corpus import SyntheticCorpus
+from benchmarks.load_test import Workload, parse_pairs, run_load, summarize
+from benchmarks.mock_sarvam import MockConfig, create_app, mock_translation
+
+SEEDS = {("en", "hi"): [("Save", "सहेजें"), ("Open the file", "फ़ाइल खोलें")],
+         ("en", "ta"): [("Close", "மூடு")]}
+
+
+def _client(**config) -> TestClient:
+    config = dict({"latency_ms": 0, "jitter_ms": 0, "per_char_ms": 0, "seed": 1}, **config)
+    return TestClient(create_app(MockConfig(**config)))
+
+
+def _payload(text="Hello\n\nWorld", target="hi-IN"):
+    return {"input": text, "source_language_code": "en-IN", "target_language_code": target}
+
+
+def test_mock_translates_line_by_line():
+    client = _client()
+    response = client.post("/translate", json=_payload())
+    assert response.status_code == 200
+    assert response.json()["translated_text"] == "[hi-IN] Hello\n\n[hi-IN] World"
+    assert mock_translation("a\nb", "ta-IN").split("\n") == ["[ta-IN] a", "[ta-IN] b"]
+    assert client.get("/stats").json()["translated"] == 1
+
+
+@pytest.mark.parametrize("body", [
+    {"input": "", "source_language_code": "en-IN", "target_language_code": "hi-IN"},
+    {"input": "Hello", "source_language_code": "en-IN"},
+    {"input": "x" * 11, "source_language_code": "en-IN", "target_language_code": "hi-IN"},
+])
+def test_mock_rejects_invalid_input(body):
+    client = _client(max_chars=10)
+    response = client.post("/translate", json=body)
+    assert response.status_code == 400
+    assert client.get("/stats").json()["rejected"] == 1
+
+
+def test_mock_checks_the_api_key():
+    client = _client(api_key="secret")
+    assert client.post("/translate", json=_payload()).status_code == 403
+    response = client.post("/translate", json=_payload(),
+                           headers={"api-subscription-key": "secret"})
+    assert response.status_code == 200
+
+
+def test_mock_throttles_with_retry_after():
+    client = _client(rate_limit=0.5, burst=2)
+    statuses = [client.post("/translate", json=_payload()) for _ in range(3)]
+    assert [response.status_code for response in statuses] == [200, 200, 429]
+    assert float(statuses[2].headers["Retry-After"]) > 0
+    assert client.get("/stats").json()["throttled"] == 1
+
+
+def test_mock_simulates_failures_and_resets_stats():
+    client = _client(error_rate=1.0, error_statuses=[503])
+    assert client.post("/translate", json=_payload()).status_code == 503
+    assert client.get("/stats").json()["errors"] == 1
+    assert client.post("/stats/reset").json()["errors"] == 0
+
+
+def test_parse_pairs():
+    assert parse_pairs(["en-IN:hi-IN=0.7", "en-IN:ta-IN"]) == \
+        [("en-IN", "hi-IN", 0.7), ("en-IN", "ta-IN", 1.0)]
+    with pytest.raises(ValueError):
+        parse_pairs(["en-IN"])
+
+
+def test_workload_is_reproducible_and_repeats_requests():
+    def workload(seed=3, repeat_rate=0.5):
+        return Workload(SyntheticCorpus(SEEDS, seed=7), [("en-IN", "hi-IN", 1.0)],
+                        repeat_rate=repeat_rate, new_segment_rate=1.0, seed=seed)
+
+    # Every segment is new, so only repeats make requests equal
+    load = workload().requests(200)
+    assert load == workload().requests(200)
+    assert load != workload(seed=4).requests(200)
+    repeated = len(load) - len(set(load))
+    assert 60 < repeated < 140
+    assert len(set(workload(repeat_rate=0.0).requests(50))) == 50
+    assert all(source == "en-IN" and target == "hi-IN" for _, source, target in load)
+
+
+def test_run_load_and_summary_count_requests_and_saved_calls():
+    def target(text, source_lang, target_lang):
+        if text == "boom":
+            raise RuntimeError("failed")
+        return text, {"segments": 2, "tm_segments": 1, "cache_hits": 0, "api_calls": 1}
+
+    load = [("a" * 1500, "en", "hi"), ("short", "en", "hi"), ("boom", "en", "hi")]
+    outcome = run_load(target, load, concurrency=2)
+    summary = summarize(load, outcome, max_chars=1000)
+
+    assert (summary["completed"], summary["failed"]) == (2, 1)
+    assert summary["errors"] == {"RuntimeError": 1}
+    assert summary["segments"] == 4 and summary["tm_hit_ratio"] == 0.5
+    # The long request alone would need two calls at the input limit
+    assert (summary["naive_api_calls"], summary["api_calls"]) == (4, 2)
+    assert summary["upstream_saved_ratio"] == 0.5
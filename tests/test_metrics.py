@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+
+from app.utils.glossary import Glossary
+from app.utils.metrics import MetricsRegistry
+from app.utils.pipeline import TranslationPipeline
+from app.utils.translation_memory import TranslationMemory
+
+
+def test_counter_counts_per_label_set():
+    registry = MetricsRegistry()
+    counter = registry.counter("segments_total", "Segments", ("source",))
+    counter.inc(source="tm")
+    counter.inc(3, source="api")
+
+    threads = [threading.Thread(target=lambda: [counter.inc(source="tm") for _ in range(1000)])
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.value(source="tm") == 4001
+    assert counter.value(source="cache") == 0
+    with pytest.raises(ValueError):
+        counter.inc(-1, source="tm")
+    with pytest.raises(ValueError):
+        counter.inc(stage="tm")
+
+
+def test_registry_shares_metrics_by_name():
+    registry = MetricsRegistry()
+    counter = registry.counter("calls_total", "Calls")
+    assert registry.counter("calls_total", "Calls") is counter
+    with pytest.raises(ValueError):
+        registry.histogram("calls_total", "Calls")
+    with pytest.raises(ValueError):
+        registry.counter("calls_total", "Calls", ("stage",))
+
+    counter.inc(2)
+    registry.reset()
+    assert counter.value() == 0 and registry.get("calls_total") is counter
+
+
+def test_histogram_buckets_and_quantiles():
+    histogram = MetricsRegistry().histogram("latency_seconds", "Latency", ("stage",),
+                                            buckets=(0.1, 0.2, 0.4))
+    for value in (0.05, 0.1, 0.15, 0.3, 1.0):
+        histogram.observe(value, stage="api")
+
+    counts, total = histogram.samples()[("api",)]
+    # Bounds are inclusive; the last count is the +Inf bucket
+    assert counts == [2, 1, 1, 1]
+    assert total == pytest.approx(1.6)
+    summary = histogram.summary(stage="api")
+    assert (summary["count"], summary["mean"]) == (5, pytest.approx(0.32))
+    # The median (rank 2.5) falls in the (0.1, 0.2] bucket, halfway
+    assert summary["p50"] == pytest.approx(0.15)
+    assert summary["p99"] == 0.4
+    assert histogram.summary(stage="tm")["p50"] is None
+
+
+def test_histogram_times_blocks_even_when_they_fail():
+    histogram = MetricsRegistry().histogram("block_seconds", "Blocks")
+    with pytest.raises(RuntimeError):
+        with histogram.time():
+            raise RuntimeError
+    assert histogram.summary()["count"] == 1
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("b_total", "Things\nby kind", ("kind",)).inc(2, kind='say "hi"\\')
+    registry.histogram("a_seconds", "Durations", buckets=(0.5, 1.0)).observe(0.75)
+
+    assert registry.render_prometheus() == (
+        "# HELP a_seconds Durations\n"
+        "# TYPE a_seconds histogram\n"
+        'a_seconds_bucket{le="0.5"} 0\n'
+        'a_seconds_bucket{le="1"} 1\n'
+        'a_seconds_bucket{le="+Inf"} 1\n'
+        "a_seconds_sum 0.75\n"
+        "a_seconds_count 1\n"
+        "# HELP b_total Things\nby kind\n"
+        "# TYPE b_total counter\n"
+        'b_total{kind="say \\"hi\\"\\\\"} 2\n'
+    )
+
+
+def test_pipeline_records_sources_stages_and_errors(tmp_path):
+    registry = MetricsRegistry()
+    tm = TranslationMemory(str(tmp_path / "tm"))
+    tm.add_translation("Known.", "ज्ञात।", "en", "hi")
+
+    def api(text, source_lang, target_lang, mode, script):
+        if "fail" in text:
+            raise RuntimeError("upstream failed")
+        return "\n".join(f"hi:{line}" for line in text.split("\n"))
+
+    pipeline = TranslationPipeline(tm, Glossary(str(tmp_path / "glossary")), api,
+                                   metrics=registry)
+    pipeline.translate("Known. New one.", "en", "hi")
+    with pytest.raises(RuntimeError):
+        pipeline.translate("Please fail.", "en", "hi")
+
+    segments = registry.get("translation_segments_total")
+    assert (segments.value(source="tm_exact"), segments.value(source="api")) == (1, 1)
+    assert registry.get("translation_api_calls_total").value() == 1
+    assert registry.get("translation_errors_total").value(stage="api") == 1
+    stages = registry.get("translation_stage_seconds")
+    assert stages.summary(stage="tm_lookup")["count"] == 2
+    assert stages.summary(stage="tm_write")["count"] == 1
+    assert registry.get("translation_request_seconds").summary()["count"] == 2
+    assert 'translation_segments_total{source="api"} 1' in registry.render_prometheus()
+
+
+def test_tm_lookups_count_every_occurrence_of_a_segment(tmp_path):
+    registry = MetricsRegistry()
+    tm = TranslationMemory(str(tmp_path / "tm"))
+    tm.add_translation("Known.", "ज्ञात।", "en", "hi")
+    api = lambda text, *args: "\n".join(f"hi:{line}" for line in text.split("\n"))
+    pipeline = TranslationPipeline(tm, Glossary(str(tmp_path / "glossary")), api,
+                                   metrics=registry)
+
+    _, stats = pipeline.translate_batch(["Known. New.", "New. Known.", "New."], "en", "hi")
+    assert (stats["tm_exact"], stats["tm_misses"], stats["segments"]) == (2, 3, 5)
+    lookups = registry.get("translation_tm_lookups_total")
+    assert (lookups.value(result="exact"), lookups.value(result="miss")) == (2, 3)
@@ -0,0 +1,40 @@
+from app.utils.normalizer import normalize_segment, restore_tokens
+from app.utils.translation_memory import TranslationMemory
+
+
+def test_masks_placeholders_numbers_urls_and_emails():
+    key, tokens = normalize_segment("Send  {0} files (3.5 MB) to a@b.org via https://x.io/up.")
+    assert tokens == ["{0}", "3.5", "a@b.org", "https://x.io/up"]
+    assert key == ("send \x00placeholder\x00 files (\x00number\x00 mb) to \x00email\x00 "
+                   "via \x00url\x00.")
+
+
+def test_printf_and_named_placeholders():
+    _, tokens = normalize_segment("%1$s has %d new ${user.name} {count} items")
+    assert tokens == ["%1$s", "%d", "${user.name}", "{count}"]
+
+
+def test_restore_tokens_follows_reordered_placeholders():
+    target = "{1} में {0} फ़ाइलें"
+    assert restore_tokens(target, ["{0}", "{1}"], ["{0}", "{2}"]) == "{2} में {0} फ़ाइलें"
+
+
+def test_restore_tokens_does_not_match_inside_longer_numbers():
+    assert restore_tokens("10 में से 1", ["1", "10"], ["2", "20"]) == "20 में से 2"
+
+
+def test_restore_tokens_fails_when_a_changed_token_is_missing():
+    assert restore_tokens("कुछ फ़ाइलें", ["5"], ["7"]) is None
+    # An unchanged token may be absent (e.g. spelled out in the translation)
+    assert restore_tokens("पाँच फ़ाइलें", ["5"], ["5"]) == "पाँच फ़ाइलें"
+
+
+def test_tm_lookup_tiers(tmp_path):
+    tm = TranslationMemory(str(tmp_path))
+    tm.add_translation("Deleted 5 files", "5 फ़ाइलें हटाई गईं", "en", "hi")
+
+    assert tm.lookup("Deleted 5 files", "en", "hi") == ("5 फ़ाइलें हटाई गईं", 1.0, "exact")
+    assert tm.lookup("deleted  12 files", "en", "hi") == ("12 फ़ाइलें हटाई गईं", 1.0, "normalized")
+    translation, score, match_type = tm.lookup("Deleted 5 filez", "en", "hi")
+    assert match_type == "fuzzy" and 0.8 < score < 1.0
+    assert tm.lookup("Something else entirely", "en", "hi") is None
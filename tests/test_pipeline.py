@@ -0,0 +1,174 @@
+import pytest
+
+from app.utils.glossary import Glossary
+from app.utils.metrics import MetricsRegistry
+from app.utils.pipeline import TranslationPipeline
+from app.utils.result_cache import ResultCache
+from app.utils.segmenter import split_segments
+from app.utils.translation_memory import TranslationMemory
+
+
+class FakeAPI:
+    """Translates every line to "<target>:<line>" and records the requests"""
+
+    def __init__(self, merge_lines: bool = False):
+        self.requests = []
+        self.merge_lines = merge_lines
+
+    def __call__(self, text, source_lang, target_lang, translation_mode, output_script):
+        self.requests.append(text)
+        prefix = target_lang if translation_mode == "formal" else f"{target_lang}/{translation_mode}"
+        if output_script:
+            prefix += f"/{output_script}"
+        lines = [f"{prefix}:{line}" for line in text.split("\n")]
+        if self.merge_lines and len(lines) > 1:
+            return " ".join(lines)
+        return "\n".join(lines)
+
+
+@pytest.fixture
+def tm(tmp_path):
+    return TranslationMemory(str(tmp_path / "tm"))
+
+
+@pytest.fixture
+def glossary(tmp_path):
+    return Glossary(str(tmp_path / "glossary"))
+
+
+def _pipeline(tm, glossary, api, **kwargs) -> TranslationPipeline:
+    return TranslationPipeline(tm, glossary, api, metrics=MetricsRegistry(), **kwargs)
+
+
+def test_split_segments_round_trips_layout():
+    text = "  First one. Second!\n\n- 42\nतीसरा वाक्य। चौथा\n"
+    pieces = split_segments(text)
+    assert "".join(piece for piece, _ in pieces) == text
+    assert [piece for piece, translatable in pieces if translatable] == \
+        ["First one.", "Second!", "तीसरा वाक्य।", "चौथा"]
+
+
+def test_misses_are_batched_and_layout_is_kept(tm, glossary):
+    tm.add_translation("Known sentence.", "ज्ञात वाक्य।", "en", "hi")
+    api = FakeAPI()
+    pipeline = _pipeline(tm, glossary, api)
+
+    text = "Known sentence. New one!\n\n1.\nAnother line"
+    translation, stats = pipeline.translate(text, "en", "hi")
+
+    assert translation == "ज्ञात वाक्य। hi:New one!\n\n1.\nhi:Another line"
+    assert api.requests == ["New one!\nAnother line"]
+    assert stats["tm_exact"] == 1
+    assert stats["api_segments"] == 2
+    assert stats["api_calls"] == 1
+    # New translations are stored segment by segment
+    assert tm.storage.get("en", "hi", "Another line")["text"] == "hi:Another line"
+
+
+def test_character_counts_exclude_batch_separators(tm, glossary):
+    pipeline = _pipeline(tm, glossary, FakeAPI(), max_batch_chars=12)
+    texts = ["alpha beta\ngamma\ndelta", "gamma"]
+    _, stats = pipeline.translate_batch(texts, "en", "hi")
+
+    assert stats["api_characters"] == len("alpha beta") + len("gamma") + len("delta")
+    assert stats["characters"] == stats["api_characters"] + len("gamma")
+    assert stats["characters_saved"] == len("gamma")
+
+
+def test_merged_lines_fall_back_to_one_call_per_segment(tm, glossary):
+    api = FakeAPI(merge_lines=True)
+    pipeline = _pipeline(tm, glossary, api)
+    translations, stats = pipeline.translate_batch(["one", "two"], "en", "hi")
+
+    assert translations == ["hi:one", "hi:two"]
+    assert stats["api_calls"] == 3
+    assert stats["api_characters"] == len("one") + len("two")
+    assert stats["characters_saved"] >= 0
+
+
+def test_failure_after_claim_releases_waiters(tm, glossary):
+    cache = ResultCache()
+
+    def broken_glossary(*args):
+        raise RuntimeError("glossary broke")
+
+    glossary.apply_glossary = broken_glossary
+    pipeline = _pipeline(tm, glossary, FakeAPI(), result_cache=cache)
+    with pytest.raises(RuntimeError):
+        pipeline.translate("Hello there", "en", "hi", domain="technical")
+
+    assert cache.get_statistics()["in_flight"] == 0
+    # The next identical request leads again instead of waiting forever
+    _, is_leader = cache.claim(ResultCache.make_key("Hello there", "en", "hi", "formal",
+                                                    None, "technical"))
+    assert is_leader
+
+
+def test_modes_do_not_share_tm_entries(tm, glossary):
+    api = FakeAPI()
+    pipeline = _pipeline(tm, glossary, api, result_cache=ResultCache())
+
+    formal, stats = pipeline.translate("Good morning", "en", "hi", "formal")
+    assert formal == "hi:Good morning"
+    assert stats["api_segments"] == 1
+
+    colloquial, stats = pipeline.translate("Good morning", "en", "hi", "modern-colloquial")
+    assert colloquial == "hi/modern-colloquial:Good morning"
+    assert stats["tm_segments"] == 0 and stats["tm_misses"] == 0
+    assert stats["api_segments"] == 1
+
+    # The TM still holds the formal translation and serves formal requests only
+    assert tm.storage.get("en", "hi", "Good morning")["text"] == "hi:Good morning"
+    formal_again, stats = pipeline.translate("Good morning", "en", "hi", "formal")
+    assert formal_again == formal and stats["tm_exact"] == 1
+
+    # Other modes are answered by the result cache
+    colloquial_again, stats = pipeline.translate("Good morning", "en", "hi", "modern-colloquial")
+    assert colloquial_again == colloquial and stats["cache_hits"] == 1
+    assert len(api.requests) == 2
+
+
+def test_output_script_bypasses_the_tm(tm, glossary):
+    tm.add_translation("Thank you", "धन्यवाद", "en", "hi")
+    pipeline = _pipeline(tm, glossary, FakeAPI())
+
+    assert pipeline.translate("Thank you", "en", "hi", output_script="Default")[0] == "धन्यवाद"
+    assert pipeline.translate("Thank you", "en", "hi", output_script="roman")[0] == \
+        "hi/roman:Thank you"
+    assert tm.storage.get("en", "hi", "Thank you")["text"] == "धन्यवाद"
+
+
+def test_glossary_terms_apply_per_domain_on_tm_matches(tm, glossary):
+    glossary.add_term("server", "सर्वर", "en", "hi", domain="technical")
+    pipeline = _pipeline(tm, glossary, FakeAPI())
+
+    technical, _ = pipeline.translate("Restart the server", "en", "hi", domain="technical")
+    assert technical == "hi:Restart the सर्वर"
+    # The TM keeps the API's translation, so other domains do not inherit the term
+    assert tm.storage.get("en", "hi", "Restart the server")["text"] == "hi:Restart the server"
+    general, stats = pipeline.translate("Restart the server", "en", "hi", domain="general")
+    assert general == "hi:Restart the server" and stats["tm_exact"] == 1
+    technical_again, stats = pipeline.translate("Restart the server", "en", "hi",
+                                                domain="technical")
+    assert technical_again == technical and stats["tm_exact"] == 1
+
+
+def test_misses_of_a_request_are_fuzzy_matched_in_one_batch(tm, glossary, monkeypatch):
+    tm.add_translation("Save the file now.", "फ़ाइल अभी सहेजें।", "en", "hi")
+    tm.add_translation("Open the file now.", "फ़ाइल अभी खोलें।", "en", "hi")
+    monkeypatch.setattr(TranslationMemory, "BATCH_FUZZY_MIN", 2)
+    batches = []
+    find_matches = tm.find_matches
+    monkeypatch.setattr(tm, "find_matches", lambda segments, *args: (
+        batches.append(segments) or find_matches(segments, *args)))
+    api = FakeAPI()
+
+    translations, stats = _pipeline(tm, glossary, api).translate_batch(
+        ["Save the file now!", "Open the file now!", "Save the file now.", "Brand new text"],
+        "en", "hi")
+
+    assert translations == ["फ़ाइल अभी सहेजें।", "फ़ाइल अभी खोलें।", "फ़ाइल अभी सहेजें।",
+                            "hi:Brand new text"]
+    assert batches == [["Save the file now!", "Open the file now!", "Brand new text"]]
+    assert (stats["tm_exact"], stats["tm_fuzzy"], stats["tm_misses"]) == (1, 2, 1)
+    assert tm._usage[("en", "hi", "Save the file now.")][0] == 2
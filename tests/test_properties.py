@@ -0,0 +1,71 @@
+import pytest
+
+from app.utils.properties import PropertiesFile, escape, unescape
+
+
+@pytest.mark.parametrize("text", [
+    "plain value",
+    " leading space",
+    "tab\tnew\nline\rcr\fform",
+    "back\\slash",
+    "हिन्दी और தமிழ்",
+    "emoji 😀 outside the BMP",
+    "trailing = and : and # kept",
+])
+def test_value_escape_round_trip(text):
+    escaped = escape(text)
+    assert escaped.isascii()
+    assert unescape(escaped) == text
+
+
+def test_keys_escape_separators_and_spaces():
+    key = "a key=with:separators#!"
+    escaped = escape(key, is_key=True)
+    assert escaped == "a\\ key\\=with\\:separators\\#\\!"
+    assert PropertiesFile.parse(f"{escaped}=v\n").values == {key: "v"}
+
+
+def test_non_bmp_characters_are_written_as_surrogate_pairs():
+    assert escape("😀") == "\\uD83D\\uDE00"
+    assert unescape("\\ud83d\\ude00") == "😀"
+
+
+def test_unescape_keeps_unknown_and_incomplete_escapes():
+    assert unescape("\\q\\u12") == "qu12"
+    assert unescape("end\\") == "end\\"
+
+
+def test_parse_separators_and_continuations():
+    text = ("# comment \\\n"
+            "! other comment\n"
+            "\n"
+            "a=1\n"
+            "b : 2\n"
+            "c 3\n"
+            "d\n"
+            "e = long \\\n"
+            "    value\n"
+            "f = even\\\\\n"
+            "g=\\u0939\\u093f\n")
+    bundle = PropertiesFile.parse(text)
+    assert bundle.values == {"a": "1", "b": "2", "c": "3", "d": "", "e": "long value",
+                             "f": "even\\", "g": "हि"}
+    # Comments never continue, so "! other comment" is a comment of its own
+    assert [key for _, key in bundle.lines] == [None, None, None, "a", "b", "c", "d", "e",
+                                                "f", "g"]
+
+
+def test_render_keeps_layout_and_drops_missing_keys():
+    bundle = PropertiesFile.parse("# Header\n\ngreeting=Hello\nfarewell=Bye\n")
+    rendered = bundle.render({"greeting": "नमस्ते"})
+    assert rendered == "# Header\n\ngreeting=\\u0928\\u092E\\u0938\\u094D\\u0924\\u0947\n"
+    assert PropertiesFile.parse(rendered).values == {"greeting": "नमस्ते"}
+
+
+def test_load_accepts_utf8_and_latin1(tmp_path):
+    utf8 = tmp_path / "utf8.properties"
+    utf8.write_bytes("k=नमस्ते\n".encode("utf-8"))
+    latin1 = tmp_path / "latin1.properties"
+    latin1.write_bytes("k=caf\xe9\n".encode("latin-1"))
+    assert PropertiesFile.load(str(utf8)).values == {"k": "नमस्ते"}
+    assert PropertiesFile.load(str(latin1)).values == {"k": "café"}
@@ -0,0 +1,142 @@
+import pytest
+import requests
+
+from app.utils import sarvam_client
+from app.utils.metrics import MetricsRegistry
+from app.utils.sarvam_client import SarvamAPIError, SarvamClient, TokenBucket
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.headers = headers or {}
+        self.text = str(body)
+
+    def json(self):
+        return self._body
+
+
+class FakeSession:
+    """Stands in for requests.Session, replaying scripted outcomes"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.payloads = []
+
+    def post(self, endpoint, json=None, timeout=None):
+        self.payloads.append(json)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if callable(outcome):
+            return outcome(json)
+        return outcome
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(sarvam_client.time, "sleep", delays.append)
+    return delays
+
+
+def _client(outcomes, **kwargs):
+    metrics = MetricsRegistry()
+    client = SarvamClient("key", rate_limit=1000, burst=1000, metrics=metrics, **kwargs)
+    client.session = FakeSession(outcomes)
+    return client, metrics
+
+
+def test_successful_request_payload(sleeps):
+    client, metrics = _client([FakeResponse(200, {"translated_text": "नमस्ते"})])
+    assert client.translate("Hello", "en-IN", "hi-IN", "formal", "Roman") == "नमस्ते"
+    assert client.session.payloads == [{
+        "input": "Hello", "source_language_code": "en-IN", "target_language_code": "hi-IN",
+        "mode": "formal", "output_script": "roman"
+    }]
+    assert metrics.get("sarvam_api_requests_total").value(status="200") == 1
+    assert sleeps == []
+
+
+def test_throttled_requests_honour_retry_after(sleeps):
+    client, metrics = _client([
+        FakeResponse(429, headers={"Retry-After": "2"}),
+        FakeResponse(503, headers={"Retry-After": "60"}),
+        FakeResponse(200, {"translated_text": "ok"}),
+    ], max_backoff=8.0)
+    assert client.translate("Hi", "en-IN", "hi-IN") == "ok"
+    # Retry-After is honoured up to max_backoff
+    assert sleeps == [2.0, 8.0]
+    assert metrics.get("sarvam_api_retries_total").value(reason="429") == 1
+    assert metrics.get("sarvam_api_retries_total").value(reason="503") == 1
+
+
+def test_client_errors_are_not_retried(sleeps):
+    client, metrics = _client([FakeResponse(400, {"error": "bad"})])
+    with pytest.raises(SarvamAPIError) as error:
+        client.translate("Hi", "en-IN", "hi-IN")
+    assert error.value.status_code == 400
+    assert sleeps == []
+    assert metrics.get("sarvam_api_failures_total").value() == 1
+
+
+class InvalidJSONResponse(FakeResponse):
+    def json(self):
+        raise ValueError("Expecting value: line 1 column 1 (char 0)")
+
+
+@pytest.mark.parametrize("response", [
+    InvalidJSONResponse(200, "<html>proxy error</html>"),
+    FakeResponse(200, {"translation": "नमस्ते"}),
+    FakeResponse(200, ["नमस्ते"]),
+    FakeResponse(200, {"translated_text": None}),
+])
+def test_malformed_success_bodies_raise_api_errors(sleeps, response):
+    client, metrics = _client([response])
+    with pytest.raises(SarvamAPIError) as error:
+        client.translate("Hi", "en-IN", "hi-IN")
+    assert str(error.value) == "Malformed response"
+    assert error.value.status_code == 200
+    assert error.value.response_text == response.text
+    assert sleeps == []
+    assert metrics.get("sarvam_api_failures_total").value() == 1
+
+
+def test_network_errors_retry_with_bounded_backoff(sleeps):
+    client, metrics = _client([requests.ConnectionError("down")] * 3, max_retries=2,
+                              backoff=0.5, max_backoff=8.0)
+    with pytest.raises(SarvamAPIError):
+        client.translate("Hi", "en-IN", "hi-IN")
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+    assert metrics.get("sarvam_api_requests_total").value(status="connection_error") == 3
+
+
+def test_translate_many_keeps_input_order(sleeps):
+    echo = lambda payload: FakeResponse(200, {"translated_text": payload["input"].upper()})
+    client, _ = _client([echo] * 5)
+    assert client.translate_many(["a", "b", "c", "d", "e"], "en-IN", "hi-IN") == \
+        ["A", "B", "C", "D", "E"]
+    client.close()
+
+
+def test_token_bucket_allows_a_burst_then_paces(monkeypatch):
+    clock = [100.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        clock[0] += seconds
+
+    monkeypatch.setattr(sarvam_client.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(sarvam_client.time, "sleep", sleep)
+    bucket = TokenBucket(rate=2.0, capacity=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert waits == []
+    bucket.acquire()
+    assert waits == [pytest.approx(0.5)]
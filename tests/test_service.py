@@ -0,0 +1,44 @@
+import pytest
+
+from app.utils.glossary import Glossary
+from app.utils.service import TranslationService
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = TranslationService(f"sqlite:{tmp_path / 'tm.sqlite3'}", str(tmp_path / "glossary"))
+    service.pipeline.translate_fn = lambda text, *args: f"hi:{text}"
+    yield service
+    service.close()
+
+
+def test_glossary_edits_of_another_process_are_picked_up(service, tmp_path):
+    assert not service.refresh_glossary()
+    _, stats = service.pipeline.translate("Restart the server", "en", "hi", domain="technical")
+    assert stats["api_segments"] == 1
+
+    editor = Glossary(str(tmp_path / "glossary"))
+    editor.add_term("server", "सर्वर", "en", "hi", domain="technical")
+    editor.journal.commit()
+
+    assert service.refresh_glossary()
+    assert service.pipeline.glossary is service.glossary
+    assert service.glossary.get_domains() == ["technical"]
+    # Results cached with the old glossary are not served any more
+    translation, stats = service.pipeline.translate("Restart the server", "en", "hi",
+                                                    domain="technical")
+    assert translation == "hi:Restart the सर्वर" and stats["cache_hits"] == 0
+    assert not service.refresh_glossary()
+
+    # A compaction rewrites both files and is picked up as well
+    editor.add_terms([("cloud", "बादल", "en", "hi", "weather", None)])
+    assert service.refresh_glossary()
+    assert service.glossary.get_term("cloud", "en", "hi", "weather") == "बादल"
+
+
+def test_service_leaves_a_record_being_written_in_place(service, tmp_path):
+    journal = tmp_path / "glossary" / "glossary.journal.jsonl"
+    journal.write_bytes(b'{"op": "add", "source_lang": "en"')
+
+    assert service.refresh_glossary()
+    assert journal.read_bytes() == b'{"op": "add", "source_lang": "en"'
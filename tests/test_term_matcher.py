@@ -0,0 +1,62 @@
+import random
+import re
+
+from app.utils.term_matcher import TermMatcher
+
+
+def _regex_replace(terms, text):
+    """Reference: longest terms first, on word boundaries, case-insensitive"""
+    ordered = sorted(terms, key=len, reverse=True)
+    pattern = re.compile(r"(?<![\w])(" + "|".join(map(re.escape, ordered)) + r")(?![\w])",
+                         re.IGNORECASE)
+
+    def substitute(match):
+        translation = terms[match.group(0).lower()]
+        if match.group(0)[:1].isupper():
+            translation = translation[:1].upper() + translation[1:]
+        return translation
+
+    return pattern.sub(substitute, text)
+
+
+def test_matches_only_whole_words():
+    matcher = TermMatcher({"cat": "बिल्ली"})
+    assert matcher.replace("cat category bobcat cat_1 cat.") == "बिल्ली category bobcat cat_1 बिल्ली."
+
+
+def test_indic_vowel_signs_are_part_of_the_word():
+    matcher = TermMatcher({"कम": "less", "काम": "work"})
+    # "कमरा" continues with a consonant, "कमी" with a vowel sign: neither is the word "कम"
+    assert matcher.replace("कम कमरा कमी काम") == "less कमरा कमी work"
+
+
+def test_longest_match_wins_and_matches_do_not_overlap():
+    matcher = TermMatcher({"file": "फ़ाइल", "file server": "फ़ाइल सर्वर", "server": "सर्वर"})
+    assert matcher.replace("the file server and the server file") == \
+        "the फ़ाइल सर्वर and the सर्वर फ़ाइल"
+
+
+def test_suffix_terms_found_through_failure_links():
+    matcher = TermMatcher({"abcd": "X", "bc": "Y", "c": "Z"})
+    assert matcher.replace("abc bc c abcd") == "abc Y Z X"
+
+
+def test_case_insensitive_with_capitalized_translation():
+    matcher = TermMatcher({"server": "sunucu"})
+    assert matcher.replace("Server down, SERVER up, server ok") == "Sunucu down, Sunucu up, sunucu ok"
+
+
+def test_empty_matcher_returns_text_unchanged():
+    matcher = TermMatcher({})
+    assert len(matcher) == 0
+    assert matcher.replace("nothing to do") == "nothing to do"
+
+
+def test_agrees_with_regex_reference():
+    rng = random.Random(3)
+    vocabulary = ["ab", "abc", "bc", "b", "cab", "ca", "x"]
+    terms = {term: term.upper() + "!" for term in rng.sample(vocabulary, 5)}
+    matcher = TermMatcher(terms)
+    for _ in range(500):
+        text = "".join(rng.choice(["ab", "c", " ", "x", "b", "-", "a"]) for _ in range(12))
+        assert matcher.replace(text) == _regex_replace(terms, text), text
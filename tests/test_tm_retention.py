@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils.tm_retention import (DEFAULT_POLICY, RetentionPolicy, apply_retention,
+                                    compact_duplicates, load_policies, most_used,
+                                    save_policies)
+from app.utils.translation_memory import TranslationMemory
+
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.fixture
+def tm(tmp_path):
+    return TranslationMemory(str(tmp_path / "tm"))
+
+
+def _put(tm, source, text="t", timestamp="2024-05-01T00:00:00", **extra):
+    tm.storage.put_many([("en", "hi", source,
+                          dict({"text": text, "context": None, "timestamp": timestamp}, **extra))])
+
+
+def _sources(tm):
+    return sorted(source for _, _, source, _ in tm.storage.iter_entries("en", "hi"))
+
+
+def test_policies_round_trip(tmp_path):
+    path = str(tmp_path / "retention.json")
+    assert load_policies(path) == {}
+    save_policies(path, {DEFAULT_POLICY: RetentionPolicy(100, "lfu", 30, False)})
+    assert load_policies(path)[DEFAULT_POLICY].to_dict() == {
+        "max_entries": 100, "strategy": "lfu", "max_age_days": 30, "pin_imported": False}
+    with pytest.raises(ValueError):
+        RetentionPolicy(strategy="fifo")
+
+
+def test_expiry_uses_last_use_and_spares_imports(tm):
+    _put(tm, "old unused", timestamp="2024-01-01T00:00:00")
+    _put(tm, "old but used", timestamp="2024-01-01T00:00:00", last_used="2024-05-20T00:00:00")
+    _put(tm, "old import", timestamp="2024-01-01T00:00:00", origin="tmx")
+    _put(tm, "recent", timestamp="2024-05-25T00:00:00")
+
+    [stats] = apply_retention(tm, {"en->hi": RetentionPolicy(max_age_days=30)}, now=NOW)
+    assert (stats["expired"], stats["pinned"], stats["remaining"]) == (1, 1, 3)
+    assert _sources(tm) == ["old but used", "old import", "recent"]
+
+
+@pytest.mark.parametrize("strategy, kept", [("lru", ["b", "c"]), ("lfu", ["a", "c"])])
+def test_eviction_order(tm, strategy, kept):
+    _put(tm, "a", hits=9, last_used="2024-05-01T00:00:00")
+    _put(tm, "b", hits=1, last_used="2024-05-20T00:00:00")
+    _put(tm, "c", hits=5, last_used="2024-05-21T00:00:00")
+
+    [stats] = apply_retention(tm, {DEFAULT_POLICY: RetentionPolicy(2, strategy)}, now=NOW)
+    assert stats["evicted"] == 1
+    assert _sources(tm) == kept
+
+
+def test_buffered_usage_counts_before_eviction(tm):
+    _put(tm, "a", hits=1)
+    _put(tm, "b", hits=2)
+    for _ in range(3):
+        tm.lookup("a", "en", "hi")
+
+    apply_retention(tm, {DEFAULT_POLICY: RetentionPolicy(1, "lfu")}, now=NOW)
+    assert _sources(tm) == ["a"]
+    assert tm.storage.get("en", "hi", "a")["hits"] == 4
+
+
+def test_compact_duplicates_keeps_the_most_used_entry(tm):
+    _put(tm, "Deleted 5 files", "5 फ़ाइलें हटाई गईं", hits=1, last_used="2024-05-02T00:00:00")
+    _put(tm, "Deleted 12 files", "12 फ़ाइलें हटाई गईं", hits=4, last_used="2024-05-01T00:00:00")
+    _put(tm, "Open the file", "फ़ाइल खोलें")
+    _put(tm, "Open the file.", "फ़ाइल खोलें")
+    _put(tm, "Open the file!", "फ़ाइल खोलें!", origin="tmx")
+
+    stats = compact_duplicates(tm, "en", "hi")
+    assert (stats["normalized_duplicates"], stats["similar_duplicates"]) == (1, 1)
+    assert _sources(tm) == ["Deleted 12 files", "Open the file", "Open the file!"]
+    kept = tm.storage.get("en", "hi", "Deleted 12 files")
+    assert (kept["hits"], kept["last_used"]) == (5, "2024-05-02T00:00:00")
+
+
+def test_most_used_counts_buffered_hits(tm):
+    _put(tm, "a", "ए", hits=3, last_used="2024-05-01T00:00:00")
+    _put(tm, "b", "बी", hits=3, last_used="2024-05-03T00:00:00")
+    _put(tm, "c", "सी", hits=1, last_used="2024-05-02T00:00:00")
+    _put(tm, "unused")
+    tm.lookup("c", "en", "hi")
+    tm.lookup("c", "en", "hi")
+
+    top = most_used(tm, "en", "hi", limit=2)
+    assert [(hits, source) for hits, _, source, _ in top] == [(3, "c"), (3, "b")]
+    assert top[1] == (3, "2024-05-03T00:00:00", "b", "बी")
+    assert len(most_used(tm, "en", "hi")) == 3
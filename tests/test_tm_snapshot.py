@@ -0,0 +1,113 @@
+import json
+import struct
+import sys
+from array import array
+
+import pytest
+
+from app.utils.tm_snapshot import (_HEADER, _SECTIONS, NO_TIMESTAMP, Snapshot, TMRecord,
+                                   _timestamp_iso, _timestamp_micros, write_snapshot)
+
+RECORDS = [
+    ("Save", TMRecord("सहेजें", "TMX Import", "2024-03-01T10:20:30")),
+    ("Open", TMRecord("खोलें", None, "2024-03-01T10:20:30.123456", {"origin": "tmx", "hits": 3})),
+    ("Close", TMRecord("बंद करें", "TMX Import", None)),
+    ("Zone", TMRecord("क्षेत्र", None, "2024-03-01T10:20:30+05:30")),
+]
+
+
+def _write(path, records=RECORDS):
+    write_snapshot(str(path), [("en", "hi", iter(records)), ("en", "ta", iter([]))])
+
+
+def _as_tuples(records):
+    return [(source, record.text, record.context, record.timestamp, record.meta)
+            for source, record in records]
+
+
+@pytest.mark.parametrize("timestamp", [
+    "2024-03-01T10:20:30",
+    "2024-03-01T10:20:30.000001",
+    "0001-01-01T00:00:00",
+    "9999-12-31T23:59:59.999999",
+])
+def test_iso_timestamps_are_encoded_as_microseconds(timestamp):
+    micros = _timestamp_micros(timestamp)
+    assert isinstance(micros, int) and micros != NO_TIMESTAMP
+    assert _timestamp_iso(micros) == timestamp
+
+
+@pytest.mark.parametrize("timestamp", [
+    "2024-03-01T10:20:30+05:30",  # time zone
+    "2024-03-01 10:20:30",        # not in isoformat() form
+    "2024-03-01",
+    "yesterday",
+])
+def test_other_timestamps_are_not_encoded(timestamp):
+    assert _timestamp_micros(timestamp) is None
+
+
+def test_missing_timestamp():
+    assert _timestamp_micros(None) == NO_TIMESTAMP
+    assert _timestamp_iso(NO_TIMESTAMP) is None
+
+
+def test_round_trip_keeps_order_and_fields(tmp_path):
+    path = tmp_path / "tm.tmsnap"
+    _write(path)
+    snapshot = Snapshot(str(path))
+    pair = snapshot.pair("en", "hi")
+
+    assert _as_tuples(pair) == _as_tuples(RECORDS)
+    assert pair.find("Open") == 1 and pair.find("Missing") == -1
+    assert pair.timestamp(3) == "2024-03-01T10:20:30+05:30"
+    assert snapshot.count("en", "ta") == 0
+    assert snapshot.language_pairs() == [("en", "hi"), ("en", "ta")]
+    snapshot.close()
+
+
+def test_snapshot_of_the_other_byte_order_is_swapped_on_read(tmp_path):
+    path = tmp_path / "tm.tmsnap"
+    _write(path)
+
+    # Rewrite the file as a machine of the other byte order would have
+    data = bytearray(path.read_bytes())
+    magic, offset, length = _HEADER.unpack_from(data)
+    directory = json.loads(data[offset:offset + length])
+    for info in directory["pairs"]:
+        for name, code in _SECTIONS:
+            if code is None:
+                continue
+            start, size = info["sections"][name]
+            values = array(code, bytes(data[start:start + size]))
+            values.byteswap()
+            data[start:start + size] = values.tobytes()
+    other = "big" if sys.byteorder == "little" else "little"
+    directory["byteorder"] = other
+    encoded = json.dumps(directory).encode("utf-8")
+    data[offset:] = encoded
+    # The header is little-endian on every machine
+    data[:_HEADER.size] = _HEADER.pack(magic, offset, len(encoded))
+    path.write_bytes(bytes(data))
+
+    snapshot = Snapshot(str(path))
+    pair = snapshot.pair("en", "hi")
+    assert _as_tuples(pair) == _as_tuples(RECORDS)
+    assert pair.find("Close") == 2
+    snapshot.close()
+
+
+def test_header_is_little_endian(tmp_path):
+    path = tmp_path / "tm.tmsnap"
+    _write(path)
+    raw = path.read_bytes()
+    magic, offset, length = struct.unpack("<8sQQ", raw[:_HEADER.size])
+    assert magic == b"TMSNAP01"
+    assert json.loads(raw[offset:offset + length])["byteorder"] == sys.byteorder
+
+
+def test_not_a_snapshot(tmp_path):
+    path = tmp_path / "tm.tmsnap"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        Snapshot(str(path))
@@ -0,0 +1,193 @@
+import os
+
+import pytest
+
+from app.utils.tm_storage import (JSONStorage, PostgresStorage, SnapshotStorage, SQLiteStorage,
+                                  StorageLockedError, migrate, open_storage)
+from app.utils.translation_memory import TranslationMemory
+
+
+def _open(kind: str, path) -> "TMStorage":
+    if kind == "json":
+        return JSONStorage(str(path))
+    if kind == "snapshot":
+        return SnapshotStorage(str(path))
+    if kind == "sqlite":
+        return SQLiteStorage(str(path / "tm.sqlite3"))
+    return PostgresStorage(os.environ["TM_TEST_POSTGRES_URL"])
+
+
+BACKENDS = ["json", "snapshot", "sqlite",
+            pytest.param("postgres", marks=pytest.mark.skipif(
+                not os.getenv("TM_TEST_POSTGRES_URL"),
+                reason="set TM_TEST_POSTGRES_URL to test against PostgreSQL"))]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request, tmp_path):
+    opened = []
+
+    def factory():
+        storage = _open(request.param, tmp_path)
+        opened.append(storage)
+        return storage
+
+    yield factory
+    for storage in opened:
+        storage.close()
+
+
+def _entry(text, timestamp="2024-01-01T00:00:00", **extra):
+    return dict({"text": text, "context": None, "timestamp": timestamp}, **extra)
+
+
+def test_put_get_replace_and_delete(backend):
+    storage = backend()
+    storage.put_many([("en", "hi", "Save", _entry("सहेजें", origin="tmx")),
+                      ("en", "ta", "Save", _entry("சேமி"))])
+    assert storage.get("en", "hi", "Save") == _entry("सहेजें", origin="tmx")
+    assert storage.get("en", "hi", "Missing") is None
+
+    storage.put_many([("en", "hi", "Save", _entry("सेव करें"))])
+    assert storage.get("en", "hi", "Save")["text"] == "सेव करें"
+    assert storage.count() == 2 and storage.count("en", "hi") == 1
+
+    assert storage.delete_many([("en", "hi", "Save"), ("en", "hi", "Missing")]) == 1
+    assert storage.get("en", "hi", "Save") is None
+    assert storage.count() == 1
+
+
+def test_iteration_filters_and_pairs(backend):
+    storage = backend()
+    storage.put_many([("en", "hi", "Old", _entry("पुराना", "2020-01-01T00:00:00")),
+                      ("en", "hi", "New", _entry("नया", "2024-06-01T00:00:00")),
+                      ("en", "ta", "New", _entry("புதிய", "2024-06-01T00:00:00"))])
+    assert sorted(storage.language_pairs()) == [("en", "hi"), ("en", "ta")]
+    assert [source for _, _, source, _ in storage.iter_entries("en", "hi")] == ["Old", "New"]
+    recent = storage.iter_entries(modified_since="2023-01-01T00:00:00")
+    assert sorted((tgt, source) for _, tgt, source, _ in recent) == [("hi", "New"), ("ta", "New")]
+
+
+def test_iter_sources_cursor_only_returns_new_sources(backend):
+    storage = backend()
+    storage.put_many([("en", "hi", "one", _entry("एक")), ("en", "hi", "two", _entry("दो"))])
+    seen = list(storage.iter_sources("en", "hi"))
+    assert [source for _, source in seen] == ["one", "two"]
+
+    cursor = seen[-1][0]
+    storage.put_many([("en", "hi", "three", _entry("तीन")), ("en", "hi", "one", _entry("१"))])
+    assert [source for _, source in storage.iter_sources("en", "hi", cursor)] == ["three"]
+
+
+def test_entries_survive_reopen_and_compaction(backend):
+    storage = backend()
+    storage.put_many([("en", "hi", f"s{i}", _entry(f"t{i}", hits=i)) for i in range(20)])
+    storage.delete_many([("en", "hi", "s3")])
+    storage.flush()
+    storage.compact()
+    storage.put_many([("en", "hi", "after", _entry("बाद में"))])
+    storage.flush()
+    storage.close()
+
+    reopened = backend()
+    assert reopened.count("en", "hi") == 20
+    assert reopened.get("en", "hi", "s7") == _entry("t7", hits=7)
+    assert reopened.get("en", "hi", "s3") is None
+    assert reopened.get("en", "hi", "after")["text"] == "बाद में"
+
+
+def test_open_storage_urls(tmp_path):
+    assert isinstance(open_storage(f"json:{tmp_path / 'j'}"), JSONStorage)
+    assert isinstance(open_storage(f"snapshot:{tmp_path / 's'}"), SnapshotStorage)
+    assert isinstance(open_storage(str(tmp_path / "bare")), SnapshotStorage)
+    sqlite = open_storage(f"sqlite:{tmp_path / 'tm.sqlite3'}")
+    assert isinstance(sqlite, SQLiteStorage)
+    sqlite.close()
+
+
+def test_migrate_copies_every_entry(tmp_path):
+    source = JSONStorage(str(tmp_path / "json"))
+    source.put_many([("en", "hi", f"s{i}", _entry(f"t{i}")) for i in range(7)])
+    source.close()
+
+    copied = migrate(f"json:{tmp_path / 'json'}", f"sqlite:{tmp_path / 'tm.sqlite3'}",
+                     batch_size=3)
+    assert copied == 7
+    target = SQLiteStorage(str(tmp_path / "tm.sqlite3"))
+    assert target.get("en", "hi", "s5") == _entry("t5")
+    target.close()
+
+
+@pytest.mark.parametrize("storage_class", [JSONStorage, SnapshotStorage])
+def test_journal_backends_refuse_a_second_writer(tmp_path, storage_class):
+    storage = storage_class(str(tmp_path))
+    storage.put_many([("en", "hi", "kept", _entry("रखा"))])
+    with pytest.raises(StorageLockedError):
+        storage_class(str(tmp_path))
+
+    storage.close()
+    reopened = storage_class(str(tmp_path))
+    assert reopened.get("en", "hi", "kept")["text"] == "रखा"
+    reopened.close()
+
+
+def test_sqlite_deletes_invalidate_other_processes_indexes(tmp_path):
+    path = str(tmp_path / "tm.sqlite3")
+    writer = TranslationMemory(storage=SQLiteStorage(path))
+    reader = TranslationMemory(storage=SQLiteStorage(path))
+    writer.add_translation("Delete 5 files", "5 फ़ाइलें हटाएं", "en", "hi")
+    assert reader.find_normalized("Delete 7 files", "en", "hi") == "7 फ़ाइलें हटाएं"
+
+    epoch = reader.storage.epoch
+    writer.delete_translations([("en", "hi", "Delete 5 files")])
+    assert reader.storage.epoch == epoch + 1
+    writer.add_translation("Delete 9 files", "9 फ़ाइलें मिटाएं", "en", "hi")
+    # The reader drops the deleted source instead of shadowing the new one
+    assert reader.find_normalized("Delete 7 files", "en", "hi") == "7 फ़ाइलें मिटाएं"
+    writer.storage.close()
+    reader.storage.close()
+
+
+def test_add_usage_only_touches_usage_fields(backend):
+    storage = backend()
+    storage.put_many([("en", "hi", "Save", _entry("सहेजें", origin="tmx")),
+                      ("en", "hi", "Gone", _entry("गया"))])
+    assert storage.add_usage([("en", "hi", "Save", 2, "2024-05-01T00:00:00")]) == 1
+
+    # A newer translation and a deletion that happened after the hits were counted
+    storage.put_many([("en", "hi", "Save", _entry("सेव करें", "2024-06-01T00:00:00",
+                                                   origin="tmx", hits=2,
+                                                   last_used="2024-05-01T00:00:00"))])
+    storage.delete_many([("en", "hi", "Gone")])
+    assert storage.add_usage([("en", "hi", "Save", 3, "2024-04-01T00:00:00"),
+                              ("en", "hi", "Gone", 1, "2024-07-01T00:00:00"),
+                              ("en", "hi", "Missing", 1, "2024-07-01T00:00:00")]) == 1
+
+    expected = _entry("सेव करें", "2024-06-01T00:00:00", origin="tmx", hits=5,
+                      last_used="2024-05-01T00:00:00")
+    assert storage.get("en", "hi", "Save") == expected
+    assert storage.get("en", "hi", "Gone") is None
+    storage.flush()
+    storage.close()
+
+    reopened = backend()
+    assert reopened.get("en", "hi", "Save") == expected
+    assert reopened.get("en", "hi", "Gone") is None
+    assert reopened.count() == 1
+
+
+@pytest.mark.parametrize("storage_class", [JSONStorage, SnapshotStorage])
+def test_usage_flushes_never_compact(tmp_path, monkeypatch, storage_class):
+    monkeypatch.setattr(storage_class, "COMPACT_EVERY", 2)
+    storage = storage_class(str(tmp_path))
+    tm = TranslationMemory(storage=storage)
+    tm.add_translations([("en", "hi", "Save", "सहेजें")])
+    compactions = []
+    monkeypatch.setattr(storage, "compact", lambda: compactions.append(1))
+
+    for _ in range(5):
+        assert tm.lookup("Save", "en", "hi")[2] == "exact"
+        assert tm.flush_usage() == 1
+    assert compactions == []
+    assert storage.get("en", "hi", "Save")["hits"] == 5
+    storage.close()
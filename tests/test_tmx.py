@@ -0,0 +1,105 @@
+import io
+
+import pytest
+
+from app.utils.tm_storage import JSONStorage, SnapshotStorage
+from app.utils.translation_memory import TranslationMemory, unescape_unicode
+
+
+def _tmx(units) -> bytes:
+    body = "".join(
+        f'<tu><tuv xml:lang="{src_lang}"><seg>{source}</seg></tuv>'
+        f'<tuv xml:lang="{tgt_lang}"><seg>{target}</seg></tuv></tu>'
+        for src_lang, tgt_lang, source, target in units
+    )
+    return (f'<?xml version="1.0" encoding="utf-8"?><tmx version="1.4"><header/>'
+            f'<body>{body}</body></tmx>').encode("utf-8")
+
+
+@pytest.fixture(params=[SnapshotStorage, JSONStorage])
+def tm(request, tmp_path):
+    return TranslationMemory(str(tmp_path), storage=request.param(str(tmp_path)))
+
+
+def test_import_tmx_counts_and_stores_units(tm):
+    data = _tmx([("en", "hi", "Save", "सहेजें"), ("en", "hi", "Open", "खोलें"),
+                 ("en", "hi", "Save", "सहेजें"), ("en", "hi", "", "खाली")])
+    batches = []
+    stats = tm.import_tmx(io.BytesIO(data), progress_callback=batches.append, batch_size=1)
+
+    assert stats == {"processed": 4, "imported": 2, "skipped": 1, "duplicates": 1,
+                     "progress": 1.0}
+    assert tm.storage.get("en", "hi", "Open")["text"] == "खोलें"
+    assert tm.storage.get("en", "hi", "Save")["origin"] == "tmx"
+    assert batches[-1]["imported"] == 2
+
+
+def test_import_tmx_decodes_java_unicode_escapes(tm):
+    tm.import_tmx(io.BytesIO(_tmx([("en", "hi", "Yes", "\\u0939\\u093e\\u0901")])))
+    assert tm.storage.get("en", "hi", "Yes")["text"] == "हाँ"
+    assert unescape_unicode("\\ud83d\\ude00 ok") == "\U0001F600 ok"
+
+
+def test_import_tmx_compacts_once(tm, monkeypatch):
+    storage = tm.storage
+    monkeypatch.setattr(type(storage), "COMPACT_EVERY", 10)
+    compactions = []
+    compact = storage.compact
+    monkeypatch.setattr(storage, "compact", lambda: (compactions.append(1), compact()))
+
+    units = [("en", "hi", f"segment {i}", f"खंड {i}") for i in range(95)]
+    stats = tm.import_tmx(io.BytesIO(_tmx(units)), batch_size=10)
+
+    assert stats["imported"] == 95
+    assert len(compactions) == 1
+    assert storage.count("en", "hi") == 95
+
+
+def test_writes_outside_bulk_still_compact(tmp_path, monkeypatch):
+    monkeypatch.setattr(SnapshotStorage, "COMPACT_EVERY", 3)
+    storage = SnapshotStorage(str(tmp_path))
+    storage.put_many([("en", "hi", f"s{i}", {"text": f"t{i}"}) for i in range(3)])
+    assert storage.journal.records == 0
+
+    with storage.bulk():
+        with storage.bulk():
+            storage.put_many([("en", "hi", f"b{i}", {"text": f"t{i}"}) for i in range(5)])
+        assert storage.journal.records == 5
+    assert storage.journal.records == 0
+    storage.close()
+    assert SnapshotStorage(str(tmp_path)).count() == 8
+
+
+def test_export_tmx_round_trips_escaped_text(tm, tmp_path):
+    tm.add_translation('Fish & <chips> "now"', "मछली & <चिप्स>", "en", "hi")
+    tm.add_translation("Hello", "வணக்கம்", "en", "ta")
+    output = io.BytesIO()
+    assert tm.export_tmx(output) == 2
+
+    copy = TranslationMemory(str(tmp_path / "copy"), storage=SnapshotStorage(str(tmp_path / "copy")))
+    stats = copy.import_tmx(io.BytesIO(output.getvalue()))
+    assert stats["imported"] == 2
+    assert copy.storage.get("en", "hi", 'Fish & <chips> "now"')["text"] == "मछली & <चिप्स>"
+    assert copy.storage.get("en", "ta", "Hello")["text"] == "வணக்கம்"
+
+
+def test_export_tmx_filters_by_pair_and_date(tm):
+    from datetime import datetime, timedelta
+
+    tm.add_translation("Hello", "नमस्ते", "en", "hi")
+    tm.add_translation("Hello", "வணக்கம்", "en", "ta")
+    output = io.BytesIO()
+    assert tm.export_tmx(output, source_lang="en", target_lang="ta") == 1
+    assert "வணக்கம்" in output.getvalue().decode("utf-8")
+    assert tm.export_tmx(io.BytesIO(), modified_since=datetime.now() + timedelta(days=1)) == 0
+
+
+def test_iter_tmx_yields_bounded_chunks(tm):
+    tm.add_translations([("en", "hi", f"segment {i}", f"खंड {i}") for i in range(25)])
+    counter = {}
+    chunks = list(tm.iter_tmx(counter=counter, units_per_chunk=10))
+    # Header, two full chunks, then the last five units with the footer
+    assert len(chunks) == 4
+    assert [chunk.count(b"<tu") - chunk.count(b"<tuv") for chunk in chunks] == [0, 10, 10, 5]
+    assert counter["units"] == 25
+    assert chunks[-1].endswith(b"</tmx>\n")
@@ -0,0 +1,143 @@
+import unicodedata
+
+import pytest
+
+from app.utils.tm_storage import SnapshotStorage
+from app.utils.tmx_ingest import collect_tmx_files, content_hash, ingest_tmx
+from app.utils.translation_memory import TranslationMemory
+
+
+def _write_tmx(path, units) -> str:
+    """TMX file of (source, target, changedate or None) en->hi units"""
+    body = "".join(
+        f'<tu{f" changedate={date!r}" if date else ""}>'
+        f'<tuv xml:lang="en"><seg>{source}</seg></tuv>'
+        f'<tuv xml:lang="hi"><seg>{target}</seg></tuv></tu>'
+        for source, target, date in units
+    )
+    path.write_text(f'<?xml version="1.0" encoding="utf-8"?><tmx version="1.4"><header/>'
+                    f'<body>{body}</body></tmx>', encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def tm(tmp_path):
+    tm = TranslationMemory(storage=SnapshotStorage(str(tmp_path / "tm")))
+    yield tm
+    tm.storage.close()
+
+
+@pytest.fixture
+def vendor(tmp_path):
+    """Two vendor files that disagree on the translation of "Save" """
+    directory = tmp_path / "vendor"
+    (directory / "b").mkdir(parents=True)
+    _write_tmx(directory / "a.tmx", [("Save", "सहेजें", "20240101T000000Z"),
+                                     ("Open", "खोलें", None),
+                                     ("Open", "खोलें", None)])
+    _write_tmx(directory / "b" / "c.tmx", [("Save", "सुरक्षित करें", "20240301T000000Z"),
+                                           ("", "खाली", None)])
+    (directory / "notes.txt").write_text("not a TMX file")
+    return str(directory)
+
+
+def test_collect_finds_tmx_files_recursively_once(vendor):
+    files = collect_tmx_files([vendor, vendor + "/a.tmx"])
+    assert [path[len(vendor):] for path in files] == ["/a.tmx", "/b/c.tmx"]
+
+
+@pytest.mark.parametrize("policy, text, alternatives", [
+    ("newest", "सुरक्षित करें", []),
+    ("keep_existing", "सहेजें", []),
+    ("keep_both", "सहेजें", ["सुरक्षित करें"]),
+])
+def test_conflict_policies(tm, vendor, policy, text, alternatives):
+    stats = ingest_tmx(tm, [vendor], policy=policy, workers=1)
+
+    entry = tm.storage.get("en", "hi", "Save")
+    assert entry["text"] == text and entry["origin"] == "tmx"
+    assert [alternative["text"] for alternative in entry.get("alternatives", [])] == alternatives
+    assert (stats["files_done"], stats["processed"], stats["imported"]) == (2, 5, 2)
+    assert (stats["duplicates"], stats["skipped"], stats["progress"]) == (1, 1, 1.0)
+
+
+def test_newest_keeps_a_stored_translation_changed_later(tm, tmp_path):
+    tm.storage.put_many([("en", "hi", "Save", {"text": "सेव करें", "context": None,
+                                               "timestamp": "2025-01-01T00:00:00"})])
+    stats = ingest_tmx(tm, [_write_tmx(tmp_path / "old.tmx",
+                                       [("Save", "सहेजें", "20240101T000000Z")])], workers=1)
+
+    assert tm.storage.get("en", "hi", "Save")["text"] == "सेव करें"
+    assert stats["kept_existing"] == 1
+
+
+def test_reimport_writes_nothing(tm, vendor, monkeypatch):
+    ingest_tmx(tm, [vendor], policy="keep_both", workers=1)
+    writes = []
+    put_many = tm.storage.put_many
+    monkeypatch.setattr(tm.storage, "put_many",
+                        lambda entries: writes.extend(entries) or put_many([]))
+
+    stats = ingest_tmx(tm, [vendor], policy="keep_both", workers=1)
+    assert writes == []
+    assert stats["imported"] == stats["replaced"] == stats["alternatives"] == 0
+    assert stats["duplicates"] == 4
+
+
+def test_both_import_paths_store_the_same_keys(tm, tmp_path):
+    decomposed = unicodedata.normalize("NFD", "Café")
+    path = _write_tmx(tmp_path / "variants.tmx", [(f"  {decomposed} \n", " कैफ़े ", None)])
+    ingest_tmx(tm, [path], workers=1)
+
+    other = TranslationMemory(storage=SnapshotStorage(str(tmp_path / "other")))
+    try:
+        other.import_tmx(path)
+        assert [key for *key, _ in other.storage.iter_entries()] == \
+            [key for *key, _ in tm.storage.iter_entries()] == [["en", "hi", "Café"]]
+        assert other.storage.get("en", "hi", "Café")["text"] == "कैफ़े"
+        assert tm.storage.get("en", "hi", "Café")["text"] == "कैफ़े"
+    finally:
+        other.storage.close()
+    # Whitespace runs inside a segment do not change its content hash
+    assert content_hash("en", "hi", "Save  file", "x") == content_hash("en", "hi", "Save file", "x")
+
+
+def test_unparsable_file_is_reported_and_skipped(tm, vendor, tmp_path):
+    broken = tmp_path / "broken.tmx"
+    broken.write_text("<tmx><body><tu>", encoding="utf-8")
+    progress = []
+    stats = ingest_tmx(tm, [str(broken), vendor], workers=1, progress_callback=progress.append)
+
+    assert list(stats["failed"]) == [str(broken)]
+    assert stats["imported"] == 2
+    assert [update["files_done"] for update in progress] == [1, 2, 3]
+
+
+def test_entries_are_written_after_each_file(tm, vendor, monkeypatch):
+    writes = []
+    put_many = tm.storage.put_many
+    monkeypatch.setattr(tm.storage, "put_many",
+                        lambda entries: writes.append(list(entries)) or put_many(writes[-1]))
+    ingest_tmx(tm, [vendor], policy="newest", workers=1)
+
+    assert [[key[2] for key in batch] for batch in writes] == [["Save", "Open"], ["Save"]]
+
+
+def test_worker_processes_match_the_serial_result(tmp_path, vendor):
+    results = []
+    for workers in (1, 2):
+        storage = SnapshotStorage(str(tmp_path / f"tm{workers}"))
+        try:
+            stats = ingest_tmx(TranslationMemory(storage=storage), [vendor], policy="keep_both",
+                               workers=workers)
+            results.append((stats, {(source_lang, target_lang, source): entry["text"]
+                                    for source_lang, target_lang, source, entry
+                                    in storage.iter_entries()}))
+        finally:
+            storage.close()
+    assert results[0] == results[1]
+
+
+def test_unknown_policy_is_rejected(tm, vendor):
+    with pytest.raises(ValueError):
+        ingest_tmx(tm, [vendor], policy="merge")